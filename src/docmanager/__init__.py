@@ -22,14 +22,34 @@ __version__="3.3.4"
 import atexit
 import sys
 import time
-from docmanager.action import Actions
-from docmanager.cli import parsecli
 from docmanager.core import ReturnCodes
-from docmanager.display import getrenderer
-from docmanager.exceptions import DMConfigFileNotFound
+from docmanager.daemon import forward, runs_locally, use_daemon
+from docmanager.exceptions import DMConfigFileNotFound, DMRunLocally
 from docmanager.logmanager import log
 # from xml.sax._exceptions import SAXParseException
 
+# Names which are imported on first use: a command which is forwarded to
+# the daemon doesn't need lxml, argparse and friends (see run())
+LAZY_NAMES = {
+    "Actions": "docmanager.action",
+    "parsecli": "docmanager.cli",
+    "getrenderer": "docmanager.display",
+}
+
+def __getattr__(name):
+    """Imports the names of LAZY_NAMES on first access (PEP 562)
+
+    :param str name: the attribute
+    """
+    if name not in LAZY_NAMES:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    # pylint:disable=import-outside-toplevel
+    from importlib import import_module
+    value = getattr(import_module(LAZY_NAMES[name]), name)
+    globals()[name] = value
+    return value
+
 def shutdown(start):
     end = int(round(time.time() * 1000))
     log.info("DocManager Runtime: %d seconds" % ((end-start)/1000))
@@ -40,10 +60,37 @@ def main(cliargs=None):
     :param list cliargs: Arguments to parse or None (=use sys.argv)
     """
 
+    # a running daemon does the work (see docmanager.daemon)
+    argv = sys.argv[1:] if cliargs is None else cliargs
+    if use_daemon(argv):
+        code = forward(argv)
+        if code is not None:
+            sys.exit(code)
+
     atexit.register(shutdown, int(round(time.time() * 1000)))
+    run(cliargs)
+
+def run(cliargs=None, handlers=None, indaemon=False):
+    """Runs a docmanager command and exits
+
+    :param list cliargs: Arguments to parse or None (=use sys.argv)
+    :param HandlerCache handlers: parsed files which are kept in memory
+                                  between commands or None
+    :param bool indaemon: True if the daemon runs the command
+    :raise DMRunLocally: if the daemon can't run the command (see
+                         docmanager.daemon.runs_locally)
+    """
+    # pylint:disable=import-outside-toplevel
+    from docmanager.action import Actions
+    from docmanager.cli import parsecli
+    from docmanager.display import getrenderer
 
     try:
-        a = Actions(parsecli(cliargs))
+        args = parsecli(cliargs)
+        if indaemon and runs_locally(args):
+            raise DMRunLocally()
+
+        a = Actions(args, handlers)
         res = a.parse()
         renderer = None
 
@@ -16,31 +16,122 @@
 # To contact SUSE about this file by physical or electronic mail,
 # you may find current contact information at www.suse.com
 
+import os
 import os.path
+import sqlite3
 import sys
 import threading
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, deque
 from configparser import ConfigParser, NoOptionError
-from docmanager.analyzer import Analyzer
-from docmanager.config import GLOBAL_CONFIG, USER_CONFIG, GIT_CONFIG
-from docmanager.core import DEFAULT_DM_PROPERTIES, ReturnCodes, BT_ELEMENTLIST
+from docmanager.cache import MetadataCache
+from docmanager.config import GLOBAL_CONFIG, USER_CONFIG, get_git_repo_config
+from docmanager.core import DEFAULT_DM_PROPERTIES, ReturnCodes, BT_ELEMENTLIST, \
+     READONLY_ACTIONS, BATCHSIZE
 from docmanager.exceptions import *
+from docmanager.fileutil import sync_directory
 from docmanager.logmanager import log, logmgr_flog
 from docmanager.shellcolors import red, green, yellow
 from docmanager.xmlhandler import XmlHandler
+from docmanager.xmlutil import nullcontext
 from docmanager.display import print_stats
 from math import trunc
-from multiprocessing.pool import ThreadPool
+
+
+def parse_snapshot(fname):
+    """Parses a file in a worker process of the 'process' executor
+
+    Element trees can't be sent between processes, so only the snapshot
+    of the properties (see XmlHandler.snapshot) is returned.
+
+    :param string fname: The file name
+    :return: dict with the keys 'file' and 'snapshot' or 'error' and 'errorstr'
+    :rtype: dict
+    """
+    try:
+        handler = XmlHandler(fname, True, readonly=True)
+    except (DMXmlParseError, DMInvalidXMLRootElement, DMFileNotFoundError,
+            DMNotDocBook5File) as err:
+        return { "file": fname, "errorstr": err.errorstr, "error": err.error }
+
+    return { "file": fname, "snapshot": handler.snapshot() }
+
+
+class WriteQueue(object):
+    """Writes XmlHandlers in a pool of threads, see --fsync for when the
+       files are flushed to the disk
+    """
+
+    def __init__(self, jobs, fsync):
+        """Initialize WriteQueue class
+
+        :param int jobs: number of threads; 1 writes in the calling thread
+        :param str fsync: one of FSYNC_POLICIES
+        """
+        # pylint:disable=import-outside-toplevel
+        from multiprocessing.pool import ThreadPool
+
+        self.fsync = fsync
+        self.ahead = 2 * jobs
+        # directories of the written files, flushed once in close()
+        self.directories = set()
+        self.pending = deque()
+        self.pool = ThreadPool(processes=jobs) if jobs > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.pool is not None:
+            self.pool.terminate()
+
+    def put(self, handler):
+        """Writes a handler; waits if too many writes are pending
+
+        :param XmlHandler handler: the handler to write
+        """
+        fsync = self.fsync != "none"
+        syncdir = self.fsync == "file"
+
+        if self.fsync == "batch":
+            self.directories.add(os.path.dirname(os.path.realpath(handler.filename)))
+
+        if self.pool is None:
+            handler.write(fsync, syncdir)
+            return
+
+        self.pending.append(self.pool.apply_async(handler.write, (fsync, syncdir)))
+        while len(self.pending) > self.ahead:
+            self.pending.popleft().get()
+
+    def close(self):
+        """Waits for all pending writes and flushes them if needed
+        """
+        while self.pending:
+            self.pending.popleft().get()
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+        # each file was flushed before it replaced the original file, so
+        # only the new names are left
+        for directory in sorted(self.directories):
+            sync_directory(directory)
+        self.directories.clear()
 
 
 class Actions(object):
     """An Actions instance represents an action event
     """
 
-    def __init__(self, args):
+    def __init__(self, args, handlers=None):
         """Initialize Actions class
 
         :param argparse.Namespace args: result from argparse.parse_args
+        :param HandlerCache handlers: parsed files which are kept in memory
+                                      between actions (see docmanager.daemon)
         """
         logmgr_flog()
 
@@ -48,33 +139,165 @@ class Actions(object):
         self.__files = args.files
         self.__args = args
         self.__xml = OrderedDict()
+        self.__handlers = handlers if args.action in READONLY_ACTIONS else None
 
         # set the default output format for 'alias' sub cmd to 'table'
         if args.action == "alias":
             args.format = "table"
 
-        if self.__files:
-            # temporary xml handler list
-            xml = list()
+        # with --stop-on-error, no file may be touched if one of them is
+        # invalid, so all files have to be parsed before the action starts.
+        # Otherwise the files are parsed while the action runs, see
+        # iter_handlers()
+        if self.__files and self.__args.stop_on_error:
+            for name, entry in self.parse_files(self.__files):
+                self.__xml[name] = entry
 
-            # start multiple processes for initialize all XML files
-            with ThreadPool(processes=self.__args.jobs) as pool:
-                for i in pool.map(self.init_xml_handlers, self.__files):
-                    xml.append(i)
+                # stop if we found an error and --stop-on-error is set
+                if "error" in entry:
+                    log.error("{}: {}".format(name, entry["errorstr"]))
+                    sys.exit(entry["error"])
 
-            # build the self.__xml dict
-            for i in xml:
-                name = i["file"]
-                self.__xml[name] = dict()
+    def open_cache(self):
+        """Opens the metadata cache if the current action can use it
 
-                for x in i:
-                    if x is not "file":
-                        self.__xml[name][x] = i[x]
+        :return: the cache or None
+        :rtype: MetadataCache
+        """
+        if self.__args.action not in READONLY_ACTIONS or self.__args.no_cache:
+            return None
 
-                # stop if we found an error and --stop-on-error is set
-                if self.__args.stop_on_error and "error" in self.__xml[name]:
-                    log.error("{}: {}".format(name, self.__xml[name]["errorstr"]))
-                    sys.exit(self.__xml[name]["error"])
+        try:
+            return MetadataCache(rebuild=self.__args.rebuild_cache)
+        except (OSError, sqlite3.Error) as err:
+            log.warning("Could not open the metadata cache: %s", err)
+            return None
+
+    def iter_handlers(self, prefilter=None):
+        """Iterates over all given files in the given order
+
+        If the files were not parsed in advance, each file is parsed
+        right before the action needs it, so only a few parsed files are
+        kept in memory at the same time.
+
+        :param prefilter: see parse_files()
+        :return: generator of (FILENAME, {'handler': XmlHandler} or
+                 {'error': RETURNCODE, 'errorstr': MESSAGE} or
+                 {'filtered': True})
+        """
+        if self.__xml:
+            return iter(self.__xml.items())
+
+        return self.parse_files(self.__files, prefilter)
+
+    def parse_files(self, files, prefilter=None):
+        """Parses files with the executor chosen by --executor
+
+        Results are yielded in the order of the files. At most two files
+        per job are parsed ahead of the file which was yielded last.
+
+        :param list files: The file names
+        :param prefilter: function which gets the cached snapshot of a file
+                          and returns False if the file is not needed; such
+                          files are yielded as {'filtered': True}
+        :return: generator of (FILENAME, {'handler': XmlHandler} or
+                 {'error': RETURNCODE, 'errorstr': MESSAGE} or
+                 {'filtered': True})
+        """
+        executor = self.__args.executor
+        worker = self.init_xml_handlers
+
+        if executor == "process":
+            if self.__args.action in READONLY_ACTIONS:
+                worker = parse_snapshot
+            else:
+                # a worker process can't send the tree back which we have to modify
+                log.debug("Action '%s' modifies files, using threads instead of processes.",
+                          self.__args.action)
+                executor = "thread"
+
+        if executor == "serial" or len(files) < 2:
+            pool = None
+            ahead = 0
+        else:
+            # pylint:disable=import-outside-toplevel
+            from multiprocessing import Pool
+            from multiprocessing.pool import ThreadPool
+
+            pool = Pool(processes=self.__args.jobs) if executor == "process" \
+                   else ThreadPool(processes=self.__args.jobs)
+            ahead = 2 * self.__args.jobs
+
+        cache = self.open_cache()
+        handlers = self.__handlers
+        # files which didn't change in git are only taken from the caches
+        changed = self.__args.changed
+        skipped = 0
+
+        def finish(result, store):
+            if not isinstance(result, dict):
+                result = result.get()
+
+            snapshot = result.pop("snapshot", None)
+            if snapshot is not None and prefilter is not None and not prefilter(snapshot):
+                result["filtered"] = True
+            elif snapshot is not None:
+                result["handler"] = XmlHandler(result["file"], True, snapshot=snapshot)
+
+            # keep the parsed file in memory for the next action; this does
+            # nothing for handlers which came from there
+            if handlers is not None and "handler" in result:
+                handlers.store(result["file"], result["handler"])
+
+            # files which are unchanged until the next run don't need to be
+            # parsed at all
+            if store and "error" not in result:
+                cache.store(result["file"], snapshot or result["handler"].snapshot())
+
+            return result.pop("file"), result
+
+        try:
+            with pool or nullcontext(None):
+                # each item is (dict or AsyncResult, store in cache?)
+                window = deque()
+
+                for f in files:
+                    handler = handlers.lookup(f) if handlers is not None else None
+                    snapshot = cache.lookup(f) if cache is not None and handler is None else None
+
+                    if handler is not None:
+                        window.append(({"file": f, "handler": handler}, False))
+                    elif snapshot is not None:
+                        window.append(({"file": f, "snapshot": snapshot}, False))
+                    elif changed is not None and f not in changed:
+                        skipped += 1
+                        continue
+                    elif pool is None:
+                        window.append((worker(f), cache is not None))
+                    else:
+                        window.append((pool.apply_async(worker, (f,)), cache is not None))
+
+                    while len(window) > ahead:
+                        yield finish(*window.popleft())
+
+                while window:
+                    yield finish(*window.popleft())
+        finally:
+            if skipped:
+                log.info("%d unchanged files were skipped because they are not cached.",
+                         skipped)
+            if cache is not None:
+                log.debug("Metadata cache: %d hits (%d without stat), %d misses",
+                          cache.hits, cache.watched, cache.misses)
+                cache.close()
+
+    def writequeue(self):
+        """Returns a WriteQueue for --jobs and --fsync
+
+        :rtype: WriteQueue
+        """
+        jobs = 1 if self.__args.executor == "serial" else self.__args.jobs
+        return WriteQueue(jobs, self.__args.fsync)
 
     def init_xml_handlers(self, fname):
         """
@@ -83,9 +306,10 @@ class Actions(object):
         :param string fname: The file name
         """
         handler = None
+        readonly = self.__args.action in READONLY_ACTIONS
 
         try:
-            handler = { "file": fname, "handler": XmlHandler(fname, True) }
+            handler = { "file": fname, "handler": XmlHandler(fname, True, readonly) }
         except (DMXmlParseError, DMInvalidXMLRootElement, DMFileNotFoundError, DMNotDocBook5File) as err:
             handler = { "file": fname, "errorstr": err.errorstr, "error": err.error }
 
@@ -110,7 +334,8 @@ class Actions(object):
         props = list(DEFAULT_DM_PROPERTIES)
 
         # count all valid and invalid xml files
-        validfiles, invalidfiles = self.get_files_status(self.__xml)
+        validfiles = 0
+        invalidfiles = 0
 
         # append bugtracker properties if needed
         if self.__args.with_bugtracker:
@@ -126,50 +351,51 @@ class Actions(object):
                 _set[item] = getattr(self.__args, rprop)
 
         # iter through all xml handlers and init its properties
-        for f in self.__files:
-            if "error" not in self.__xml[f]:
-                xh = self.__xml[f]["handler"]
-
-                log.info("Trying to initialize the predefined DocManager "
-                          "properties for %r.", xh.filename)
-
-                if xh.init_default_props(self.__args.force,
-                                         self.__args.with_bugtracker) == 0:
-                    print("[{}] Initialized default "
-                          "properties for {!r}.".format(green(" ok "),
-                                                        xh.filename))
+        with self.writequeue() as writer:
+            for f, entry in self.iter_handlers():
+                if "error" not in entry:
+                    validfiles += 1
+                    xh = entry["handler"]
+
+                    log.info("Trying to initialize the predefined DocManager "
+                              "properties for %r.", xh.filename)
+
+                    if xh.init_default_props(self.__args.force,
+                                             self.__args.with_bugtracker) == 0:
+                        print("[{}] Initialized default "
+                              "properties for {!r}.".format(green(" ok "),
+                                                            xh.filename))
+                    else:
+                        log.warning("Could not initialize all properties for %r because "
+                              "some properties are already set in the XML file. "
+                              "These would be overwritten by this operation. "
+                              "To perform this operation anyway, add the option "
+                              "'--force' to your command.", xh.filename)
+
+                    # set default values for the given properties
+                    for i in _set:
+                        ret = xh.get(i)
+                        if len(ret[i]) == 0 or self.__args.force:
+                            xh.set({ i: str(_set[i]) })
+
+                    # if bugtracker options are provided, set default values
+                    for i in BT_ELEMENTLIST:
+                        rprop = i.replace("/", "_")
+
+                        if hasattr(self.__args, rprop) and \
+                           getattr(self.__args, rprop) is not None and \
+                           len(getattr(self.__args, rprop)) >= 1:
+                            xh.set({ i: getattr(self.__args, rprop) })
+
+                    # save the changes
+                    if xh.dirty:
+                        writer.put(xh)
                 else:
-                    log.warning("Could not initialize all properties for %r because "
-                          "some properties are already set in the XML file. "
-                          "These would be overwritten by this operation. "
-                          "To perform this operation anyway, add the option "
-                          "'--force' to your command.", xh.filename)
-
-                # set default values for the given properties
-                for i in _set:
-                    ret = xh.get(i)
-                    if len(ret[i]) == 0 or self.__args.force:
-                        xh.set({ i: str(_set[i]) })
-
-                # if bugtracker options are provided, set default values
-                for i in BT_ELEMENTLIST:
-                    rprop = i.replace("/", "_")
-
-                    if hasattr(self.__args, rprop) and \
-                       getattr(self.__args, rprop) is not None and \
-                       len(getattr(self.__args, rprop)) >= 1:
-                        xh.set({ i: getattr(self.__args, rprop) })
-            else:
-                print("[{}] Initialized default properties for {!r}: {}. ".format(\
-                    red(" error "),
-                    f,
-                    red(self.__xml[f]["errorstr"])))
-
-        # save the changes
-        if validfiles:
-            for f in self.__files:
-                if "error" not in self.__xml[f]:
-                    self.__xml[f]["handler"].write()
+                    invalidfiles += 1
+                    print("[{}] Initialized default properties for {!r}: {}. ".format(\
+                        red(" error "),
+                        f,
+                        red(entry["errorstr"])))
 
         # print the statistics
         message = "\n"
@@ -187,47 +413,56 @@ class Actions(object):
         """
         logmgr_flog()
 
-        # count all valid and invalid xml files
-        validfiles, invalidfiles = self.get_files_status(self.__xml)
+        # count all valid, invalid and unchanged xml files
+        validfiles = 0
+        invalidfiles = 0
+        unchanged = 0
+
+        # split key and value before any file is touched
+        args = list()
+        for arg in arguments:
+            try:
+                key, value = arg.split("=")
+            except ValueError:
+                log.error('Invalid usage. '
+                          'Set values with the following format: '
+                          'property=value')
+                sys.exit(ReturnCodes.E_INVALID_USAGE_KEYVAL)
 
-        # split key and value
-        args = [i.split("=") for i in arguments]
+            if key == "languages":
+                value = value.split(",")
+                value = ",".join(self.remove_duplicate_langcodes(value))
 
-        # iter through all key and values
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                print("[ {} ] {} -> {}".format(red("error"), f, red(self.__xml[f]['errorstr'])))
-            else:
-                for arg in args:
-                    try:
-                        key, value = arg
+            if self.__args.bugtracker:
+                key = "bugtracker/" + key
+
+            args.append((key, value))
 
-                        if key == "languages":
-                            value = value.split(",")
-                            value = ",".join(self.remove_duplicate_langcodes(value))
+        # iter through all key and values
+        with self.writequeue() as writer:
+            for f, entry in self.iter_handlers():
+                if "error" in entry:
+                    invalidfiles += 1
+                    print("[ {} ] {} -> {}".format(red("error"), f, red(entry['errorstr'])))
+                else:
+                    validfiles += 1
 
+                    for key, value in args:
                         log.debug("[%s] Trying to set value for property "
                                   "%r to %r.", f, key, value)
+                        entry["handler"].set({key: value})
 
-                        if self.__args.bugtracker:
-                            self.__xml[f]["handler"].set({"bugtracker/" + key: value})
-                        else:
-                            self.__xml[f]["handler"].set({key: value})
-                    except ValueError:
-                        log.error('Invalid usage. '
-                                  'Set values with the following format: '
-                                  'property=value')
-                        sys.exit(ReturnCodes.E_INVALID_USAGE_KEYVAL)
-
-                print("[ {} ] Set data for file {}.".format(green("ok"), f))
+                    # save the changes
+                    if entry["handler"].dirty:
+                        log.debug("[%s] Trying to save the changes.", f)
+                        writer.put(entry["handler"])
 
-        # save the changes
-        for f in self.__files:
-            if "error" not in self.__xml[f]:
-                log.debug("[%s] Trying to save the changes.", f)
-                self.__xml[f]["handler"].write()
+                        print("[ {} ] Set data for file {}.".format(green("ok"), f))
+                    else:
+                        unchanged += 1
+                        print("[ {} ] File {} is unchanged.".format(green("ok"), f))
 
-        print_stats(validfiles, invalidfiles)
+        print_stats(validfiles, invalidfiles, unchanged)
 
 
     def set_attr(self, arguments):
@@ -242,8 +477,10 @@ class Actions(object):
             log.error("You must specify at least one attribute with -a!")
             sys.exit(ReturnCodes.E_INVALID_ARGUMENTS)
 
-        # count all valid and invalid xml files
-        validfiles, invalidfiles = self.get_files_status(self.__xml)
+        # count all valid, invalid and unchanged xml files
+        validfiles = 0
+        invalidfiles = 0
+        unchanged = 0
 
         data = OrderedDict()
         for i in attrs:
@@ -254,24 +491,33 @@ class Actions(object):
                 log.error("The values of -a must have a key and a value, like: key=value or key=")
                 sys.exit(ReturnCodes.E_INVALID_USAGE_KEYVAL)
 
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                print("[{}] {} -> {}".format(red(" error "), f, red(self.__xml[f]["errorstr"])))
-            else:
-                try:
-                    self.__xml[f]["handler"].set_attr(prop, data)
-                    self.__xml[f]["handler"].write()
+        with self.writequeue() as writer:
+            for f, entry in self.iter_handlers():
+                if "error" in entry:
+                    invalidfiles += 1
+                    print("[{}] {} -> {}".format(red(" error "), f, red(entry["errorstr"])))
+                else:
+                    validfiles += 1
+                    try:
+                        entry["handler"].set_attr(prop, data)
 
-                    print("[{}] Set attributes for file {}.".format(green(" ok "), f))
-                except DMPropertyNotFound:
-                    print("[{}] Property {} was not found in {}.".format(red(" error "), yellow(prop), f))
+                        if entry["handler"].dirty:
+                            writer.put(entry["handler"])
+                            print("[{}] Set attributes for file {}.".format(green(" ok "), f))
+                        else:
+                            unchanged += 1
+                            print("[{}] File {} is unchanged.".format(green(" ok "), f))
+                    except DMPropertyNotFound:
+                        print("[{}] Property {} was not found in {}.".format(
+                            red(" error "), yellow(prop), f
+                        ))
 
-                    # we must substract 1 of "validfiles" since XML files are valid even
-                    # if they don't have the given property.
-                    validfiles -= 1
-                    invalidfiles += 1
+                        # we must substract 1 of "validfiles" since XML files are valid even
+                        # if they don't have the given property.
+                        validfiles -= 1
+                        invalidfiles += 1
 
-        print_stats(validfiles, invalidfiles)
+        print_stats(validfiles, invalidfiles, unchanged)
 
 
     def del_attr(self, arguments):
@@ -286,33 +532,44 @@ class Actions(object):
             log.error("You must specify at least one attribute with -a!")
             sys.exit(ReturnCodes.E_INVALID_ARGUMENTS)
 
-        # count all valid and invalid xml files
-        validfiles, invalidfiles = self.get_files_status(self.__xml)
+        # count all valid, invalid and unchanged xml files
+        validfiles = 0
+        invalidfiles = 0
+        unchanged = 0
 
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                print("[{}] {} -> {}".format(red(" error "), f, red(self.__xml[f]["errorstr"])))
-            else:
-                try:
-                    errors = self.__xml[f]["handler"].del_attr(prop, attrs)
-                    self.__xml[f]["handler"].write()
+        with self.writequeue() as writer:
+            for f, entry in self.iter_handlers():
+                if "error" in entry:
+                    invalidfiles += 1
+                    print("[{}] {} -> {}".format(red(" error "), f, red(entry["errorstr"])))
+                else:
+                    validfiles += 1
+                    try:
+                        errors = entry["handler"].del_attr(prop, attrs)
 
-                    if errors:
-                        print("[{}] These attributes couldn't be deleted for {}: {}".format(
-                            yellow(" notice "), f, ", ".join(errors)
-                        ))
-                    else:
-                        print("[{}] Deleted attributes for file {}.".format(green(" ok "), f))
+                        if entry["handler"].dirty:
+                            writer.put(entry["handler"])
+                        else:
+                            unchanged += 1
+
+                        if errors:
+                            print("[{}] These attributes couldn't be deleted for {}: {}".format(
+                                yellow(" notice "), f, ", ".join(errors)
+                            ))
+                        else:
+                            print("[{}] Deleted attributes for file {}.".format(green(" ok "), f))
 
-                except DMPropertyNotFound:
-                    print("[{}] Property {} was not found in {}.".format(red(" error "), yellow(prop), f))
+                    except DMPropertyNotFound:
+                        print("[{}] Property {} was not found in {}.".format(
+                            red(" error "), yellow(prop), f
+                        ))
 
-                    # we must substract 1 of "validfiles" since XML files are valid even
-                    # if they don't have the given property.
-                    validfiles -= 1
-                    invalidfiles += 1
+                        # we must substract 1 of "validfiles" since XML files are valid even
+                        # if they don't have the given property.
+                        validfiles -= 1
+                        invalidfiles += 1
 
-        print_stats(validfiles,invalidfiles)
+        print_stats(validfiles, invalidfiles, unchanged)
 
 
     def get_attr(self, arguments):
@@ -321,8 +578,8 @@ class Actions(object):
 
         data = dict(data=OrderedDict(),errors=None)
 
-        for f in self.__files:
-            data['data'][f] = self.__xml[f]["handler"].get_attr(props, attrs)
+        for f, entry in self.iter_handlers():
+            data['data'][f] = entry["handler"].get_attr(props, attrs)
 
         return data
 
@@ -338,11 +595,11 @@ class Actions(object):
         output = list()
         errors = list()
 
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                errors.append([f, self.__xml[f]['errorstr']])
+        for f, entry in self.iter_handlers():
+            if "error" in entry:
+                errors.append([f, entry['errorstr']])
             else:
-                output.append((f, self.__xml[f]["handler"].get(arguments)))
+                output.append((f, entry["handler"].get(arguments)))
 
         return {'data': output, 'errors': errors}
 
@@ -360,40 +617,40 @@ class Actions(object):
         props_deleted = 0
 
         # delete the properties
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                print("[{}] {} -> {}".format(red(" error "), f, red(self.__xml[f]["errorstr"])))
-                file_errors += 1
-            else:
-                failed_properties = list()
+        with self.writequeue() as writer:
+            for f, entry in self.iter_handlers():
+                if "error" in entry:
+                    print("[{}] {} -> {}".format(red(" error "), f, red(entry["errorstr"])))
+                    file_errors += 1
+                else:
+                    failed_properties = list()
 
-                for arg in arguments:
-                    cond = None
-                    prop = arg
-                    pos = arg.find("=")
+                    for arg in arguments:
+                        cond = None
+                        prop = arg
+                        pos = arg.find("=")
 
-                    # look if there is condition
-                    if pos != -1:
-                        prop = arg[:pos]
-                        cond = arg[pos+1:]
+                        # look if there is condition
+                        if pos != -1:
+                            prop = arg[:pos]
+                            cond = arg[pos+1:]
 
-                    if not self.__xml[f]["handler"].delete(prop, cond):
-                        failed_properties.append(arg)
-                        props_failed += 1
-                    else:
-                        props_deleted += 1
+                        if not entry["handler"].delete(prop, cond):
+                            failed_properties.append(arg)
+                            props_failed += 1
+                        else:
+                            props_deleted += 1
 
-                if not failed_properties:
-                    print("[{}] {}".format(green(" ok "), f))
-                else:
-                    print("[{}] {} -> Couldn't delete these properties: {}".format(
-                          yellow(" info "), f, ", ".join(failed_properties)
-                         ))
+                    # save changes
+                    if entry["handler"].dirty:
+                        writer.put(entry["handler"])
 
-        # save changes
-        for f in self.__files:
-            if "error" not in self.__xml[f]:
-                self.__xml[f]["handler"].write()
+                    if not failed_properties:
+                        print("[{}] {}".format(green(" ok "), f))
+                    else:
+                        print("[{}] {} -> Couldn't delete these properties: {}".format(
+                              yellow(" info "), f, ", ".join(failed_properties)
+                             ))
 
         # print statistics
         message = "\n"
@@ -412,7 +669,73 @@ class Actions(object):
                 )
         print(message)
 
+    def batch(self, arguments): # pylint:disable=unused-argument
+        """Applies the operations of a batch file. Each file is parsed once,
+           gets all of its operations, and is written once.
+
+        :param list arguments:
+        """
+        # pylint:disable=import-outside-toplevel
+        from docmanager.batch import apply_operations, read_operations
+
+        logmgr_flog()
+
+        name = self.__args.batchfile
+
+        try:
+            with nullcontext(sys.stdin) if name == "-" else open(name, encoding="utf-8") as stream:
+                operations = read_operations(stream)
+        except (OSError, UnicodeDecodeError) as err:
+            log.error("Cannot read the batch file {!r}: {}".format(name, err))
+            sys.exit(ReturnCodes.E_FILE_NOT_FOUND)
+        except DMBatchSyntaxError as err:
+            log.error("Invalid operation in {!r}, line {}: {}".format(name, err.line, err.errorstr))
+            sys.exit(ReturnCodes.E_INVALID_BATCH_FILE)
+
+        entries = self.parse_files(list(operations))
+
+        # like for the other actions, no file is touched if one of them is
+        # invalid
+        if self.__args.stop_on_error:
+            entries = list(entries)
+            for f, entry in entries:
+                if "error" in entry:
+                    log.error("{}: {}".format(f, entry["errorstr"]))
+                    sys.exit(entry["error"])
+
+        # count all valid, invalid and unchanged xml files
+        validfiles = 0
+        invalidfiles = 0
+        unchanged = 0
+
+        with self.writequeue() as writer:
+            for f, entry in entries:
+                if "error" in entry:
+                    invalidfiles += 1
+                    print("[{}] {} -> {}".format(red(" error "), f, red(entry["errorstr"])))
+                    continue
+
+                validfiles += 1
+                errors = apply_operations(entry["handler"], operations[f])
+
+                if entry["handler"].dirty:
+                    writer.put(entry["handler"])
+                else:
+                    unchanged += 1
+
+                if errors:
+                    print("[{}] {} -> {}".format(yellow(" notice "), f, "; ".join(errors)))
+                else:
+                    print("[{}] Applied {} operation{} to file {}.".format(
+                        green(" ok "), len(operations[f]),
+                        '' if len(operations[f]) == 1 else 's', f))
+
+        print_stats(validfiles, invalidfiles, unchanged)
+
     def analyze(self, arguments): # pylint:disable=unused-argument
+        # pylint:disable=import-outside-toplevel
+        from docmanager.analyzer import Aggregator, QueryEngine, split_properties
+
         handlers = dict()
 
         # Set default query format
@@ -424,53 +747,57 @@ class Actions(object):
         if self.args.queryformat:
             qformat = self.args.queryformat
 
-        file_data = list()
         errors = list()
-        ntfiledata = namedtuple("FileData", "file,out_formatted,data")
-        validfiles, invalidfiles = self.get_files_status(self.__xml)
+        validfiles = 0
 
-        for f in self.__files:
-            if "error" in self.__xml[f]:
-                errors.append("Error in '{}': {}".format(f, red(self.__xml[f]["errorstr"])))
+        # aggregations print one line per group instead of one line per file
+        aggregator = None
+        if self.__args.group_by or self.__args.count or self.__args.min or \
+           self.__args.max or self.__args.histogram:
+            aggregator = Aggregator(split_properties(self.__args.group_by), self.__args.count,
+                                    split_properties(self.__args.min),
+                                    split_properties(self.__args.max),
+                                    split_properties(self.__args.histogram),
+                                    self.__args.default_output)
+            qformat = ''
+
+        # -qf, -f and -s are only evaluated once for a batch of files
+        engine = QueryEngine(qformat, self.__args.filter, self.__args.sort,
+                             self.__args.default_output, self.__args.limit, aggregator)
+        table = engine.table()
+
+        # cached files which can't match the filters are not loaded at all
+        prefilter = engine.prefilter if engine.filters else None
+
+        # streamed output starts with a single file and doubles the batch
+        # size up to BATCHSIZE, so the first lines are printed right away
+        batchsize = 1 if engine.streaming else BATCHSIZE
+
+        for f, entry in self.iter_handlers(prefilter):
+            if "error" in entry:
+                errors.append("Error in '{}': {}".format(f, red(entry["errorstr"])))
+            elif "filtered" in entry:
+                validfiles += 1
             else:
+                validfiles += 1
                 try:
-                    analyzer = Analyzer(self.__xml[f]["handler"])
+                    table.append(f, entry["handler"])
                 except DMInvalidXMLHandlerObject:
                     log.critical("XML Handler object is None.")
 
-                out = qformat[:]
-                out = analyzer.replace_constants(out)
-                fields = analyzer.extract_fields(out)
-                data = analyzer.fetch_data(self.__args.filter, self.__args.sort, self.__args.default_output)
-
-                if not self.__args.sort:
-                    # we can print all caught data here. If we have no data, we assume that the user
-                    # didn't want to see any data from the XML files and they just want to see the
-                    # output of the constants like {os.file} - https://github.com/openSUSE/docmanager/issues/93
-                    if data:
-                        print(analyzer.format_output(out, data))
-                    elif analyzer.filters_matched:
-                        print(analyzer.format_output(out, data))
-                else:
-                    file_data.append(ntfiledata(file=f, out_formatted=out, data=data))
-
-        if self.__args.sort:
-            values = None
+                # the output of a batch is printed right away; sorted output
+                # is collected by the engine until all files are analyzed
+                if len(table) >= batchsize:
+                    for line in engine.feed(table):
+                        print(line)
+                    table = engine.table()
+                    batchsize = min(batchsize * 2, BATCHSIZE)
 
-            if self.__args.sort == 'filename':
-                values = sorted(file_data, key=lambda x: x.file)
-            else:
-                try:
-                    values = sorted(file_data, key=lambda x: int(x.data[self.__args.sort]) \
-                        if x.data[self.__args.sort].isnumeric() \
-                        else \
-                        x.data[self.__args.sort])
-                except KeyError:
-                    log.error("Could not find key '{}' in -qf for sort.")
+        for line in engine.feed(table):
+            print(line)
 
-            if values:
-                for i in values:
-                    print(analyzer.format_output(i.out_formatted, i.data))
+        for line in engine.finish():
+            print(line)
 
         if not self.__args.quiet:
             print("\nSuccessfully analyzed {} XML files.".format(green(validfiles)))
@@ -480,6 +807,56 @@ class Actions(object):
             for i in errors:
                 print(i)
 
+    def daemon(self, arguments): # pylint:disable=unused-argument
+        # pylint:disable=import-outside-toplevel
+        from docmanager.daemon import Daemon, request
+
+        command = self.__args.daemon_command
+
+        if command == "start":
+            try:
+                request({"command": "status"})
+            except OSError:
+                pass
+            else:
+                log.error("A docmanager daemon is already running.")
+                sys.exit(ReturnCodes.E_DAEMON_ALREADY_RUNNING)
+
+            Daemon(self.__args.cache_size).serve()
+            return
+
+        try:
+            answer = request({"command": command})
+        except OSError:
+            answer = None
+
+        if answer is None:
+            log.error("No docmanager daemon is running.")
+            sys.exit(ReturnCodes.E_DAEMON_NOT_RUNNING)
+
+        print(answer["stdout"], end="")
+
+    def watch(self, arguments): # pylint:disable=unused-argument
+        # pylint:disable=import-outside-toplevel
+        from docmanager.watcher import Watcher
+
+        for directory in self.__args.directories:
+            if not os.path.isdir(directory):
+                log.error("Directory '{}' not found.".format(directory))
+                sys.exit(ReturnCodes.E_FILE_NOT_FOUND)
+
+        try:
+            cache = MetadataCache()
+        except (OSError, sqlite3.Error) as err:
+            log.error("Could not open the metadata cache: %s", err)
+            sys.exit(ReturnCodes.E_PERMISSION_DENIED)
+
+        try:
+            Watcher(cache, self.__args.directories, self.__args.interval,
+                    self.__args.poll).run()
+        finally:
+            cache.close()
+
     def _readconfig(self, confname):
         """Read the configuration file
 
@@ -503,6 +880,10 @@ class Actions(object):
         return conf
 
     def config(self, values): # pylint:disable=unused-argument
+        if self.__args.dump_effective:
+            self.dump_config()
+            sys.exit(ReturnCodes.E_OK)
+
         if not self.__args.system and not self.__args.user and not self.__args.repo and not self.__args.own:
             log.error("No config file specified. Please choice between either '--system', '--user', '--repo', or '--own'.")
             sys.exit(ReturnCodes.E_CONFIGCMD_NO_METHOD_SPECIFIED)
@@ -511,7 +892,7 @@ class Actions(object):
         value = self.__args.value
 
         # search for the section, the property and the value
-        pos = prop.find(".")
+        pos = -1 if prop is None else prop.find(".")
         if pos == -1:
             log.error("Invalid property syntax. Use: section.property")
             sys.exit(ReturnCodes.E_INVALID_CONFIG_PROPERTY_SYNTAX)
@@ -527,7 +908,7 @@ class Actions(object):
         elif self.__args.user:
             confname = USER_CONFIG
         elif self.__args.repo:
-            confname = GIT_CONFIG
+            confname = get_git_repo_config()
         elif self.__args.own:
             confname = self.__args.own
 
@@ -563,11 +944,22 @@ class Actions(object):
                       "Maybe you need sudo rights?".format(confname))
             sys.exit(ReturnCodes.E_PERMISSION_DENIED)
 
+    def dump_config(self):
+        """Prints the merged configuration (see docmanagerconfig) in the
+           INI format, starting with the files it was read from
+        """
+        config = self.__args.config
+
+        for name in config.usedconfigfile:
+            print("# {}".format(name))
+        print()
+        config.write(sys.stdout)
+
     def alias(self, values):
         action = self.__args.alias_action
         alias = self.__args.alias
         value = self.__args.command
-        m = { 0: None, 1: GLOBAL_CONFIG[0], 2: USER_CONFIG, 3: GIT_CONFIG }
+        m = { 0: None, 1: GLOBAL_CONFIG[0], 2: USER_CONFIG, 3: get_git_repo_config() }
         configname = m.get(self.__args.method, self.__args.own)
         save = False
 
@@ -627,22 +1019,6 @@ class Actions(object):
         return new_list
 
 
-    def get_files_status(self, handlers):
-        """Count all valid and invalid XML files
-
-        :param dict handlers: The self.__xml object with all XML handlers
-        """
-        validfiles = 0
-        invalidfiles = 0
-
-        for i in self.__files:
-            if "error" in handlers[i]:
-                invalidfiles += 1
-            else:
-                validfiles += 1
-
-        return [validfiles, invalidfiles]
-
     @property
     def args(self):
         return self.__args
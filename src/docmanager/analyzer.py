@@ -16,271 +16,881 @@
 # To contact SUSE about this file by physical or electronic mail,
 # you may find current contact information at www.suse.com
 
+import heapq
+import operator
+import pickle
+import re
 import sys
-from docmanager.core import NS, ReturnCodes
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from functools import total_ordering
+from docmanager.core import NS, ReturnCodes, BATCHSIZE
 from docmanager.exceptions import DMInvalidXMLHandlerObject, DMAnalyzeInvalidFilterSyntax
+from docmanager.fileutil import FileUtil
 from docmanager.logmanager import log
-from docmanager.xmlutil import localname
 from lxml import etree
 
-class Analyzer(object):
 
-    def __init__(self, xmlhandler):
-        """Constructor for the Analyzer class
+# number of sorted output lines which are kept in memory; if there are
+# more, they are sorted in parts which are saved in temporary files
+SORT_BUFFER = 100000
+
+# placeholders of -qf which are not properties; their values are computed
+# from the file name, but only if the query format contains them
+CONSTANTS = OrderedDict([
+    ("os.file", lambda filename: filename),
+    ("os.lastmodify", lambda filename: FileUtil(filename).get_mtime_format('%Y-%m-%d %H:%M:%S')),
+])
+
+# value of a property which doesn't exist in a file
+MISSING = None
+
+# syntax of -f (--filter): [+|-]PROPERTY OPERATOR CONDITION
+FILTER_SYNTAX = re.compile(r"^([+-]?)([^<>=~]*)(<=|>=|<|>|=|~)(.*)$", re.DOTALL)
+FILTER_IN = re.compile(r"^in\((.*)\)$", re.DOTALL)
+FILTER_COMPARISONS = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+}
+
+NUMBER = re.compile(r"^-?[0-9]+(\.[0-9]+)?$")
+DATE = re.compile(r"^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}$")
+DATE_FORMAT = '%Y-%m-%d'
+DIGITS = re.compile(r"([0-9]+)")
+
+def parse_queryformat(queryformat):
+    """Extract requested properties from -qf (--queryformat)
+
+    :param string queryformat: The query format string from parameter -qf
+    :return list: all requested properties in the order of their first occurrence
+    """
+
+    fields = list()
+    for f in split_queryformat(queryformat)[1]:
+        if f not in fields:
+            fields.append(f)
+
+    return fields
+
+def split_queryformat(queryformat):
+    """Splits -qf (--queryformat) into literal text and placeholders. Escaped
+       parts ('{{...}}' and '\\') stay in the literal text as they are.
+
+    :param string queryformat: The query format string from parameter -qf
+    :return tuple: (literals, fields); there is one literal text before
+                   each placeholder and one after the last placeholder
+    """
+
+    literals = list()
+    fields = list()
+    # start of the current placeholder and end of the last one
+    start = 0
+    end = 0
+
+    state = 0
+    ignorenext = False
+    field = ""
+    skip = -1
+    length = len(queryformat)
+
+    # algorithm for detecting the requested properties
+    for idx, char in enumerate(queryformat):
+        # ignore the current char if needed
+        if ignorenext:
+            ignorenext = False
+
+            # if we are in the "capturing" state (1), we can just add the
+            # current char to our field string
+            if state == 1:
+                field += char
 
-        :param XmlHandler xmlhandler: A valid XmlHandler object
+            continue
+
+        # skip the current char if needed (user for escaping with '{')
+        if skip != -1 and skip == idx:
+            skip = -1
+            continue
+
+        # this is also an escape detection but it is actually no longer needed.
+        # can be removed in future versions
+        if char == '\\':
+            ignorenext = True
+            continue
+
+        # if we are not in any capturing state (1), we jump into this condition if
+        # we found a '{'. '{' means, if there is not a second '{' after the current
+        # '{', this should be a capturing instruction
+        if char == '{' and state == 0:
+            # if we are not at the end of the string, we have a look onto the next
+            # character. If the next character also contains a '{', we are in a
+            # 'ignore everything in it' statement
+            if length-1 != idx:
+                if queryformat[idx+1] == '{':
+                    # ok, we are in a 'ignore everything' statement. we skip now the next
+                    # character (because that's the '{') and jump into the 'ignore everything'
+                    # state (state 3)
+                    skip = idx+1
+                    state = 3
+                else:
+                    # the next character is not a  'ignore everything' instruction. So we're
+                    # in a 'capturing' state. (state 1)
+                    state = 1
+                    start = idx
+            else:
+                # we reached the end of the string - just jump into the 'capturing' statement
+                state = 1
+                start = idx
+            continue
+
+        # detect the end of the 'capturing' sequence. (the current character has to be a '}' and
+        # we also have to be in the 'capturing' state)
+        if char == '}' and state == 1:
+            state = 0
+
+            # we copy our captured string into our 'fields' list - that is really important
+            # because we need all requested properties
+            literals.append(queryformat[end:start])
+            fields.append(field)
+            end = idx+1
+
+            # clear the string because we need it for the next capturing sequence
+            field = ""
+            continue
+
+        # detect the end of a 'ignore everything' sequence
+        if char == '}' and state == 3:
+            # check if we reached the end of the string - if not, look onto the next character.
+            # if the next character is a '}', we can leave the 'ignore everything' sequence.
+            # if not, just skip it
+            if length-1 != idx:
+                if queryformat[idx+1] == '}':
+                    # go back into the 'nothing' (append until we found a new instruction)
+                    # statement
+                    state = 0
+                    skip = idx+1
+
+        # if we're in the 'capturing' sequence, we have to append the current character
+        # to our 'field' string
+        if state == 1:
+            field += char
+
+    literals.append(queryformat[end:])
+    return literals, fields
+
+
+def to_number(value):
+    """Converts a property value into a number
+
+    :param string value: The property value
+    :return float: the number or None if the value is not a number
+    """
+
+    return float(value) if NUMBER.match(value) else None
+
+
+def to_date(value):
+    """Converts a property value (YYYY-MM-DD) into a date
+
+    :param string value: The property value
+    :return date: the date or None if the value is not a date
+    """
+
+    if not DATE.match(value):
+        return None
+
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def get_converter(value):
+    """Returns the conversion which makes values comparable to the given
+       value: numbers, dates (YYYY-MM-DD) or text
+
+    :param string value: The condition of a filter
+    :return function: to_number, to_date or str
+    """
+
+    for converter in (to_number, to_date):
+        if converter(value) is not None:
+            return converter
+
+    return str
+
+
+def sort_key(value):
+    """Returns the sort key of a property value: numbers are sorted by their
+       value and before dates (YYYY-MM-DD), text comes last in natural order
+       ('a2' before 'a10')
+
+    :param string value: The property value
+    :return tuple: the sort key
+    """
+
+    number = to_number(value)
+    if number is not None:
+        return (0, number, ())
+
+    date = to_date(value)
+    if date is not None:
+        return (1, date.toordinal(), ())
+
+    return (2, 0, tuple(int(part) if idx % 2 else part
+                        for idx, part in enumerate(DIGITS.split(value))))
+
+
+def split_properties(values):
+    """Splits the values of an option which takes comma separated
+       properties and can be given several times
+
+    :param list values: The option values or None
+    :return list: the properties
+    """
+
+    props = list()
+    for value in values or []:
+        props.extend(p.strip() for p in value.split(','))
+
+    return props
+
+
+def parse_sort(sort):
+    """Splits -s (--sort) into its sort keys (example: priority,~deadline)
+
+    A leading "~" or "-" sorts a key in descending order. "~" also works
+    for the first key, where argparse would take "-s -deadline" for an
+    option.
+
+    :param string sort: The sort string from parameter -s or None
+    :return list: (property, descending) for each sort key
+    """
+
+    if sort is None:
+        return list()
+
+    return [ (key.strip().lstrip('~-'), key.strip().startswith(('~', '-')))
+             for key in sort.split(',') ]
+
+
+@total_ordering
+class Descending(object):
+    """A sort key in reverse order"""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+class ResultSorter(object):
+    """Collects (sort key, output line) pairs and returns the lines in sorted
+       order. With a limit, only the first lines are kept (in a heap),
+       otherwise lines which don't fit into the buffer are sorted in runs
+       which are saved in temporary files and merged at the end.
+    """
+
+    def __init__(self, limit=None, buffersize=None):
+        """Constructor for the ResultSorter class
+
+        :param int limit: The maximum number of lines (--limit) or None
+        :param int buffersize: The number of lines which are kept in memory
+                               (default: SORT_BUFFER)
         """
 
-        self.xmlhandler = xmlhandler
-        self.fields = set()
-        self.filters_matched = True
+        self.limit = limit
+        self.buffersize = buffersize or SORT_BUFFER
+        self._buffer = list()
+        self._runs = list()
+        # a running number keeps the sort stable
+        self._count = 0
 
-        # validate the XmlHandler object
-        if self.xmlhandler is None:
-            raise DMInvalidXMLHandlerObject()
+    def add(self, results):
+        """Adds output lines
 
-    def replace_constants(self, queryformat):
-        """Replaces constants
+        :param list results: (sort key, output line) pairs
+        """
 
-        :param string queryformat: The query format string from parameter -qf
+        for key, line in results:
+            self._buffer.append((key, self._count, line))
+            self._count += 1
+
+        if self.limit is not None:
+            self._buffer = heapq.nsmallest(max(self.limit, 0), self._buffer)
+        elif len(self._buffer) >= self.buffersize:
+            self.spill()
+
+    def spill(self):
+        """Saves the sorted buffer as a run into a temporary file"""
+
+        self._buffer.sort()
+        run = tempfile.TemporaryFile()
+        for start in range(0, len(self._buffer), BATCHSIZE):
+            pickle.dump(self._buffer[start:start+BATCHSIZE], run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+
+        self._runs.append(run)
+        self._buffer = list()
+
+    @staticmethod
+    def read(run):
+        """Reads a run which was saved by spill()
+
+        :param file run: The temporary file
+        :return: generator of (sort key, number, output line)
         """
 
-        # constants
-        formatconst = [
-            [ "{os.file}", self.xmlhandler.filename ],
-            [ "{os.lastmodify}", self.xmlhandler.fileutil.get_mtime_format('%Y-%m-%d %H:%M:%S') ]
-        ]
+        while True:
+            try:
+                chunk = pickle.load(run)
+            except EOFError:
+                return
+            for item in chunk:
+                yield item
+
+    def __iter__(self):
+        """Returns the output lines in sorted order and removes the runs
+
+        :return: generator of output lines
+        """
+
+        self._buffer.sort()
+
+        try:
+            for _, _, line in heapq.merge(self._buffer, *[ self.read(r) for r in self._runs ]):
+                yield line
+        finally:
+            for run in self._runs:
+                run.close()
+            self._runs = list()
+            self._buffer = list()
+
+
+class Group(object):
+    """The aggregated values of one group of Aggregator"""
+
+    __slots__ = ('count', 'minimum', 'maximum', 'histograms')
+
+    def __init__(self, histograms):
+        self.count = 0
+        # property -> (sort key, value)
+        self.minimum = dict()
+        self.maximum = dict()
+        # property -> {value: count}
+        self.histograms = { prop: dict() for prop in histograms }
+
+
+class Aggregator(object):
+    """Counts files per group (--group-by), and computes the minimum
+       (--min), the maximum (--max), and histograms (--histogram) of
+       properties in a single pass. Only the aggregated values are kept,
+       not the files.
+    """
+
+    def __init__(self, groupby=None, count=False, minimum=None, maximum=None,
+                 histogram=None, default_output=None):
+        """Constructor for the Aggregator class
+
+        :param list groupby: The properties which define a group
+        :param bool count: Print the number of files per group
+        :param list minimum: Properties for the minimum
+        :param list maximum: Properties for the maximum
+        :param list histogram: Properties for the histograms
+        :param string default_output: Value of properties which are empty
+                                      or not set
+        """
 
-        # replace constants
-        for i in formatconst:
-            queryformat = queryformat.replace(i[0], i[1])
+        self.groupby = groupby or list()
+        self.minimum = minimum or list()
+        self.maximum = maximum or list()
+        self.histogram = histogram or list()
+        self.count = count or not (self.minimum or self.maximum or self.histogram)
+        self.default_output = default_output or ''
+        self.groups = dict()
 
-        return queryformat
+    @property
+    def properties(self):
+        """All properties which are needed
 
-    def extract_fields(self, queryformat):
-        """Extract requested properties from -qf (--queryformat)
+        :return list:
+        """
+
+        props = list()
+        for prop in self.groupby + self.minimum + self.maximum + self.histogram:
+            if prop not in props:
+                props.append(prop)
+
+        return props
+
+    def add(self, table, rows):
+        """Adds files to their groups
+
+        :param MetadataTable table: The collected properties
+        :param list rows: The row numbers
+        """
+
+        default = self.default_output
+        columns = table.columns
+
+        for row in rows:
+            key = tuple(columns[prop][row] or default for prop in self.groupby)
+
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = Group(self.histogram)
+            group.count += 1
+
+            # empty values and properties which are not set are ignored
+            for prop in self.minimum:
+                value = columns[prop][row]
+                if value:
+                    value = (sort_key(value), value)
+                    if prop not in group.minimum or value < group.minimum[prop]:
+                        group.minimum[prop] = value
+
+            for prop in self.maximum:
+                value = columns[prop][row]
+                if value:
+                    value = (sort_key(value), value)
+                    if prop not in group.maximum or value > group.maximum[prop]:
+                        group.maximum[prop] = value
+
+            for prop, histogram in group.histograms.items():
+                value = columns[prop][row] or default
+                histogram[value] = histogram.get(value, 0) + 1
+
+    def lines(self):
+        """Returns the output: one line per group, sorted by the values of
+           --group-by, followed by the indented histograms of the group
+
+        :return list: the output lines
+        """
+
+        output = list()
+        default = self.default_output
+
+        for key in sorted(self.groups, key=lambda key: tuple(sort_key(v) for v in key)):
+            group = self.groups[key]
+            head = [ "{}={}".format(p, v) for p, v in zip(self.groupby, key) ]
+
+            values = list()
+            if self.count:
+                values.append("count={}".format(group.count))
+            for prop in self.minimum:
+                values.append("min({})={}".format(
+                    prop, group.minimum.get(prop, (None, default))[1]))
+            for prop in self.maximum:
+                values.append("max({})={}".format(
+                    prop, group.maximum.get(prop, (None, default))[1]))
+
+            line = " ".join(head)
+            if values:
+                line = "{}: {}".format(line, " ".join(values)) if line else " ".join(values)
+            if line:
+                output.append(line)
+
+            indent = "  " if line else ""
+            for prop, histogram in group.histograms.items():
+                for value in sorted(histogram, key=sort_key):
+                    output.append("{}{}={}: {}".format(indent, prop, value, histogram[value]))
+
+        return output
+
+
+class FilterPredicate(object):
+    """A filter of -f (--filter) which is compiled once into a test for
+       property values. Supported are:
+
+       * PROPERTY=VALUE, PROPERTY=in(VALUE1,VALUE2,...)
+       * PROPERTY<VALUE, PROPERTY>VALUE, PROPERTY<=VALUE, PROPERTY>=VALUE
+         (numbers and dates are compared by their value)
+       * PROPERTY~REGEX
+
+       A leading '-' negates the filter, a leading '+' is optional.
+    """
+
+    def __init__(self, filter):
+        """Constructor for the FilterPredicate class
+
+        :param string filter: One single filter (not the filter list)
+        :raise DMAnalyzeInvalidFilterSyntax: if the filter can't be parsed
+        """
+
+        match = FILTER_SYNTAX.match(filter)
+        if match is None:
+            raise DMAnalyzeInvalidFilterSyntax()
+
+        mode, self.prop, self.operator, self.condition = match.groups()
+        self.negate = mode == '-'
+        self._test = self.compile(self.operator, self.condition)
+
+    @staticmethod
+    def compile(op, condition):
+        """Returns the test for a property value
+
+        :param string op: The operator
+        :param string condition: The condition
+        :return function: gets a value and returns something true if the value matches
+        :raise DMAnalyzeInvalidFilterSyntax: if the regular expression is invalid
+        """
+
+        if op == '=':
+            match = FILTER_IN.match(condition)
+            if match is not None:
+                return frozenset(match.group(1).split(',')).__contains__
+            return condition.__eq__
+
+        if op == '~':
+            try:
+                return re.compile(condition).search
+            except re.error:
+                raise DMAnalyzeInvalidFilterSyntax()
+
+        convert = get_converter(condition)
+        compare = FILTER_COMPARISONS[op]
+        bound = convert(condition)
+
+        def test(value):
+            value = convert(value)
+            return value is not None and compare(value, bound)
+
+        return test
+
+    def __call__(self, value):
+        """Tests a property value
+
+        :param string value: The property value or MISSING
+        :return bool: True if the value matches; a missing property never matches
+        """
+
+        if value is MISSING:
+            return False
+
+        return bool(self._test(value)) != self.negate
+
+
+class QueryFormat(object):
+    """A query format string (-qf) which is parsed once and then rendered
+       for any number of files
+    """
+
+    def __init__(self, queryformat):
+        """Constructor for the QueryFormat class
 
         :param string queryformat: The query format string from parameter -qf
-        :return list: the list of all requested properties from -qf (--queryformat)
         """
 
-        fields = set()
-
-        state = 0
-        ignorenext = False
-        field = ""
-        skip = -1
-        length = len(queryformat)
-
-        # algorithm for detecting the requested properties
-        for idx, char in enumerate(queryformat):
-            # ignore the current char if needed
-            if ignorenext:
-                ignorenext = False
-
-                # if we are in the "capturing" state (1), we can just add the
-                # current char to our field string
-                if state == 1:
-                    field += char
-
-                continue
-
-            # skip the current char if needed (user for escaping with '{')
-            if skip != -1 and skip == idx:
-                skip = -1
-                continue
-
-            # this is also an escape detection but it is actually no longer needed.
-            # can be removed in future versions
-            if char == '\\':
-                ignorenext = True
-                continue
-
-            # if we are not in any capturing state (1), we jump into this condition if
-            # we found a '{'. '{' means, if there is not a second '{' after the current
-            # '{', this should be a capturing instruction
-            if char == '{' and state == 0:
-                # if we are not at the end of the string, we have a look onto the next
-                # character. If the next character also contains a '{', we are in a
-                # 'ignore everything in it' statement
-                if length-1 != idx:
-                    if queryformat[idx+1] == '{':
-                        # ok, we are in a 'ignore everything' statement. we skip now the next
-                        # character (because that's the '{') and jump into the 'ignore everything'
-                        # state (state 3)
-                        skip = idx+1
-                        state = 3
-                    else:
-                        # the next character is not a  'ignore everything' instruction. So we're
-                        # in a 'capturing' state. (state 1)
-                        state = 1
-                else:
-                    # we reached the end of the string - just jump into the 'capturing' statement
-                    state = 1
-                continue
-
-            # detect the end of the 'capturing' sequence. (the current character has to be a '}' and
-            # we also have to be in the 'capturing' state)
-            if char == '}' and state == 1:
-                state = 0
-
-                # we copy our captured string into our 'fields' list - that is really important
-                # because we need all requested properties
-                fields.add(field)
-
-                # clear the string because we need it for the next capturing sequence
-                field = ""
-                continue
-
-            # detect the end of a 'ignore everything' sequence
-            if char == '}' and state == 3:
-                # check if we reached the end of the string - if not, look onto the next character.
-                # if the next character is a '}', we can leave the 'ignore everything' sequence.
-                # if not, just skip it
-                if length-1 != idx:
-                    if queryformat[idx+1] == '}':
-                        # go back into the 'nothing' (append until we found a new instruction)
-                        # statement
-                        state = 0
-                        skip = idx+1
-
-            # if we're in the 'capturing' sequence, we have to append the current character
-            # to our 'field' string
-            if state == 1:
-                field += char
+        self.source = queryformat
+        literals, fields = split_queryformat(queryformat)
 
-        # make the fields list public - this will be needed for some other functions
-        # like 'fetch_data' since there is no option for passing the 'fields' list
-        # over the argument list
-        self.fields = fields
-        return self.fields
+        # the placeholders become positional fields of a str.format template
+        self.fields = list()
+        template = list()
+        for literal, field in zip(literals, fields + [None]):
+            template.append(literal.replace('{', '{{').replace('}', '}}'))
 
-    def fetch_data(self, filter=None, sort=None, default_output=None):
-        """Fetches the requested properties from self.extract_fields()
+            if field is not None:
+                if field not in self.fields:
+                    self.fields.append(field)
+                template.append('{{{}}}'.format(self.fields.index(field)))
 
-        :param list filter: The filter list from args.filter (can be None if we don't need the filter function)
-        :param string sort: The sort item for the sort function (this is a property - can be None if we don't
-                            want to use the sort function)
-        :return dict: a dictionary with all properties and their values
+        self.template = ''.join(template)
+
+    @property
+    def properties(self):
+        """The used placeholders which are properties
+
+        :return list:
         """
 
-        data = dict()
+        return [ f for f in self.fields if f not in CONSTANTS ]
 
-        if not filter:
-            self.filters_matched = True
+    def render_columns(self, columns):
+        """Renders the query format for many files at once
 
-        if self.fields:
-            # build the xpath for selecting all needed properties
-            xpath = "*[self::dm:" + " or self::dm:".join(self.fields)
-            if sort is None:
-                xpath += "]"
-            else:
-                # when the args.sort is set, we can append that string to our
-                # xpath. that's needed if we want to display 'maintainer' but
-                # sort
-                xpath += " or self::dm:" + sort + "]"
-                self.fields.add(sort)
-
-            # if there are invalid characters in the xpath, lxml throws an exception.
-            # We have to catch that.
+        :param list columns: One list of values for each entry in self.fields
+        :return list: the formatted outputs
+        """
+
+        return list(map(self.template.format, *columns))
+
+
+class MetadataTable(object):
+    """Properties of many files in columns: one list per property, each
+       with one value per file
+    """
+
+    def __init__(self, properties):
+        """Constructor for the MetadataTable class
+
+        :param list properties: The properties which are collected
+        """
+
+        self.files = list()
+        self.columns = OrderedDict((p, list()) for p in properties)
+        # direct children of the docmanager element with these tags are read
+        self._tags = { "{{{}}}{}".format(NS['dm'], p): p for p in properties }
+
+    def __len__(self):
+        return len(self.files)
+
+    def append(self, filename, xmlhandler):
+        """Adds the properties of a file as a new row
+
+        :param string filename: The file name
+        :param XmlHandler xmlhandler: A valid XmlHandler object
+        """
+
+        if xmlhandler is None:
+            raise DMInvalidXMLHandlerObject()
+
+        # text of the property elements; MISSING for properties which
+        # don't exist, '' for empty ones
+        row = dict()
+        for elem in xmlhandler.dm.iterchildren():
+            prop = self._tags.get(elem.tag)
+            if prop is not None:
+                row[prop] = elem.text or ''
+
+        self.files.append(filename)
+        for prop, column in self.columns.items():
+            column.append(row.get(prop, MISSING))
+
+
+class QueryEngine(object):
+    """Evaluates the query format, the filters and the sort order of
+       'analyze' once for a whole MetadataTable instead of once per file
+    """
+
+    def __init__(self, queryformat, filters=None, sort=None, default_output=None, limit=None,
+                 aggregator=None):
+        """Constructor for the QueryEngine class
+
+        :param string queryformat: The query format string from parameter -qf
+        :param list filters: The filter list from args.filter or None
+        :param string sort: The properties to sort by (or 'filename'),
+                            separated by commas; a leading '-' sorts in
+                            descending order
+        :param string default_output: Output for properties without a value
+        :param int limit: The maximum number of output lines or None
+        :param Aggregator aggregator: Prints aggregated values instead of
+                                      one line per file, or None
+        """
+
+        self.sortkeys = parse_sort(sort)
+        self.default_output = default_output or ''
+        self.limit = limit
+        self.aggregator = aggregator
+        self.filters = list()
+
+        for f in filters or []:
+            try:
+                self.filters.append(FilterPredicate(f))
+            except DMAnalyzeInvalidFilterSyntax:
+                # syntax is wrong
+                log.error("Invalid syntax in filter: '{}'".format(f))
+                log.error("Look into the manual page for more information about using filters.")
+                sys.exit(ReturnCodes.E_ANALYZE_FILTER_INVALID_SYNTAX)
+
+        self.queryformat = QueryFormat(queryformat)
+        self.fields = self.queryformat.properties
+
+        for prop, _ in self.sortkeys:
+            if prop != 'filename' and prop not in self.fields:
+                self.fields.append(prop)
+
+        # output of feed() and finish()
+        self.sorter = ResultSorter(limit) if self.sortkeys else None
+        self.remaining = limit
+
+        self.properties = list(self.fields)
+        needed = [ p.prop for p in self.filters ]
+        if aggregator:
+            needed += aggregator.properties
+        for prop in needed:
+            if prop not in self.properties:
+                self.properties.append(prop)
+
+        for prop in self.properties:
             try:
-                data = { localname(e.tag): e.text  for e in self.xmlhandler.dm.xpath(xpath, namespaces=NS) }
-            except etree.XPathEvalError:
-                log.error("The given XML properties in --sort/-s or --queryformat/-qf are invalid.")
+                etree.QName(NS['dm'], prop)
+            except ValueError:
+                log.error("The given XML properties in --sort/-s, --queryformat/-qf, --group-by, "
+                          "--min, --max, or --histogram are invalid.")
                 sys.exit(ReturnCodes.E_INVALID_XML_PROPERTIES)
 
-            # loop over all 'properties' and fetch their values from the XML file. properties
-            # without values will become an empty string if the 'default-option' was not set
-            for f in self.fields:
-                data.setdefault(f, data.get(f, None))
-
-                if not data[f]:
-                    if not default_output:
-                        data[f] = ''
-                    else:
-                        data[f] = default_output
-
-        if filter:
-            filters = dict()
-            filters_xpath = ""
-
-            for idx, f in enumerate(filter):
-                try:
-                    # validate the filter syntax of any given filter
-                    mode, prop, condition = self.validate_filter(f)
-
-                    # save the details about a filter in a dictionary
-                    filters[prop] = dict()
-                    filters[prop]['mode'] = mode
-                    filters[prop]['condition'] = condition
-
-                    if idx == 0:
-                        filters_xpath += "self::dm:" + prop
-                    else:
-                        filters_xpath += " or self::dm:" + prop
-                except DMAnalyzeInvalidFilterSyntax:
-                    # syntax is wrong
-                    log.error("Invalid syntax in filter: '{}'".format(f))
-                    log.error("Look into the manual page for more information about using filters.")
-                    sys.exit(ReturnCodes.E_ANALYZE_FILTER_INVALID_SYNTAX)
-
-            # catch the values of the filter properties
-            f_xpath = { localname(e.tag): e.text  for e in self.xmlhandler.dm.xpath("*[{}]".format(filters_xpath), namespaces=NS) }
-
-            for f in filters:
-                # if the filter property was not found in the XML file -> the filter didn't
-                # not match and we have to return an empty dictionary
-                if f not in f_xpath:
-                    self.filters_matched = False
-                    return {}
-
-                    # f_xpath[f] = ''
-
-                # condition checks
-                if filters[f]['mode'] == '+':
-                    if f_xpath[f] != filters[f]['condition']:
-                        self.filters_matched = False
-                        return {}
-                elif filters[f]['mode'] == '-':
-                    if f_xpath[f] == filters[f]['condition']:
-                        self.filters_matched = False
-                        return {}
-
-        return data
-
-    def validate_filter(self, filter):
-        """Validates the syntax of a filter (example: +property=value, -property=value, property=value)
+    @property
+    def streaming(self):
+        """True if feed() returns the output of each batch right away
+           (neither -s/--sort nor an aggregation is used)
+        """
+
+        return self.sorter is None and self.aggregator is None
 
-        :param string filter: One single filter (not the filter list)
-        :return list: the mode, the property, the filter property condition
+    def table(self):
+        """Returns an empty table for the needed properties
+
+        :rtype: MetadataTable
         """
 
-        # look for the operator (if no valid operator was found, use '+')
-        if filter[0] != '+' and filter[0] != '-':
-            filter = "+{}".format(filter)
+        return MetadataTable(self.properties)
 
-        # detect the first occurrence of the character '='
-        pos = filter.find("=")
-        if pos == -1:
-            raise DMAnalyzeInvalidFilterSyntax()
+    def select(self, table):
+        """Returns the rows which match all filters
+
+        :param MetadataTable table: The collected properties
+        :return list: the matching row numbers
+        """
+
+        mask = [True] * len(table)
+
+        for predicate in self.filters:
+            mask = [ m and predicate(v) for m, v in zip(mask, table.columns[predicate.prop]) ]
+
+        return [ row for row, m in enumerate(mask) if m ]
+
+    def prefilter(self, snapshot):
+        """Checks the cached properties of a file against the filters, so
+           a file which can't match doesn't have to be loaded
+
+        :param dict snapshot: The snapshot of a file (see XmlHandler.snapshot)
+        :return bool: False if the file doesn't match
+        """
+
+        props = snapshot['props']
+
+        for predicate in self.filters:
+            if predicate.prop in props:
+                value = props[predicate.prop] or ''
+            else:
+                value = MISSING
+
+            if not predicate(value):
+                return False
+
+        return True
+
+    def values(self, table, prop):
+        """Returns the printed values of a property
+
+        :param MetadataTable table: The collected properties
+        :param string prop: The property
+        :return list: one value per row; empty values become --default-output
+        """
+
+        return [ v or self.default_output for v in table.columns[prop] ]
+
+    def keys(self, table, rows):
+        """Returns the sort keys of rows for -s/--sort (see sort_key())
+
+        :param MetadataTable table: The collected properties
+        :param list rows: The row numbers
+        :return list: one sort key per row
+        """
+
+        columns = list()
+        for prop, descending in self.sortkeys:
+            if prop == 'filename':
+                keys = [ table.files[r] for r in rows ]
+            else:
+                values = self.values(table, prop)
+                keys = [ sort_key(values[r]) for r in rows ]
+
+            if descending:
+                keys = [ Descending(k) for k in keys ]
+            columns.append(keys)
 
-        # extract the property and the condition
-        prop = filter[1:-(len(filter)-pos)]
-        cond = filter[pos+1:]
+        return list(zip(*columns))
 
-        return [filter[0],prop,cond]
+    def order(self, table, rows):
+        """Sorts rows by -s/--sort
 
-    def format_output(self, source, data):
-        """formats the output of the -qf (--queryformat)
+        :param MetadataTable table: The collected properties
+        :param list rows: The row numbers
+        :return list: the sorted row numbers
+        """
+
+        if not self.sortkeys:
+            return rows
+
+        keys = self.keys(table, rows)
+        return [ rows[i] for i in sorted(range(len(rows)), key=keys.__getitem__) ]
+
+    def format(self, table, rows):
+        """Formats the query format for the given rows
+
+        :param MetadataTable table: The collected properties
+        :param list rows: The row numbers
+        :return list: one output line per row
+        """
+
+        if not self.queryformat.fields:
+            return [ self.queryformat.template.format() ] * len(rows)
+
+        columns = list()
+        for field in self.queryformat.fields:
+            if field in CONSTANTS:
+                constant = CONSTANTS[field]
+                columns.append([ constant(table.files[r]) for r in rows ])
+            else:
+                values = self.values(table, field)
+                columns.append([ values[r] for r in rows ])
+
+        return self.queryformat.render_columns(columns)
+
+    def run(self, table):
+        """Filters, sorts and formats a table
+
+        :param MetadataTable table: The collected properties
+        :return list: the output lines
+        """
+
+        return self.format(table, self.order(table, self.select(table)))
+
+    def feed(self, table):
+        """Processes a batch of files. Unsorted output can be printed right
+           away, sorted output is collected until finish() is called.
+
+        :param MetadataTable table: The collected properties
+        :return list: the output lines which can be printed now
+        """
+
+        rows = self.select(table)
 
-        :param string source: The query format string (-qf/--queryformat) from the command line
-        :param string data: the data items from fetch_data
-        :return string: the formatted query format string
+        if self.aggregator is not None:
+            self.aggregator.add(table, rows)
+            return list()
+
+        if self.sorter is not None:
+            self.sorter.add(zip(self.keys(table, rows), self.format(table, rows)))
+            return list()
+
+        if self.remaining is not None:
+            rows = rows[:max(self.remaining, 0)]
+            self.remaining -= len(rows)
+
+        return self.format(table, rows)
+
+    def finish(self):
+        """Returns the collected output of feed() in sorted order
+
+        :return: iterable of output lines
         """
 
-        if data:
-            # iterate through each item and replace the properties with their values
-            for i in data:
-                source = source.replace('{' + i + '}', data[i])
+        if self.aggregator is not None:
+            lines = self.aggregator.lines()
+            return lines if self.limit is None else lines[:max(self.limit, 0)]
+
+        if self.sorter is None:
+            return list()
 
-        return source
+        return self.sorter
@@ -0,0 +1,170 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Operations of 'docmanager batch'
+
+Each line of a batch file is a JSON object with an operation for one file:
+
+* {"op": "set", "file": F, "properties": {"PROP": "VALUE", ...}}
+* {"op": "del", "file": F, "properties": ["PROP", "PROP=CONDITION", ...]}
+* {"op": "set-attr", "file": F, "property": P, "attributes": {"ATTR": "VALUE", ...}}
+* {"op": "del-attr", "file": F, "property": P, "attributes": ["ATTR", ...]}
+
+Empty lines are ignored.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from docmanager.exceptions import DMBatchSyntaxError, DMPropertyNotFound
+
+BATCH_OPERATIONS = ("set", "del", "set-attr", "del-attr")
+
+
+def is_string_list(value):
+    """Checks if a value is a non-empty list of non-empty strings
+
+    :rtype: bool
+    """
+    return isinstance(value, list) and bool(value) and \
+           all(isinstance(i, str) and i for i in value)
+
+
+def is_string_dict(value):
+    """Checks if a value is a non-empty object with strings as values
+
+    :rtype: bool
+    """
+    return isinstance(value, dict) and bool(value) and \
+           all(key and isinstance(val, str) for key, val in value.items())
+
+
+def parse_operation(item):
+    """Converts a decoded line of a batch file into an operation
+
+    :param dict item: the decoded line
+    :return: (file, operation); see apply_operations() for operations
+    :rtype: tuple
+    :raise ValueError: if the line is not a valid operation
+    """
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+
+    op = item.get("op")
+    if op not in BATCH_OPERATIONS:
+        raise ValueError("'op' must be one of {}".format(", ".join(BATCH_OPERATIONS)))
+
+    filename = item.get("file")
+    if not isinstance(filename, str) or not filename:
+        raise ValueError("'file' must be a file name")
+
+    if op == "set":
+        props = item.get("properties")
+        if not is_string_dict(props):
+            raise ValueError("'properties' must be an object of properties and values")
+
+        if "languages" in props:
+            # like 'set -p languages=...', duplicates are removed
+            props["languages"] = ",".join(OrderedDict.fromkeys(props["languages"].split(",")))
+
+        return filename, (op, props)
+
+    if op == "del":
+        props = item.get("properties")
+        if not is_string_list(props):
+            raise ValueError("'properties' must be a list of properties")
+        return filename, (op, props)
+
+    prop = item.get("property")
+    if not isinstance(prop, str) or not prop:
+        raise ValueError("'property' must be a property")
+
+    attrs = item.get("attributes")
+    if op == "set-attr" and not is_string_dict(attrs):
+        raise ValueError("'attributes' must be an object of attributes and values")
+    if op == "del-attr" and not is_string_list(attrs):
+        raise ValueError("'attributes' must be a list of attributes")
+
+    return filename, (op, prop, attrs)
+
+
+def read_operations(stream):
+    """Reads a batch file and groups its operations by file. All lines are
+       checked before a file is touched.
+
+    :param stream: the batch file (text)
+    :return: {FILE: [OPERATION, ...]} in the order of the first operation
+             for each file; the operations of a file keep their order
+    :rtype: OrderedDict
+    :raise DMBatchSyntaxError: if a line is not a valid operation
+    """
+    operations = OrderedDict()
+    # absolute path -> name of the file in the first operation
+    names = {}
+
+    for lineno, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+
+        try:
+            filename, operation = parse_operation(json.loads(line, object_pairs_hook=OrderedDict))
+        except ValueError as err:
+            raise DMBatchSyntaxError(lineno, str(err))
+
+        name = names.setdefault(os.path.abspath(filename), filename)
+        operations.setdefault(name, []).append(operation)
+
+    return operations
+
+
+def apply_operations(handler, operations):
+    """Applies operations to a parsed file; check handler.dirty if the file
+       has to be written
+
+    :param XmlHandler handler: the parsed file
+    :param list operations: (op, ...) tuples from read_operations()
+    :return: messages for the operations which failed
+    :rtype: list
+    """
+    errors = []
+
+    for operation in operations:
+        op = operation[0]
+
+        try:
+            if op == "set":
+                handler.set(operation[1])
+            elif op == "del":
+                for arg in operation[1]:
+                    prop, _, cond = arg.partition("=")
+                    if not handler.delete(prop, cond if "=" in arg else None):
+                        errors.append("Couldn't delete property {}".format(arg))
+            elif op == "set-attr":
+                handler.set_attr(operation[1], operation[2])
+            else:
+                failed = handler.del_attr(operation[1], operation[2])
+                if failed:
+                    errors.append("Couldn't delete attributes of {}: {}".format(
+                        operation[1], ", ".join(failed)))
+        except DMPropertyNotFound as err:
+            errors.append("Property {} was not found".format(err.property))
+        except ValueError as err:
+            # invalid element or attribute names
+            errors.append("{}: {}".format(op, err))
+
+    return errors
@@ -0,0 +1,396 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+import json
+import os
+import socket
+import sqlite3
+import stat
+import threading
+import time
+from collections import OrderedDict
+from docmanager.config import USER_CACHE_DIR
+from docmanager.fileutil import FileUtil
+from docmanager.logmanager import log
+
+# Name of the cache file inside USER_CACHE_DIR
+CACHE_NAME = 'metadata.sqlite'
+
+# Increase this number whenever the format of a snapshot or of the tables
+# changes
+CACHE_VERSION = 2
+
+# Number of stored snapshots which are written to the cache at once
+STORE_BATCH = 256
+
+
+def pid_exists(pid):
+    """Checks if a process is running on this host
+
+    :param int pid: the process ID
+    :rtype: bool
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_below(path, root):
+    """Checks if a path is inside a directory
+
+    :param str path: absolute path
+    :param str root: absolute path of the directory
+    :rtype: bool
+    """
+    return path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class MetadataCache(object):
+    """A MetadataCache instance is an on-disk index of the properties of
+       XML files. An entry is only valid as long as the modification time,
+       the size, and the inode of its file are unchanged.
+
+       While a watcher (see docmanager.watcher) runs for a directory, the
+       files in it are not checked with stat(): the watcher marks every
+       file which changes as dirty, and only dirty entries and entries
+       which were checked before the watcher started are checked.
+       Symbolic links and files in symbolically linked directories don't
+       cause events, so they are always checked.
+    """
+
+    def __init__(self, filename=None, rebuild=False):
+        """Opens the cache (and creates it, if needed)
+
+        :param str filename: filename of the cache or None for the default
+                             location in USER_CACHE_DIR
+        :param bool rebuild: drop all existing entries
+        """
+        self.filename = filename or os.path.join(USER_CACHE_DIR, CACHE_NAME)
+        self.hits = 0
+        self.misses = 0
+        # hits which didn't need a stat() call
+        self.watched = 0
+        # directory -> its real path, see is_watchable()
+        self._realdirs = {}
+
+        # (stat key, time of the lookup) of all files which were looked up,
+        # needed for store()
+        self._keys = {}
+        # rows for the files table and (time, path) of checked files, see
+        # flush()
+        self._pending = []
+        self._clean = []
+
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        self._db = sqlite3.connect(self.filename, timeout=10)
+
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            for table in ("files", "dirty", "watchers"):
+                self._db.execute("DROP TABLE IF EXISTS {}".format(table))
+            self._db.execute("PRAGMA user_version = {:d}".format(CACHE_VERSION))
+
+        self._db.execute("CREATE TABLE IF NOT EXISTS files ("
+                         "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, "
+                         "inode INTEGER, snapshot TEXT, checked REAL)")
+        # files which changed since the given time (see watcher)
+        self._db.execute("CREATE TABLE IF NOT EXISTS dirty ("
+                         "path TEXT PRIMARY KEY, time REAL)")
+        # directories which are watched by a running watcher
+        self._db.execute("CREATE TABLE IF NOT EXISTS watchers ("
+                         "root TEXT, pid INTEGER, host TEXT, started REAL)")
+
+        if rebuild:
+            log.debug("Dropping all entries of the metadata cache %r", self.filename)
+            self._db.execute("DELETE FROM files")
+
+        self._db.commit()
+
+        # a watcher on another host can't be checked, so it is not trusted
+        # list of (directory, start time of its watcher)
+        host = socket.gethostname()
+        self.roots = [ (root, started) for root, pid, rowhost, started
+                       in self._db.execute("SELECT root, pid, host, started FROM watchers")
+                       if rowhost == host and pid_exists(pid) ]
+
+    def is_watchable(self, path, root):
+        """Checks if a watcher of root gets events for a file: it has to be
+           a regular file (not a symbolic link) and no directory between
+           root and the file may be a symbolic link
+
+        :param str path: absolute path of the file
+        :param str root: absolute path of the watched directory
+        :rtype: bool
+        """
+        directory = os.path.dirname(path)
+        for name in (directory, root):
+            if name not in self._realdirs:
+                self._realdirs[name] = os.path.realpath(name)
+
+        if self._realdirs[directory] != self._realdirs[root] + directory[len(root):]:
+            return False
+
+        try:
+            return stat.S_ISREG(os.lstat(path).st_mode)
+        except OSError:
+            return False
+
+    def watched_since(self, path):
+        """Returns since when a running watcher reports changes of a file.
+           Hidden directories are not watched, and neither are symbolic
+           links (see is_watchable).
+
+        :param str path: absolute path of the file
+        :return: the start time of the watcher or None if the file is not
+                 watched
+        :rtype: float
+        """
+        times = [ started for root, started in self.roots
+                  if is_below(path, root) and os.sep + '.' not in path[len(root):]
+                  and self.is_watchable(path, root) ]
+        return min(times, default=None)
+
+    def lookup(self, filename):
+        """Returns the cached snapshot of a file
+
+        :param str filename: filename of the XML file
+        :return: the snapshot (see XmlHandler.snapshot) or None, if the file
+                 is not in the cache or was modified in the meantime
+        :rtype: dict
+        """
+        path = os.path.abspath(filename)
+
+        since = self.watched_since(path) if self.roots else None
+        if since is not None:
+            # changes before the watcher started are unknown
+            row = self._db.execute("SELECT snapshot FROM files WHERE path = ? AND checked > ? "
+                                   "AND path NOT IN (SELECT path FROM dirty)",
+                                   (path, since)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.watched += 1
+                return json.loads(row[0], object_pairs_hook=OrderedDict)
+
+        # changes after this time are not covered by the stat() call
+        now = time.time()
+
+        try:
+            key = FileUtil(path).get_stat_key()
+        except OSError:
+            self.misses += 1
+            return None
+
+        self._keys[path] = (key, now)
+        row = self._db.execute("SELECT mtime, size, inode, snapshot FROM files "
+                               "WHERE path = ?", (path,)).fetchone()
+
+        if row is None or tuple(row[:3]) != key:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._clean.append((now, path))
+        return json.loads(row[3], object_pairs_hook=OrderedDict)
+
+    def store(self, filename, snapshot):
+        """Saves the snapshot of a file. The file must be looked up before,
+           so a modification while the file was parsed is detected.
+
+        :param str filename: filename of the XML file
+        :param dict snapshot: the snapshot (see XmlHandler.snapshot)
+        """
+        path = os.path.abspath(filename)
+        entry = self._keys.pop(path, None)
+
+        if entry is None:
+            return
+
+        key, now = entry
+        self._pending.append((path,) + key + (json.dumps(snapshot), now))
+        self._clean.append((now, path))
+
+        if len(self._pending) >= STORE_BATCH:
+            self.flush()
+
+    def flush(self):
+        """Writes the stored snapshots and the times of the checks. Dirty
+           marks of checked files are only removed if the file didn't change
+           after it was checked.
+        """
+        if self._pending:
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                 self._pending)
+        if self._clean and self.roots:
+            self._db.executemany("UPDATE files SET checked = max(checked, ?) WHERE path = ?",
+                                 self._clean)
+            self._db.executemany("DELETE FROM dirty WHERE time < ? AND path = ?", self._clean)
+
+        self._db.commit()
+        self._pending = []
+        self._clean = []
+
+    def mark_dirty(self, paths):
+        """Marks files as changed (called by a watcher)
+
+        :param list paths: absolute paths of the files
+        """
+        now = time.time()
+        self._db.executemany("INSERT OR REPLACE INTO dirty VALUES (?, ?)",
+                             [ (path, now) for path in paths ])
+        self._db.commit()
+
+    def mark_dirty_tree(self, directory):
+        """Marks all cached files inside a directory as changed
+
+        :param str directory: absolute path of the directory
+        """
+        prefix = directory.rstrip(os.sep) + os.sep
+        # all paths which start with prefix; the character after os.sep
+        # ends the range
+        end = prefix[:-1] + chr(ord(os.sep) + 1)
+        self._db.execute("INSERT OR REPLACE INTO dirty SELECT path, ? FROM files "
+                         "WHERE path >= ? AND path < ?", (time.time(), prefix, end))
+        self._db.commit()
+
+    def files_below(self, directory):
+        """Returns the cached files inside a directory
+
+        :param str directory: absolute path of the directory
+        :return: list of (path, stat key)
+        """
+        prefix = directory.rstrip(os.sep) + os.sep
+        end = prefix[:-1] + chr(ord(os.sep) + 1)
+        return [ (row[0], tuple(row[1:]))
+                 for row in self._db.execute("SELECT path, mtime, size, inode FROM files "
+                                             "WHERE path >= ? AND path < ?", (prefix, end)) ]
+
+    def add_watcher(self, roots):
+        """Registers the current process as watcher of directories. Files
+           are trusted once they were checked after this call.
+
+        :param list roots: absolute paths of the directories
+        """
+        host = socket.gethostname()
+        now = time.time()
+
+        # watchers which were killed
+        for pid, rowhost in self._db.execute("SELECT pid, host FROM watchers").fetchall():
+            if rowhost == host and not pid_exists(pid):
+                self._db.execute("DELETE FROM watchers WHERE pid = ? AND host = ?", (pid, host))
+
+        self._db.execute("DELETE FROM dirty WHERE path NOT IN (SELECT path FROM files)")
+        self._db.executemany("INSERT INTO watchers VALUES (?, ?, ?, ?)",
+                             [ (root, os.getpid(), host, now) for root in roots ])
+        self._db.commit()
+
+    def remove_watcher(self):
+        """Unregisters the current process as watcher"""
+        self._db.execute("DELETE FROM watchers WHERE pid = ? AND host = ?",
+                         (os.getpid(), socket.gethostname()))
+        self._db.commit()
+
+    def close(self):
+        """Saves all changes and closes the cache"""
+        self.flush()
+        self._db.close()
+
+
+class HandlerCache(object):
+    """A HandlerCache instance keeps read-only XmlHandler objects in memory
+       for a long running process (see docmanager.daemon). The least
+       recently used handlers are dropped first. Like in MetadataCache, an
+       entry is only valid as long as its file is unchanged.
+    """
+
+    def __init__(self, size):
+        """Creates an empty cache
+
+        :param int size: maximal number of handlers
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+        # path -> (stat key, XmlHandler)
+        self._entries = OrderedDict()
+        # stat keys of all files which were looked up, needed for store()
+        self._keys = {}
+        # files are parsed in threads, see Actions.parse_files()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, filename):
+        """Returns the cached handler of a file
+
+        :param str filename: filename of the XML file
+        :return: the handler or None, if the file is not in the cache or
+                 was modified in the meantime
+        :rtype: XmlHandler
+        """
+        path = os.path.abspath(filename)
+
+        try:
+            key = FileUtil(path).get_stat_key()
+        except OSError:
+            key = None
+
+        with self._lock:
+            entry = self._entries.get(path)
+
+            if key is not None and entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            if key is not None:
+                self._keys[path] = key
+            return None
+
+    def store(self, filename, handler):
+        """Saves the handler of a file. The file must be looked up before,
+           so a modification while the file was parsed is detected.
+
+        :param str filename: filename of the XML file
+        :param XmlHandler handler: the read-only handler
+        """
+        path = os.path.abspath(filename)
+
+        with self._lock:
+            key = self._keys.pop(path, None)
+
+            if key is None:
+                return
+
+            self._entries[path] = (key, handler)
+            self._entries.move_to_end(path)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
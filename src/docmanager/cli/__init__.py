@@ -21,13 +21,17 @@ from configparser import NoOptionError, NoSectionError
 
 from .. import __version__
 from ..config import docmanagerconfig, create_userconfig
-from ..core import ReturnCodes, DEFAULT_DM_PROPERTIES, DEFAULT_PROCESSES
+from ..core import ReturnCodes, DEFAULT_DM_PROPERTIES, DEFAULT_PROCESSES, \
+     DEFAULT_EXECUTOR, EXECUTORS, DEFAULT_FSYNC, FSYNC_POLICIES
 from ..logmanager import log, logmgr_flog, setloglevel
 
 from .checks import *
 from .cmd_alias import alias_subcmd, rewrite_alias
 from .cmd_analyze import analyze_subcmd
 from .cmd_config import config_subcmd
+from .cmd_daemon import daemon_subcmd
+from .cmd_watch import watch_subcmd
+from .cmd_batch import batch_subcmd
 from .cmd_del import del_subcmd
 from .cmd_get import get_subcmd
 from .cmd_init import init_subcmd
@@ -41,7 +45,6 @@ import re
 import os
 import shlex
 import sys
-import urllib.request
 
 
 
@@ -125,7 +128,10 @@ def parsecli(cliargs=None, error_on_config=False):
                        help='The output query format. For more information, have a look into the manual page.'
                 )
     sort = dict(action='store',
-                       help='Sorts the output by XML properties.'
+                       help='Sorts the output by XML properties, separated by commas. '
+                            'A leading "~" (or "-", but not for the first '
+                            'property unless --sort=-PROP is used) sorts in '
+                            'descending order.'
                 )
     filters = dict(action='append',
                        help='Filters the analyzed data. For more information, have a look into the manual page.'
@@ -165,6 +171,63 @@ def parsecli(cliargs=None, error_on_config=False):
                         action='store',
                         help='The amount of jobs for parsing all XML files.'
                         )
+    parser.add_argument('--executor',
+                        choices=EXECUTORS,
+                        default=DEFAULT_EXECUTOR,
+                        help='Parse the XML files in worker processes, in '
+                             'threads or serially. Default: %(default)s'
+                        )
+    parser.add_argument('--fsync',
+                        choices=FSYNC_POLICIES,
+                        default=DEFAULT_FSYNC,
+                        help='Flush written XML files to the disk: never, '
+                             'each file with its directory, or each file with '
+                             'the directories at the end. Default: %(default)s'
+                        )
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='Do not use the metadata cache for reading properties.'
+                        )
+    parser.add_argument('--rebuild-cache',
+                        action='store_true',
+                        help='Drop all entries of the metadata cache before '
+                             'reading properties.'
+                        )
+    parser.add_argument('--no-daemon',
+                        action='store_true',
+                        help='Do not send the command to a running '
+                             'docmanager daemon.'
+                        )
+    parser.add_argument('--recursive',
+                        action='store_true',
+                        help='Search the given directories and their '
+                             'subdirectories for DocBook files.'
+                        )
+    parser.add_argument('--include',
+                        action='append',
+                        metavar='PATTERN',
+                        help='Only take files which match PATTERN from the '
+                             'directories for --recursive (default: *.xml).'
+                        )
+    parser.add_argument('--exclude',
+                        action='append',
+                        metavar='PATTERN',
+                        help='Skip files and directories which match PATTERN '
+                             'for --recursive.'
+                        )
+    gitgroup = parser.add_mutually_exclusive_group()
+    gitgroup.add_argument('--changed-since',
+                          metavar='REF',
+                          help='Only parse the given files which differ between '
+                               'the git revision REF and the working tree; '
+                               'read-only subcommands take the others from '
+                               'the metadata cache, if they are cached.'
+                          )
+    gitgroup.add_argument('--staged',
+                          action='store_true',
+                          help='Like --changed-since, but for the given files '
+                               'which are staged in git.'
+                          )
 
     # Create a subparser for all of our subcommands,
     # save the subcommand in 'dest'
@@ -183,6 +246,9 @@ def parsecli(cliargs=None, error_on_config=False):
     getattr_subcmd(subparsers, stop_on_error, propargs, attributes, filesargs)
     analyze_subcmd(subparsers, queryformat, filters, sort, quiet, stop_on_error, default_output, filesargs)
     config_subcmd(subparsers)
+    daemon_subcmd(subparsers)
+    watch_subcmd(subparsers)
+    batch_subcmd(subparsers, stop_on_error)
     alias_subcmd(subparsers)
 
     # -----
@@ -239,4 +305,13 @@ def parsecli(cliargs=None, error_on_config=False):
         log.error("Invalid argument in '-j/--jobs'. Please choose something between 1-64!")
         sys.exit(ReturnCodes.E_INVALID_ARGUMENTS)
 
+    # Replace directories with the files inside for --recursive
+    expand_directories(args)
+
+    # Replace DC files with the files of their books
+    expand_dc_files(args)
+
+    # Select the files which changed in git
+    select_changed_files(args)
+
     return args
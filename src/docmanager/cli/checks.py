@@ -21,7 +21,6 @@ import os
 import os.path
 import re
 import sys
-import urllib.request
 from glob import glob
 
 from ..core import BT_ELEMENTLIST
@@ -113,6 +112,10 @@ def clean_filelist(args):
 
     :param argparse.Namespace args: Parsed arguments
     """
+    # Directories are searched with -r/--recursive, see expand_directories
+    if args.recursive:
+        return
+
     # Remove any directories from our files list
     allfiles = args.files[:]
     args.files = [f for f in args.files if not os.path.isdir(f)]
@@ -213,6 +216,10 @@ def input_format_check(args):
                 sys.exit(ReturnCodes.E_WRONG_INPUT_FORMAT)
 
     if hasattr(args, 'repository') and args.repository is not None:
+        # pylint:disable=import-outside-toplevel
+        import urllib.error
+        import urllib.request
+
         request = None
         try:
             request = urllib.request.urlopen(args.repository)
@@ -263,6 +270,84 @@ def fix_filelist(files):
                     log.error("Cannot find file {!r}!".format(i))
                     sys.exit(ReturnCodes.E_FILE_NOT_FOUND)
 
+def expand_directories(args):
+    """Replaces the directories in the file list with the DocBook files
+       inside for -r/--recursive
+
+    :param argparse.Namespace args: Parsed arguments
+    """
+    if not args.recursive:
+        return
+
+    if args.files is None:
+        log.error("The subcommand '{}' has no files for --recursive.".format(args.action))
+        sys.exit(ReturnCodes.E_INVALID_ARGUMENTS)
+
+    # pylint:disable=import-outside-toplevel
+    from ..filewalk import walk_files
+
+    files = []
+    for f in args.files:
+        if os.path.isdir(f):
+            files.extend(walk_files(f, args.include, args.exclude, args.jobs))
+        else:
+            files.append(f)
+
+    log.info("Found %d files.", len(files))
+    args.files = files
+
+
+def expand_dc_files(args):
+    """Replaces the DC files in the file list with the files of their books
+       (the MAIN file and everything it includes)
+
+    :param argparse.Namespace args: Parsed arguments
+    """
+    # like dcfile.is_dcfile, without importing lxml for plain file lists
+    if not args.files or not any(os.path.basename(f).startswith("DC-") for f in args.files):
+        return
+
+    # pylint:disable=import-outside-toplevel
+    from ..dcfile import expand_dcfiles
+    from ..exceptions import DMDCFileError
+
+    try:
+        args.files = expand_dcfiles(args.files)
+    except DMDCFileError as err:
+        log.error(err.errorstr)
+        sys.exit(ReturnCodes.E_INVALID_DC_FILE)
+
+    log.info("Resolved %d files.", len(args.files))
+
+
+def select_changed_files(args):
+    """Sets args.changed to the given files which changed in git for
+       --changed-since or --staged, or to None without these options
+
+    :param argparse.Namespace args: Parsed arguments
+    """
+    args.changed = None
+    if args.changed_since is None and not args.staged:
+        return
+
+    option = "--staged" if args.staged else "--changed-since"
+    if args.files is None:
+        log.error("The subcommand '{}' has no files for {}.".format(args.action, option))
+        sys.exit(ReturnCodes.E_INVALID_ARGUMENTS)
+
+    # pylint:disable=import-outside-toplevel
+    from ..exceptions import DMGitError
+    from ..gitutil import changed_files, select_changed
+
+    try:
+        changed = changed_files(args.changed_since, args.staged)
+    except DMGitError as err:
+        log.error("{}: {}".format(option, err.errorstr))
+        sys.exit(ReturnCodes.E_GIT_FAILED)
+
+    args.changed = set(select_changed(args.files, changed))
+    log.info("%d of %d files changed in git.", len(args.changed), len(args.files))
+
 def fix_attributes(args):
     """Make different attributes styles consistent
 
@@ -34,4 +34,35 @@ def analyze_subcmd(subparsers, queryformat, filters, sort, quiet, stop_on_error,
     panalyze.add_argument('--stop-on-error', **stop_on_error)
     panalyze.add_argument('-q', '--quiet', **quiet)
     panalyze.add_argument('-do', '--default-output', **default_output)
+    panalyze.add_argument('--limit',
+                          type=int,
+                          metavar='N',
+                          help='Prints only the first N results (after sorting).'
+                         )
+    panalyze.add_argument('--group-by',
+                          action='append',
+                          metavar='PROP[,PROP...]',
+                          help='Prints one line per group of files with the same '
+                               'values of these properties instead of one line per file.'
+                         )
+    panalyze.add_argument('--count',
+                          action='store_true',
+                          help='Prints the number of files (per group).'
+                         )
+    panalyze.add_argument('--min',
+                          action='append',
+                          metavar='PROP[,PROP...]',
+                          help='Prints the minimum of properties (per group).'
+                         )
+    panalyze.add_argument('--max',
+                          action='append',
+                          metavar='PROP[,PROP...]',
+                          help='Prints the maximum of properties (per group).'
+                         )
+    panalyze.add_argument('--histogram',
+                          action='append',
+                          metavar='PROP[,PROP...]',
+                          help='Prints how many files have each value of '
+                               'properties (per group).'
+                         )
     panalyze.add_argument("files", **filesargs)
@@ -0,0 +1,36 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+
+def batch_subcmd(subparsers, stop_on_error):
+    """Create the 'batch' subcommand
+
+    :param subparsers:           Subparser for all subcommands
+    :param dict stop_on_error:   Dict for the --stop-on-error option
+    """
+
+    pbatch = subparsers.add_parser('batch',
+                                   help='Applies set, del, set-attr, and del-attr operations '
+                                        'from a file with one JSON object per line. Each XML '
+                                        'file is parsed and written only once.'
+                                   )
+    pbatch.add_argument('--stop-on-error', **stop_on_error)
+    pbatch.add_argument('batchfile',
+                        metavar='OPERATIONS',
+                        help='The file with the operations or "-" for stdin.'
+                        )
@@ -44,8 +44,13 @@ def config_subcmd(subparsers):
                          action='store',
                          help='Uses a specified config file.'
                          )
+    pconfig.add_argument('--dump-effective',
+                         action='store_true',
+                         help='Prints the merged configuration of all config files'
+                              ' which are in effect.')
     pconfig.add_argument('property',
                          metavar='PROPERTY',
+                         nargs='?',
                          help='Property (Syntax: section.property)')
     pconfig.add_argument('value',
                          metavar='VALUE',
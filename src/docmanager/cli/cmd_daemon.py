@@ -0,0 +1,43 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+from ..core import DEFAULT_DAEMON_CACHE
+
+
+def daemon_subcmd(subparsers):
+    """Create the 'daemon' subcommand
+
+    :param subparsers:           Subparser for all subcommands
+    """
+
+    pdaemon = subparsers.add_parser('daemon',
+                                    help='Keeps parsed XML files in memory for '
+                                         'the following docmanager calls.'
+                                    )
+    pdaemon.add_argument('daemon_command',
+                         metavar='COMMAND',
+                         choices=('start', 'stop', 'status'),
+                         help='start (runs in the foreground), stop, or status'
+                         )
+    pdaemon.add_argument('--cache-size',
+                         type=int,
+                         metavar='N',
+                         default=DEFAULT_DAEMON_CACHE,
+                         help='The maximal number of parsed XML files in memory. '
+                              'Default: %(default)s'
+                         )
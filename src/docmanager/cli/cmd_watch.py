@@ -0,0 +1,48 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+from ..core import DEFAULT_WATCH_INTERVAL
+
+
+def watch_subcmd(subparsers):
+    """Create the 'watch' subcommand
+
+    :param subparsers:           Subparser for all subcommands
+    """
+
+    pwatch = subparsers.add_parser('watch',
+                                   help='Watches directories for changed XML files, so '
+                                        'the metadata cache can skip checking them.'
+                                   )
+    pwatch.add_argument('--poll',
+                        action='store_true',
+                        help='Check the cached files in regular intervals instead '
+                             'of using inotify.'
+                        )
+    pwatch.add_argument('--interval',
+                        type=float,
+                        metavar='SECONDS',
+                        default=DEFAULT_WATCH_INTERVAL,
+                        help='Seconds between two checks when polling. '
+                             'Default: %(default)s'
+                        )
+    pwatch.add_argument('directories',
+                        nargs='+',
+                        metavar='DIR',
+                        help='One or more directories (with their subdirectories).'
+                        )
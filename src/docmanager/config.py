@@ -16,45 +16,200 @@
 # To contact SUSE about this file by physical or electronic mail,
 # you may find current contact information at www.suse.com
 
+import json
 import os
-import shlex
-import subprocess
 import sys
 from configparser import ConfigParser
+from functools import lru_cache
 from docmanager.exceptions import DMConfigFileNotFound
+from docmanager.fileutil import FileUtil
 from docmanager.logmanager import log
 
 BASECONFIG_NAME = 'docmanager.conf'
 CONFIG_NAME = os.path.join('docmanager', BASECONFIG_NAME)
 GLOBAL_CONFIG = [os.path.join('/etc', CONFIG_NAME)]
-GIT_CONFIG = None # Will be set below
 XDG_CONFIG_HOME = os.path.expanduser(os.environ.get('XDG_CONFIG_HOME', '~/.config/'))
 USER_CONFIG = os.path.join(XDG_CONFIG_HOME, CONFIG_NAME)
+XDG_CACHE_HOME = os.path.expanduser(os.environ.get('XDG_CACHE_HOME', '~/.cache/'))
+USER_CACHE_DIR = os.path.join(XDG_CACHE_HOME, 'docmanager')
+
+# Name of the merged configuration cache inside USER_CACHE_DIR
+CONFIG_CACHE_NAME = 'config.json'
+# Increase whenever the layout of the cache changes
+CONFIG_CACHE_VERSION = 1
+# Number of merged configurations (one for each list of config files,
+# for example one for each git repository) which are kept
+CONFIG_CACHE_ENTRIES = 16
 
 def get_git_repo_config():
-    """Return root Git repository, if available
+    """Return root Git repository, if available. The result is
+       remembered for each working directory.
 
     :return: absolut path to Git repository
     :rtype: str
     """
     try:
-        cmd = shlex.split("git rev-parse --show-toplevel")
-        git = subprocess.Popen(cmd,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-        gitrepo = git.communicate()
-        # Not a git repository?
-        if git.returncode != 128:
-            gitrepo = gitrepo[0].decode("utf-8").strip()
-            return os.path.join(gitrepo, os.path.join('.git', BASECONFIG_NAME))
+        return _git_repo_config(os.getcwd())
+    except FileNotFoundError: # pylint:disable=undefined-variable
+        # the working directory was removed
+        return None
+
 
+def get_git_repo_root():
+    """Return the top directory of the Git repository of the working
+       directory, if available
+
+    :return: absolut path to the top directory
+    :rtype: str
+    """
+    try:
+        return _git_repo_root(os.getcwd())
     except FileNotFoundError: # pylint:disable=undefined-variable
-        # If we don't find the git command, we skip the local config file
-        # alltogether
+        # the working directory was removed
         return None
 
 
-GIT_CONFIG = get_git_repo_config()
+def _git_repo_config(cwd):
+    """Return root Git repository of a directory, if available
+
+    :param str cwd: the directory
+    :return: absolut path to Git repository
+    :rtype: str
+    """
+    root = _git_repo_root(cwd)
+    if root is None:
+        return None
+    return os.path.join(root, '.git', BASECONFIG_NAME)
+
+
+@lru_cache(maxsize=None)
+def _git_repo_root(cwd):
+    """Return the top directory of the Git repository of a directory, if
+       available. Like `git rev-parse --show-toplevel`, the directory and
+       its parents are searched for '.git', but without starting a git
+       process.
+
+    :param str cwd: the directory
+    :return: absolut path to the top directory
+    :rtype: str
+    """
+    directory = os.path.abspath(cwd)
+    while True:
+        if os.path.exists(os.path.join(directory, '.git')):
+            return directory
+
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            # Not a git repository
+            return None
+        directory = parent
+
+
+def default_config():
+    """Return the configuration file which is shipped with docmanager
+
+    :return: path to the file
+    :rtype: str
+    """
+    # When code with __file__ is packed inside a zipfile, it can no longer
+    # assume that __file__ or __path__ contain filenames or directory
+    # names, and so it will fail (see also PEP 302)
+    #
+    # As such:
+    # 1. First use the file next to __file__, if it exists
+    # 2. If it doesn't, try pkg_resources from setuptools, which extracts the
+    #    file (importing pkg_resources takes longer than reading all
+    #    config files, so it is only the fallback)
+    #
+    # Source:
+    # http://peak.telecommunity.com/DevCenter/PythonEggs#accessing-package-resources
+    #
+    cc = os.path.join(os.path.dirname(__file__), BASECONFIG_NAME)
+    if os.path.isfile(cc):
+        return cc
+
+    try:
+        from pkg_resources import resource_filename
+        return resource_filename(__name__, BASECONFIG_NAME)
+    except ImportError:
+        return cc
+
+
+def stat_configfiles(configfiles):
+    """Return the key of the config cache for a list of config files
+
+    :param list configfiles: the config files in the order they are read
+    :return: [[FILE, STATKEY], ...]; STATKEY is None for missing files
+    :rtype: list
+    """
+    keys = []
+    for name in configfiles:
+        try:
+            key = list(FileUtil(name).get_stat_key())
+        except OSError:
+            key = None
+        keys.append([name, key])
+    return keys
+
+
+def load_configcache(keys):
+    """Return the merged configuration for config files from the cache
+
+    :param list keys: the result of stat_configfiles()
+    :return: the cached configuration or None if the files are not cached
+             or changed since
+    :rtype: dict
+    """
+    try:
+        with open(os.path.join(USER_CACHE_DIR, CONFIG_CACHE_NAME), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if cache["version"] == CONFIG_CACHE_VERSION:
+            for entry in cache["entries"]:
+                if entry["files"] == keys:
+                    return entry
+    except (KeyError, TypeError):
+        # a broken cache is replaced by store_configcache()
+        pass
+    return None
+
+
+def store_configcache(keys, config):
+    """Save the merged configuration of config files in the cache
+
+    :param list keys: the result of stat_configfiles() before the files
+                      were read
+    :param configparser.ConfigParser config: the merged configuration
+    """
+    filename = os.path.join(USER_CACHE_DIR, CONFIG_CACHE_NAME)
+    defaults = config.defaults()
+    sections = { "DEFAULT": dict(defaults) }
+    for section in config.sections():
+        # items() contains the defaults as well
+        sections[section] = { key: value
+                              for key, value in config.items(section, raw=True)
+                              if defaults.get(key) != value }
+
+    try:
+        with open(filename, encoding="utf-8") as f:
+            cache = json.load(f)
+        entries = [ e for e in cache["entries"] if e["files"] != keys ] \
+                  if cache["version"] == CONFIG_CACHE_VERSION else []
+    except (OSError, ValueError, KeyError, TypeError):
+        entries = []
+
+    # the most recently used configuration comes first
+    entries.insert(0, { "files": keys, "used": config.usedconfigfile, "sections": sections })
+    cache = { "version": CONFIG_CACHE_VERSION, "entries": entries[:CONFIG_CACHE_ENTRIES] }
+
+    try:
+        os.makedirs(USER_CACHE_DIR, exist_ok=True)
+        FileUtil(filename).write_atomic(json.dumps(cache))
+    except OSError as err:
+        log.debug("Could not save the config cache %r: %s", filename, err)
 
 
 def docmanagerconfig(cfgfiles=None, include_etc=True):
@@ -66,13 +221,15 @@ def docmanagerconfig(cfgfiles=None, include_etc=True):
        * $XDG_CONFIG_HOME/docmanager/docmanager.config if not found, falls back
          to ~/.config/docmanager/docmanager.config
        * GIT_REPO_DIR/.git/docmanager.conf
-         (GIT_REPO_DIR is retrieved by the command
-         `git rev-parse --show-toplevel`)
+         (GIT_REPO_DIR is the nearest parent directory with a .git)
        * DOCMANAGER_GIT_REPO/etc/config
 
       See the XDG Base Directory Specification:
       http://standards.freedesktop.org/basedir-spec/basedir-spec-latest.html
 
+      The merged configuration is kept in USER_CACHE_DIR/config.json, so
+      the files are only read again when one of them changes.
+
       :param list cfgfiles: your own list of configfiles
       :param bool include_etc: Should the develop(!) 'etc/' directory included?
                                Only useful for development
@@ -106,40 +263,25 @@ def docmanagerconfig(cfgfiles=None, include_etc=True):
     #
     # See http://stackoverflow.com/a/1883251
     if (cfgfiles is None) and include_etc and hasattr(sys, 'base_prefix'):
-        #dd = os.path.dirname(__file__)
-        #cc = os.path.join(dd, BASECONFIG_NAME)
-        #configfiles.append(cc)
-        #log.debug("Running inside a virtual env, using %s", cc)
-        #
-        # When code with __file__ is packed inside a zipfile, it can no longer
-        # assume that __file__ or __path__ contain filenames or directory
-        # names, and so it will fail (see also PEP 302)
-        #
-        # As such:
-        # 1. First try to use pkg_resources from setuptools (which is installed
-        #    anyway in a virtual Python environment)
-        # 2. If that doesn't work, fallback to the __file__ method
-        #
-        # Source:
-        # http://peak.telecommunity.com/DevCenter/PythonEggs#accessing-package-resources
-        #
-        try:
-            from pkg_resources import resource_filename
-            cc = resource_filename(__name__, BASECONFIG_NAME)
-            configfiles.append(cc)
-        except ImportError:
-            # Use fallback method
-            dd = os.path.dirname(__file__)
-            cc = os.path.join(dd, BASECONFIG_NAME)
-            configfiles.append(cc)
+        configfiles.append(default_config())
         log.info("Running inside a virtual env, using %r", configfiles[-1])
 
+    # The merged configuration is cached as long as none of the files
+    # is created, changed, or removed
+    keys = stat_configfiles(configfiles)
     config = ConfigParser()
-    x = config.read(configfiles)
+    cached = load_configcache(keys)
 
-    if not x:
+    if cached is not None:
+        config.read_dict(cached["sections"])
+        x = cached["used"]
+        log.debug("Using cached configuration")
+    else:
+        x = config.read(configfiles)
+
+        if not x:
 
-        raise DMConfigFileNotFound(configfiles)
+            raise DMConfigFileNotFound(configfiles)
 
     # Save state of configuration files
     config.configfiles = configfiles
@@ -147,6 +289,9 @@ def docmanagerconfig(cfgfiles=None, include_etc=True):
     log.debug("All configfiles %s", configfiles)
     log.debug("Used config file: %s", x)
 
+    if cached is None:
+        store_configcache(keys, config)
+
     return config
 
 
@@ -24,6 +24,26 @@ NS = {
 # the default amount of processes for parsing all XML files
 DEFAULT_PROCESSES = 4
 
+# how the XML files are parsed: in a pool of worker processes, in a pool
+# of threads, or one after another in the main thread
+EXECUTORS = ("process", "thread", "serial")
+DEFAULT_EXECUTOR = "thread"
+
+# when written files are flushed to the disk: never, each file before it
+# replaces the original file, or all files at once after the last one
+FSYNC_POLICIES = ("none", "file", "batch")
+DEFAULT_FSYNC = "none"
+
+# the number of parsed files which are kept in memory by 'docmanager daemon'
+DEFAULT_DAEMON_CACHE = 1024
+
+# seconds between two checks of 'docmanager watch --poll'
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# number of files whose properties are collected by 'analyze' before they
+# are filtered and printed (or handed over to the ResultSorter)
+BATCHSIZE = 1024
+
 # If you add new default properties:
 # * should start with a different character
 # * are used to create options
@@ -66,10 +86,16 @@ DEFAULTSUBCOMMANDS = {
     "analyze":  "analyze",
     "c":        "config",
     "config":   "config",
+    "daemon":   "daemon",
+    "watch":    "watch",
+    "batch":    "batch",
     "al":       "alias",
     "alias":    "alias"
 }
 
+# Actions which never modify a file; these only read the <info> element
+READONLY_ACTIONS = ("get", "get_attr", "analyze")
+
 STATUSFLAGS = ('editing', 'edited', 'proofing', 'proofed', 'comment',
                'locdrop', 'ready')
 
@@ -94,6 +120,11 @@ class ReturnCodes(object):
     E_USER_EXIT = 17
     E_FILE_IS_DIRECTORY = 18
     E_INVALID_ROOT_ELEMENT = 19
+    E_DAEMON_NOT_RUNNING = 20
+    E_DAEMON_ALREADY_RUNNING = 21
+    E_INVALID_BATCH_FILE = 22
+    E_GIT_FAILED = 23
+    E_INVALID_DC_FILE = 24
 
 VALIDROOTS = ('abstract', 'address', 'annotation', 'appendix', 'article', 'audiodata',
               'audioobject', 'bibliodiv', 'bibliography', 'bibliolist',
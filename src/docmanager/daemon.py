@@ -0,0 +1,331 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""A long running docmanager process which keeps parsed files in memory
+
+'docmanager daemon start' listens on a Unix socket which only the current
+user can access. While it runs, every docmanager call sends its command
+line and working directory to the daemon, which runs the command and sends
+back the output and the exit code.
+
+Each message is one line of JSON:
+
+* request:  {"argv": [...], "cwd": "...", "env": {...}} or
+            {"command": "stop"|"status"}
+* answer:   {"stdout": "...", "stderr": "...", "exit": CODE} or
+            {"local": REASON} if the client has to run the command itself
+
+This module is imported by every docmanager call, so the client part only
+needs the standard library.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+
+# Name of the socket inside the runtime directory
+SOCKET_NAME = 'daemon.sock'
+
+# Environment variables which change what a command does (config and
+# cache files, {USER} in aliases, the encoding of files, git); the daemon
+# only runs commands of clients with the same values
+ENVIRONMENT = ('HOME', 'USER', 'XDG_CONFIG_HOME', 'XDG_CACHE_HOME',
+               'LANG', 'LC_ALL', 'LC_CTYPE', 'GIT_DIR', 'GIT_WORK_TREE')
+
+
+def environment():
+    """Returns the values of the variables in ENVIRONMENT
+
+    :rtype: dict
+    """
+    return { name: os.environ.get(name) for name in ENVIRONMENT }
+
+
+def socket_path():
+    """Returns the path of the socket of the daemon: in $XDG_RUNTIME_DIR
+       or, if that is not set, in the docmanager cache directory
+
+    :rtype: str
+    """
+    runtimedir = os.environ.get('XDG_RUNTIME_DIR') or \
+        os.path.expanduser(os.environ.get('XDG_CACHE_HOME', '~/.cache/'))
+    return os.path.join(runtimedir, 'docmanager', SOCKET_NAME)
+
+
+def send(sock, message):
+    """Sends a message
+
+    :param socket.socket sock: the connected socket
+    :param dict message: the message
+    """
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def receive(stream):
+    """Receives a message
+
+    :param stream: binary file object of the connected socket
+    :return: the message or None if the connection was closed
+    :rtype: dict
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def connect(path=None):
+    """Connects to the daemon
+
+    :param str path: the socket or None for socket_path()
+    :return: the connected socket
+    :rtype: socket.socket
+    :raise OSError: if no daemon is running
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(message, path=None):
+    """Sends a message to the daemon and returns its answer
+
+    :param dict message: the request
+    :param str path: the socket or None for socket_path()
+    :return: the answer or None if the daemon closed the connection
+    :rtype: dict
+    :raise OSError: if no daemon is running
+    """
+    with connect(path) as sock, sock.makefile('rb') as stream:
+        send(sock, message)
+        return receive(stream)
+
+
+def forward(argv, path=None):
+    """Runs a docmanager command in the daemon, if one is running
+
+    :param list argv: the command line arguments
+    :param str path: the socket or None for socket_path()
+    :return: the exit code or None if no daemon is running or the
+             command has to run locally
+    :rtype: int
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        sock = connect(path)
+    except OSError:
+        # a socket which was left behind by a daemon which was killed
+        return None
+
+    with sock, sock.makefile('rb') as stream:
+        try:
+            send(sock, {"argv": argv, "cwd": os.getcwd(), "env": environment()})
+            answer = receive(stream)
+        except OSError:
+            answer = None
+
+    # the command could have been run already, so it is not repeated
+    if answer is None:
+        sys.stderr.write("The docmanager daemon closed the connection.\n")
+        return 1
+
+    if "local" in answer:
+        return None
+
+    sys.stdout.write(answer["stdout"])
+    sys.stderr.write(answer["stderr"])
+    return answer["exit"]
+
+
+def use_daemon(argv):
+    """Checks if a command line may be sent to the daemon; the daemon
+       itself decides which commands it can't run (see runs_locally)
+
+    :param list argv: the command line arguments
+    :rtype: bool
+    """
+    if "--" in argv:
+        argv = argv[:argv.index("--")]
+    return "--no-daemon" not in argv
+
+
+def runs_locally(args):
+    """Checks if a parsed command line has to run in the client: 'daemon'
+       and 'watch' would block the daemon, and the daemon can't read the
+       stdin of the client
+
+    :param argparse.Namespace args: result from parsecli
+    :rtype: bool
+    """
+    return args.action in ("daemon", "watch") or getattr(args, "batchfile", None) == "-"
+
+
+class Daemon(object):
+    """Runs docmanager commands for clients one after another. Parsed files
+       of read-only commands are kept in a HandlerCache.
+    """
+
+    def __init__(self, cachesize, path=None):
+        """Initialize Daemon class
+
+        :param int cachesize: the maximal number of parsed files in memory
+        :param str path: the socket or None for socket_path()
+        """
+        # pylint:disable=import-outside-toplevel
+        from docmanager.cache import HandlerCache
+
+        self.path = path or socket_path()
+        self.handlers = HandlerCache(cachesize)
+        # the configuration was read with these values, see ENVIRONMENT
+        self.environment = environment()
+        self.requests = 0
+        self.running = False
+
+    def serve(self):
+        """Listens on the socket until a 'stop' request arrives
+
+        :raise OSError: if the socket can't be created
+        """
+        # pylint:disable=import-outside-toplevel
+        from docmanager.logmanager import log
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(umask)
+
+        log.info("docmanager daemon listens on %r", self.path)
+        self.running = True
+
+        try:
+            server.listen(16)
+            while self.running:
+                conn, _ = server.accept()
+                with conn, conn.makefile('rb') as stream:
+                    if not self.is_allowed(conn):
+                        log.warning("Rejected a connection of another user.")
+                        continue
+                    try:
+                        message = receive(stream)
+                        if message is not None:
+                            send(conn, self.handle(message))
+                    except (OSError, ValueError) as err:
+                        log.warning("Failed request: %s", err)
+        finally:
+            server.close()
+            os.unlink(self.path)
+
+    @staticmethod
+    def is_allowed(conn):
+        """Checks if the client runs as the same user (if the system can
+           tell, the socket is only accessible by the user anyway)
+
+        :param socket.socket conn: the connection
+        :rtype: bool
+        """
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', creds)
+        return uid == os.getuid()
+
+    def handle(self, message):
+        """Answers a request
+
+        :param dict message: the request
+        :return: the answer
+        :rtype: dict
+        """
+        command = message.get("command")
+
+        if command == "stop":
+            self.running = False
+            return {"stdout": "", "stderr": "", "exit": 0}
+
+        if command == "status":
+            status = ("pid: {}\nrequests: {}\ncached files: {}\n"
+                      "cache hits: {}\ncache misses: {}\n").format(
+                          os.getpid(), self.requests, len(self.handlers),
+                          self.handlers.hits, self.handlers.misses)
+            return {"stdout": status, "stderr": "", "exit": 0}
+
+        if message.get("env") != self.environment:
+            return {"local": "environment"}
+
+        self.requests += 1
+        return self.run(message["argv"], message["cwd"])
+
+    def run(self, argv, cwd):
+        """Runs a docmanager command like the docmanager script does
+
+        :param list argv: the command line arguments
+        :param str cwd: the working directory of the client
+        :return: the answer
+        :rtype: dict
+        """
+        # pylint:disable=import-outside-toplevel
+        import io
+        import traceback
+        from contextlib import redirect_stdout, redirect_stderr
+        from docmanager import logmanager, run
+        from docmanager.exceptions import DMRunLocally
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        oldcwd = os.getcwd()
+        oldstream = logmanager._ch.stream # pylint:disable=protected-access
+        code = 0
+
+        try:
+            os.chdir(cwd)
+            logmanager._ch.setStream(stderr) # pylint:disable=protected-access
+
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                run(argv, self.handlers, indaemon=True)
+        except DMRunLocally:
+            return {"local": "command"}
+        except SystemExit as err:
+            if err.code is None or isinstance(err.code, int):
+                code = err.code or 0
+            else:
+                stderr.write("{}\n".format(err.code))
+                code = 1
+        except Exception: # pylint:disable=broad-except
+            stderr.write(traceback.format_exc())
+            code = 1
+        finally:
+            os.chdir(oldcwd)
+            logmanager._ch.setStream(oldstream) # pylint:disable=protected-access
+
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit": code}
@@ -0,0 +1,195 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Resolves DAPS DC files into the DocBook files of their books
+
+A DC file (named DC-*) sets shell variables; MAIN names the main file of
+the book, relative to the xml/ directory next to the DC file. The main
+file and all files it includes with xi:include (directly or indirectly)
+belong to the book.
+"""
+
+import os
+import re
+import shlex
+from collections import OrderedDict
+from lxml import etree
+from docmanager.exceptions import DMDCFileError
+from docmanager.logmanager import log
+
+# Prefix of the names of DC files
+DC_PREFIX = "DC-"
+
+# Tag of xi:include elements
+XI_INCLUDE = "{http://www.w3.org/2001/XInclude}include"
+
+# VARIABLE=VALUE lines of DC files
+DC_VARIABLE = re.compile(r"^\s*(?:export\s+)?(?P<name>[A-Za-z_][A-Za-z0-9_]*)=(?P<value>.*)$")
+
+
+def is_dcfile(filename):
+    """Checks if a file is a DC file (by its name)
+
+    :param str filename: the file name
+    :rtype: bool
+    """
+    return os.path.basename(filename).startswith(DC_PREFIX)
+
+
+def read_dcfile(filename):
+    """Reads the variables of a DC file
+
+    :param str filename: the DC file
+    :return: {NAME: VALUE}
+    :rtype: dict
+    :raise DMDCFileError: if the file can't be read or a value has broken quotes
+    """
+    variables = {}
+
+    try:
+        with open(filename, encoding="utf-8") as f:
+            for line in f:
+                match = DC_VARIABLE.match(line)
+                if match is None:
+                    continue
+                try:
+                    value = shlex.split(match.group("value"), comments=True)
+                except ValueError as err:
+                    raise DMDCFileError("{}: {}: {}".format(filename, match.group("name"), err))
+                variables[match.group("name")] = " ".join(value)
+    except (OSError, UnicodeDecodeError) as err:
+        raise DMDCFileError("Could not read DC file {!r}: {}".format(filename, err))
+
+    return variables
+
+
+def dc_mainfile(filename):
+    """Returns the main file of the book of a DC file
+
+    :param str filename: the DC file
+    :return: path of the main file
+    :rtype: str
+    :raise DMDCFileError: if MAIN is not set or the main file doesn't exist
+    """
+    main = read_dcfile(filename).get("MAIN")
+    if not main:
+        raise DMDCFileError("DC file {!r} doesn't set MAIN.".format(filename))
+
+    docdir = os.path.dirname(filename)
+    for path in (os.path.join(docdir, "xml", main), os.path.join(docdir, main)):
+        if os.path.isfile(path):
+            return path
+
+    raise DMDCFileError("Could not find the MAIN file {!r} of DC file {!r}.".format(main, filename))
+
+
+class IncludeResolver(object):
+    """Finds the files which are included with xi:include. The includes of
+       each file are only read once, even if the file belongs to many books.
+    """
+
+    def __init__(self):
+        """Initialize IncludeResolver class"""
+        # real path -> real paths of the included files
+        self.includes = {}
+        self.parsed = 0
+
+    def scan(self, filename):
+        """Returns the XML files which a file includes directly
+
+        :param str filename: real path of the file
+        :return: real paths of the included files in document order
+        :rtype: list
+        """
+        includes = self.includes.get(filename)
+        if includes is not None:
+            return includes
+
+        includes = []
+        base = os.path.dirname(filename)
+        self.parsed += 1
+
+        # entities are neither loaded nor needed; errors are reported when
+        # the file itself is parsed for the action
+        try:
+            for _, elem in etree.iterparse(filename, events=("start",), tag=XI_INCLUDE,
+                                           load_dtd=False, resolve_entities=False,
+                                           no_network=True, recover=True, huge_tree=True):
+                href = elem.get("href")
+                # parse="text" includes are no XML files; without href, the
+                # element includes a part of the same file
+                if href and elem.get("parse", "xml") == "xml":
+                    includes.append(os.path.realpath(os.path.join(base, href)))
+        except (OSError, etree.XMLSyntaxError) as err:
+            log.warning("Could not read the includes of %r: %s", filename, err)
+
+        self.includes[filename] = includes
+        return includes
+
+    def resolve(self, mainfile):
+        """Returns a file and all files which it includes, directly or
+           indirectly
+
+        :param str mainfile: the file
+        :return: real paths of the files in document order, each only once
+        :rtype: list
+        """
+        files = OrderedDict()
+        # depth-first, so the files keep the order of the book
+        stack = [(os.path.realpath(mainfile), None)]
+
+        while stack:
+            filename, parent = stack.pop()
+            if filename in files:
+                # included twice, or a loop
+                continue
+
+            if not os.path.isfile(filename):
+                log.warning("Could not find file %r, which is included by %r.",
+                            filename, parent)
+                continue
+
+            files[filename] = None
+            stack.extend((i, filename) for i in reversed(self.scan(filename)))
+
+        return list(files)
+
+
+def expand_dcfiles(files):
+    """Replaces the DC files in a file list with the files of their books;
+       files which belong to several books (or are given as well) are only
+       kept once
+
+    :param list files: the file names
+    :return: the new file list
+    :rtype: list
+    :raise DMDCFileError: if a DC file is invalid
+    """
+    resolver = IncludeResolver()
+    result = OrderedDict()
+
+    for f in files:
+        if not is_dcfile(f):
+            result.setdefault(os.path.realpath(f), f)
+            continue
+
+        for i in resolver.resolve(dc_mainfile(f)):
+            result.setdefault(i, i)
+
+    log.debug("Read the includes of %d files.", resolver.parsed)
+    return list(result.values())
@@ -20,7 +20,6 @@ import json
 import sys
 from collections import OrderedDict
 from lxml import etree
-from prettytable import PrettyTable
 from docmanager.core import ReturnCodes
 from docmanager.shellcolors import red,green
 
@@ -87,6 +86,9 @@ def tablerenderer(data, **kwargs): # pylint: disable=unused-argument
     :return: rendered output
     :rtype: str
     """
+    # pylint:disable=import-outside-toplevel
+    from prettytable import PrettyTable
+
     if data is None:
         return
 
@@ -306,19 +308,28 @@ def getrenderer(fmt):
     return renderer.get(fmt, DEFAULTRENDERER)
 
 
-def print_stats(validfiles, invalidfiles):
+def print_stats(validfiles, invalidfiles, unchanged=0):
     """Print statistics how many files were valid/invalid, do a sys.exit
     if there were invalid files.
 
     :param int validfiles: The number of valid files
     :param int invalidfiles: The number of invalid files
+    :param int unchanged: The number of valid files which were not written
+                          because nothing changed
     """
 
+    written = validfiles - unchanged
+
     message = "\n"
-    if validfiles > 0:
+    if written > 0:
         message += "Wrote {} valid XML file{}. ".format(
-            green(validfiles),
-            '' if validfiles == 1 else 's'
+            green(written),
+            '' if written == 1 else 's'
+            )
+    if unchanged > 0:
+        message += "{} XML file{} unchanged. ".format(
+            green(unchanged),
+            ' was' if unchanged == 1 else 's were'
             )
     if invalidfiles > 0:
         message += "Skipped {} XML file{} due to errors.".format(
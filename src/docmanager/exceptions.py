@@ -49,4 +49,20 @@ class DMFileNotFoundError(Exception):
 class DMPropertyNotFound(Exception):
 	def __init__(self, filename, prop):
 		self.filename = filename
-		self.property = prop
\ No newline at end of file
+		self.property = prop
+
+class DMBatchSyntaxError(Exception):
+	def __init__(self, line, errorstr):
+		self.line = line
+		self.errorstr = errorstr
+
+class DMGitError(Exception):
+	def __init__(self, errorstr):
+		self.errorstr = errorstr
+
+class DMDCFileError(Exception):
+	def __init__(self, errorstr):
+		self.errorstr = errorstr
+
+class DMRunLocally(Exception):
+	pass
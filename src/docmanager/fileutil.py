@@ -17,7 +17,10 @@
 # you may find current contact information at www.suse.com
 
 import datetime
+import os
 import os.path
+import stat
+import tempfile
 
 class FileUtil(object):
 
@@ -47,3 +50,67 @@ class FileUtil(object):
 		return datetime.datetime.fromtimestamp( \
 					mtime \
 				).strftime(formatstr)
+
+	def get_stat_key(self):
+		"""Returns a key which changes whenever the file gets modified
+		:return tuple: (mtime in ns, size, inode)
+		"""
+
+		st = os.stat(self.filename)
+		return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+	def write_atomic(self, content, fsync=False, syncdir=True):
+		"""Replaces the file with content. The content is written into a
+		temporary file in the same directory first, which is then renamed,
+		so the file is never left half written.
+		:param str content: The new content
+		:param bool fsync: Flush the file and the directory to the disk
+		:param bool syncdir: False if the caller flushes the directory
+		                     later (see sync_directory)
+		"""
+
+		# replace the target of a symlink, not the link itself
+		target = os.path.realpath(self.filename)
+		directory, basename = os.path.split(target)
+
+		fd, tmpname = tempfile.mkstemp(prefix=".{}.".format(basename),
+									suffix=".tmp", dir=directory)
+		try:
+			with os.fdopen(fd, 'w') as f:
+				f.write(content)
+
+				if fsync:
+					f.flush()
+					os.fsync(f.fileno())
+
+			# mkstemp creates the file with mode 0600
+			try:
+				os.chmod(tmpname, stat.S_IMODE(os.stat(target).st_mode))
+			except FileNotFoundError:
+				pass
+
+			os.replace(tmpname, target)
+		except BaseException:
+			os.unlink(tmpname)
+			raise
+
+		if fsync and syncdir:
+			sync_directory(directory)
+
+def sync_directory(directory):
+	"""Flushes a directory (the names of its files) to the disk
+	:param str directory: The directory
+	"""
+
+	try:
+		fd = os.open(directory, os.O_RDONLY)
+	except OSError:
+		# not possible on every platform
+		return
+
+	try:
+		os.fsync(fd)
+	except OSError:
+		pass
+	finally:
+		os.close(fd)
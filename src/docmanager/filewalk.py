@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Finds the DocBook files below directories, for --recursive
+
+The directories are read with os.scandir(); each subdirectory of a given
+directory is searched in its own thread, so slow file systems are read
+in parallel. Hidden files and directories (like .git) are skipped, and
+files which are certainly no DocBook 5 documents are sorted out by
+looking at their first bytes (see xmlutil.sniff_docbook).
+"""
+
+import os
+from fnmatch import fnmatchcase
+from docmanager.logmanager import log
+from docmanager.xmlutil import sniff_docbook
+
+# Patterns for files which are searched if no --include is given
+DEFAULT_INCLUDE = ("*.xml",)
+
+
+def matches(relpath, patterns):
+    """Checks if a path matches one of the patterns; patterns with a slash
+       are compared with the whole path, all others with the last part
+
+    :param str relpath: path relative to the searched directory
+    :param patterns: shell-style patterns, see fnmatch
+    :rtype: bool
+    """
+    name = relpath.rpartition("/")[2]
+    return any(fnmatchcase(relpath if "/" in p else name, p) for p in patterns)
+
+
+def readdir(directory, relpath, include, exclude):
+    """Reads one directory
+
+    :param str directory: the directory
+    :param str relpath: the directory relative to the searched directory
+    :param include: patterns of the files which are returned
+    :param exclude: patterns of the files and directories which are skipped
+    :return: (files, subdirectories), both sorted; subdirectories are
+             (path, relpath) tuples
+    :rtype: tuple
+    """
+    files = []
+    dirs = []
+
+    try:
+        entries = os.scandir(directory)
+    except OSError as err:
+        log.warning("Could not read directory %r: %s", directory, err.strerror)
+        return files, dirs
+
+    with entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+
+            rel = relpath + "/" + entry.name if relpath else entry.name
+            if matches(rel, exclude):
+                continue
+
+            try:
+                # symlinks to directories are not followed, they could loop
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append((entry.path, rel))
+                elif entry.is_file() and matches(rel, include):
+                    files.append(entry.path)
+            except OSError:
+                # removed in the meantime
+                pass
+
+    files.sort()
+    dirs.sort()
+    return files, dirs
+
+
+def is_candidate(filename):
+    """Checks if a found file can be a DocBook file
+
+    :param str filename: the file name
+    :rtype: bool
+    """
+    try:
+        return sniff_docbook(filename)
+    except OSError:
+        # the parser reports the error
+        return True
+
+
+def walktree(directory, relpath, include, exclude, sniff):
+    """Searches a directory and all its subdirectories
+
+    :param str directory: the directory
+    :param str relpath: the directory relative to the searched directory
+    :param include: patterns of the files which are returned
+    :param exclude: patterns of the files and directories which are skipped
+    :param bool sniff: skip files which are no DocBook files
+    :return: the files, depth-first in sorted order
+    :rtype: list
+    """
+    found = []
+    stack = [(directory, relpath)]
+
+    while stack:
+        directory, relpath = stack.pop()
+        files, dirs = readdir(directory, relpath, include, exclude)
+        found.extend(f for f in files if not sniff or is_candidate(f))
+        stack.extend(reversed(dirs))
+
+    return found
+
+
+def walk_files(directory, include=None, exclude=None, jobs=1, sniff=True):
+    """Finds the files below a directory
+
+    :param str directory: the directory
+    :param list include: patterns of the files which are returned, by
+                         default DEFAULT_INCLUDE
+    :param list exclude: patterns of the files and directories which are
+                         skipped
+    :param int jobs: number of threads which search the subdirectories
+    :param bool sniff: skip files which are no DocBook files
+    :return: the files, depth-first in sorted order
+    :rtype: list
+    """
+    include = include or DEFAULT_INCLUDE
+    exclude = exclude or ()
+
+    files, dirs = readdir(directory, "", include, exclude)
+    found = [ f for f in files if not sniff or is_candidate(f) ]
+
+    if jobs < 2 or len(dirs) < 2:
+        for path, rel in dirs:
+            found.extend(walktree(path, rel, include, exclude, sniff))
+        return found
+
+    # pylint:disable=import-outside-toplevel
+    from multiprocessing.pool import ThreadPool
+
+    with ThreadPool(processes=min(jobs, len(dirs))) as pool:
+        for subtree in pool.starmap(walktree, [ (path, rel, include, exclude, sniff)
+                                                for path, rel in dirs ]):
+            found.extend(subtree)
+
+    return found
@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Selects the files which changed in git, for --changed-since and --staged
+
+Only the git commands run in a subprocess; the repository itself is found
+like the repository config file, see docmanager.config.
+"""
+
+import os
+import subprocess
+from docmanager.config import get_git_repo_root
+from docmanager.exceptions import DMGitError
+from docmanager.logmanager import log
+
+
+def git_lines(root, args):
+    """Runs a git command in a repository and returns its output
+
+    :param str root: top directory of the repository
+    :param list args: arguments of git, which must print names separated by NUL (-z)
+    :return: the names
+    :rtype: list
+    :raise DMGitError: if git is missing or fails
+    """
+    cmd = ["git", "-C", root] + args
+    log.debug("Running %s", cmd)
+
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as err:
+        raise DMGitError("Could not run git: {}".format(err))
+
+    if proc.returncode != 0:
+        raise DMGitError(os.fsdecode(proc.stderr).strip() or
+                         "git {} failed".format(" ".join(args)))
+
+    return [ os.fsdecode(n) for n in proc.stdout.split(b'\0') if n ]
+
+
+def changed_files(ref=None, staged=False):
+    """Returns the files of the repository of the working directory which
+       changed: with ref, all files which differ between ref and the working
+       tree, including new files which are not ignored; with staged, the
+       files which differ between HEAD and the index
+
+    :param str ref: the revision
+    :param bool staged: select the staged files instead
+    :return: real paths of the changed files (deleted files are omitted)
+    :rtype: set
+    :raise DMGitError: outside of a repository or if git fails
+    """
+    root = get_git_repo_root()
+    if root is None:
+        raise DMGitError("Not inside a git repository.")
+
+    if staged:
+        names = git_lines(root, ["diff", "--cached", "--name-only", "-z", "--no-renames",
+                                 "--diff-filter=d"])
+    else:
+        if ref.startswith("-"):
+            raise DMGitError("Invalid revision {!r}.".format(ref))
+        names = git_lines(root, ["diff", "--name-only", "-z", "--no-renames",
+                                 "--diff-filter=d", ref, "--"])
+        names += git_lines(root, ["ls-files", "-z", "--others", "--exclude-standard"])
+
+    # git prints the names relative to the top directory
+    root = os.path.realpath(root)
+    return { os.path.join(root, n) for n in names }
+
+
+def select_changed(files, changed):
+    """Returns which of the given files changed
+
+    :param list files: the file names as given on the command line
+    :param set changed: result of changed_files()
+    :return: the changed files of files, in the same order
+    :rtype: list
+    """
+    return [ f for f in files if os.path.realpath(f) in changed ]
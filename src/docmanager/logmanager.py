@@ -19,7 +19,7 @@
 import logging
 import os
 import sys
-import traceback
+import threading
 
 # TODO: Output a different format depending on logging level
 # See http://stackoverflow.com/questions/1343227/can-pythons-logging-format-be-modified-depending-on-the-message-log-level
@@ -34,20 +34,63 @@ log.addHandler(_ch)
 
 LOGLEVELS = {None: logging.NOTSET, 0: logging.NOTSET, 1: logging.INFO, 2: logging.DEBUG}
 
+# verbosity level from which on every function call is logged
+TRACELEVEL = 3
+
+# all functions in this directory are logged by the tracer
+_PKGDIR = os.path.dirname(os.path.abspath(__file__))
+
+# logmgr_flog() returns immediately if this is False; only setloglevel()
+# turns it on, so library users which never call it stay on the fast path
+_flog = False
+
 def logmgr_flog():
     """Prints debug information about the last called function.
     """
-    if log.getEffectiveLevel() <= logging.DEBUG:
-      stack = traceback.extract_stack()
-      filename, line, func, _ = stack[-2]
+    if _flog:
+        frame = sys._getframe(1)
+
+        log.debug('Called function "%s" in file %s/%s (line: %d).',
+                  frame.f_code.co_name, os.getcwd(),
+                  os.path.basename(frame.f_code.co_filename), frame.f_lineno
+                 )
+
+def _tracer(frame, event, arg): # pylint: disable=unused-argument
+    """Profile function which logs all calls of DocManager functions
+    """
+    if event == "call" and frame.f_code.co_filename.startswith(_PKGDIR):
+        log.debug('Called function "%s" in file %s (line: %d).',
+                  frame.f_code.co_name,
+                  os.path.relpath(frame.f_code.co_filename, _PKGDIR),
+                  frame.f_code.co_firstlineno
+                 )
 
-      log.debug('Called function "%s" in file %s/%s (line: %d).',
-                func, os.getcwd(), os.path.basename(filename), line
-               )
+def settracing(enabled):
+    """Logs every call of a DocManager function
+
+    The tracer is installed with sys.setprofile for the current and all
+    new threads, so nothing is paid for it while it's disabled.
+
+    :param bool enabled: install or remove the tracer
+    """
+    # don't remove a profiler which isn't ours
+    if not enabled and sys.getprofile() is not _tracer:
+        return
+
+    tracer = _tracer if enabled else None
+    sys.setprofile(tracer)
+    threading.setprofile(tracer)
 
 def setloglevel(verbose):
     """Set log level according to verbose argument
 
     :param int verbose: verbose level to set
     """
-    log.setLevel(LOGLEVELS.get(verbose, logging.DEBUG))
\ No newline at end of file
+    global _flog
+
+    tracing = verbose is not None and verbose >= TRACELEVEL
+
+    log.setLevel(LOGLEVELS.get(verbose, logging.DEBUG))
+    # the tracer logs all calls anyway
+    _flog = log.isEnabledFor(logging.DEBUG) and not tracing
+    settracing(tracing)
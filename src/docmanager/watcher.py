@@ -0,0 +1,251 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Watches directories and marks changed files as dirty in the
+MetadataCache, so cached files don't have to be checked with stat()
+
+On Linux, inotify is used through ctypes. Elsewhere (or if inotify fails,
+for example because of the limit of watches), the cached files are checked
+with stat() in regular intervals by the watcher instead.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from docmanager.core import DEFAULT_WATCH_INTERVAL
+from docmanager.fileutil import FileUtil
+from docmanager.logmanager import log
+
+# inotify events, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | \
+             IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+# struct inotify_event without the name
+EVENT = struct.Struct('iIII')
+
+
+class Inotify(object):
+    """A minimal binding of inotify(7)"""
+
+    def __init__(self):
+        """Creates an inotify instance
+
+        :raise OSError: if inotify is not available
+        """
+        name = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(name or 'libc.so.6', use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            raise OSError("inotify is not available")
+
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        # watch descriptor -> directory
+        self.directories = {}
+
+    def add(self, directory):
+        """Watches a directory (not its subdirectories)
+
+        :param str directory: absolute path of the directory
+        :raise OSError: if the directory can't be watched
+        """
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.directories[wd] = directory
+
+    def read(self, timeout):
+        """Waits for events
+
+        :param float timeout: seconds to wait
+        :return: list of (mask, path); the path is None for IN_Q_OVERFLOW
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset:offset+length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+
+            directory = self.directories.get(wd)
+            if mask & IN_Q_OVERFLOW or directory is None:
+                events.append((mask, None))
+            else:
+                events.append((mask, os.path.join(directory, name) if name else directory))
+
+        return events
+
+    def close(self):
+        """Closes the inotify instance"""
+        os.close(self.fd)
+
+
+class Watcher(object):
+    """Marks changed files in the given directories as dirty in the cache"""
+
+    def __init__(self, cache, roots, interval=DEFAULT_WATCH_INTERVAL, poll=False):
+        """Initialize Watcher class
+
+        :param MetadataCache cache: the cache
+        :param list roots: the directories (with all subdirectories)
+        :param float interval: seconds between two checks when polling
+        :param bool poll: use polling even if inotify is available
+        """
+        self.cache = cache
+        self.roots = [ os.path.abspath(r) for r in roots ]
+        self.interval = interval
+        self.inotify = None
+        self.running = False
+
+        if not poll:
+            try:
+                self.inotify = Inotify()
+                for root in self.roots:
+                    self.watch_tree(root)
+            except OSError as err:
+                log.warning("Can't use inotify (%s), checking files every %s seconds instead.",
+                            err, interval)
+                self.close()
+
+    @property
+    def mode(self):
+        """'inotify' or 'poll'"""
+        return 'poll' if self.inotify is None else 'inotify'
+
+    def watch_tree(self, directory):
+        """Watches a directory and all subdirectories
+
+        :param str directory: absolute path of the directory
+        :raise OSError: if a directory can't be watched
+        """
+        for path, dirs, _ in os.walk(directory):
+            self.inotify.add(path)
+            # .git and friends don't contain documents
+            dirs[:] = [ d for d in dirs if not d.startswith('.') ]
+
+    def handle(self, events):
+        """Marks the files of inotify events as dirty
+
+        :param list events: result of Inotify.read()
+        """
+        dirty = set()
+
+        for mask, path in events:
+            if path is None:
+                # events were lost
+                log.warning("Too many changes at once, all cached files are checked again.")
+                for root in self.roots:
+                    self.cache.mark_dirty_tree(root)
+                continue
+
+            if mask & IN_ISDIR:
+                # the files of a moved or deleted directory have new paths
+                self.cache.mark_dirty_tree(path)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_tree(path)
+            else:
+                dirty.add(path)
+
+        if dirty:
+            self.cache.mark_dirty(sorted(dirty))
+
+    def poll(self):
+        """Marks cached files which changed as dirty"""
+        dirty = []
+
+        for root in self.roots:
+            for path, key in self.cache.files_below(root):
+                try:
+                    if FileUtil(path).get_stat_key() != key:
+                        dirty.append(path)
+                except OSError:
+                    dirty.append(path)
+
+        if dirty:
+            self.cache.mark_dirty(dirty)
+
+    def run(self):
+        """Watches the directories until stop() is called (or the process
+           is interrupted)
+        """
+        self.cache.add_watcher(self.roots)
+        self.running = True
+        log.info("Watching %s with %s.", ", ".join(self.roots), self.mode)
+
+        try:
+            while self.running:
+                if self.inotify is not None:
+                    try:
+                        self.handle(self.inotify.read(self.interval))
+                    except OSError as err:
+                        # a new directory couldn't be watched
+                        log.warning("Can't use inotify (%s), checking files every %s "
+                                    "seconds instead.", err, self.interval)
+                        self.close()
+                        for root in self.roots:
+                            self.cache.mark_dirty_tree(root)
+                else:
+                    self.poll()
+                    if self.running:
+                        select.select([], [], [], self.interval)
+        finally:
+            self.cache.remove_watcher()
+            self.close()
+
+    def stop(self):
+        """Stops run() after the current check"""
+        self.running = False
+
+    def close(self):
+        """Stops using inotify"""
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
@@ -24,27 +24,33 @@ from docmanager.exceptions import *
 from docmanager.fileutil import FileUtil
 from docmanager.logmanager import log, logmgr_flog
 from docmanager.xmlutil import check_root_element, compilestarttag, \
-     ensurefileobj, findprolog, get_namespace, localname, recover_entities, \
-     replaceinstream, preserve_entities, findinfo_pos, xml_indent, \
-     get_property_xpath
+     ensurestream, iterpreserved, scanprolog, get_namespace, localname, \
+     recover_entities, findinfo_pos, xml_indent, get_property_xpath, get_node_path, \
+     findnodespan, strip_inherited_ns, get_indent_level, mapfile, closebuffer, \
+     iterdecoded, decodebuffer, preservechunks, CHUNKSIZE, INFO_PREDECESSORS
 from lxml import etree
-from xml.sax._exceptions import SAXParseException
 
 class XmlHandler(object):
     """An XmlHandler instance represents an XML tree of a file
     """
 
-    def __init__(self, filename, stoponerror=True):
+    def __init__(self, filename, stoponerror=True, readonly=False, snapshot=None):
         """Initializes the XmlHandler class
 
         :param str filename: filename of XML file
+        :param bool stoponerror: raise an exception on errors
+        :param bool readonly: only read the file until the <info> element of
+                              the root element (see parse_info)
+        :param dict snapshot: result of snapshot(); if given, the file is not
+                              read at all and the handler is read-only
         """
         logmgr_flog()
         log.debug("Initialized a new XML Handler for file %r.", filename)
 
         # general
         self._filename = ""
-        self._buffer = None # StringIO
+        self._buffer = None # mmap or bytes, see mapfile
+        self.readonly = readonly
 
         # file util
         self._fileutil = FileUtil(filename)
@@ -55,6 +61,16 @@ class XmlHandler(object):
         self._root = ""
         self.roottag = ""
 
+        # original text (bytes if it couldn't be mapped, None if the file
+        # has to be mapped again), the element which write() replaces in
+        # it and its position, see set_splice
+        self._source = None
+        # see FileUtil.get_stat_key; the file is only mapped again by
+        # splice() if it wasn't modified since it was parsed
+        self._sourcekey = None
+        self._splicenode = None
+        self._splicepath = None
+
         # parser
         self.__xmlparser = None
         self.invalidfile = False
@@ -62,59 +78,128 @@ class XmlHandler(object):
         self.xmlerrorstring = ""
         self.stoponerror = stoponerror
 
+        # True if the tree was modified since it was read or written
+        self.dirty = False
+
         # lxml
         self.__tree = None
         self.__root = None
         self.__docmanager = None
 
-        # load the file into a StringIO buffer
         self._filename = filename
-        self._buffer = ensurefileobj(self._filename)
 
         # log
         self.xmllogerrorstring = ""
 
         # parse the given file with lxml
-        self.parse()
+        if snapshot is not None:
+            self.readonly = True
+            self.load_snapshot(snapshot)
+        elif readonly:
+            self.parse_info()
+        else:
+            # map the file into memory; it is decoded chunk by chunk
+            self._buffer = mapfile(self._filename)
+            self._sourcekey = self._fileutil.get_stat_key()
+            self.parse()
 
     def parse(self):
         """This function parses the whole XML file
         """
         logmgr_flog()
 
-        # find the prolog of the XML file (everything before the start tag)
+        chunks = iterdecoded(self._buffer)
+
+        # a mapped file is closed when it's parsed, otherwise every handler
+        # which waits for write() keeps a file descriptor open; splice()
+        # maps it again
+        source = self._buffer if isinstance(self._buffer, bytes) else None
+
+        # find the prolog of the XML file (everything before the start tag);
+        # only the prolog is scanned here, lxml reads the rest
+        data = ""
+        prolog = None
         try:
-            prolog = findprolog(self._buffer)
-        except SAXParseException as err:
+            while prolog is None:
+                chunk = next(chunks, None)
+                data += chunk or ""
+                prolog = scanprolog(data, final=chunk is None)
+        except DMXmlParseError as err:
+            self.close_buffer()
+            self.prolog_error(err)
+            return
+
+        self.set_prolog(prolog)
+
+        # register namespace
+        # etree.register_namespace("dm", "{dm}".format(**NS))
+        self.__xmlparser = etree.XMLParser(remove_blank_text=False,
+                                           resolve_entities=False,
+                                           dtd_validation=False)
+
+        # feed the file with preserved entities chunk by chunk, so there is
+        # no complete copy of the text besides the tree
+        try:
+            for chunk in preservechunks(chunks, data[self._offset:]):
+                self.__xmlparser.feed(chunk)
+            self.__root = self.__xmlparser.close()
+        except etree.XMLSyntaxError as err:
             self.invalidfile = True
-            self.fileerror = "<{}:{}> {} in {!r}.".format(\
-                                            err.getLineNumber(), \
-                                            err.getColumnNumber(), \
-                                            err.getMessage(), \
-                                            self.filename,)
+            self.fileerror = err.msg
 
             if self.stoponerror:
-                raise DMXmlParseError(self.fileerror, ReturnCodes.E_XML_PARSE_ERROR)
+                raise DMXmlParseError(err, ReturnCodes.E_XML_PARSE_ERROR)
+        finally:
+            # the buffer is not needed anymore
+            self.close_buffer()
 
         if not self.invalidfile:
-            # save prolog details
-            self._offset, self._header, self._root, self._roottag = prolog['offset'], \
-                prolog['header'], \
-                prolog['root'], \
-                prolog['roottag']
-
-            # replace any entities
-            self.replace_entities()
-
-            # register namespace
-            # etree.register_namespace("dm", "{dm}".format(**NS))
-            self.__xmlparser = etree.XMLParser(remove_blank_text=False,
-                                               resolve_entities=False,
-                                               dtd_validation=False)
-
-            # load the file and set a reference to the dm group
+            self.__tree = self.__root.getroottree()
+            dm = self.__tree.find("//dm:docmanager", namespaces=NS)
+
+            # if the docmanager element has to be created, the info
+            # element which will contain it is replaced
+            if dm is not None:
+                self.set_splice(source, dm)
+            else:
+                self.set_splice(source, self.__tree.find("//d:info", namespaces=NS))
+
+            self.check_tree(dm)
+
+    def close_buffer(self):
+        """Closes the mapped file after it was parsed
+        """
+        closebuffer(self._buffer)
+        self._buffer = None
+
+    def parse_info(self):
+        """This function parses the XML file only until the <info> element
+           of the root element was read. Everything behind it is never read,
+           which is enough for all actions which only read properties.
+        """
+        logmgr_flog()
+
+        with ensurestream(self._filename) as stream:
+            # read as much as needed to find the prolog
+            data = ""
+            prolog = None
+            try:
+                while prolog is None:
+                    chunk = stream.read(CHUNKSIZE)
+                    data += chunk
+                    prolog = scanprolog(data, final=not chunk)
+            except DMXmlParseError as err:
+                self.prolog_error(err)
+                return
+
+            self.set_prolog(prolog)
+
+            self.__xmlparser = etree.XMLPullParser(events=("start", "end"),
+                                                   remove_blank_text=False,
+                                                   resolve_entities=False,
+                                                   dtd_validation=False)
             try:
-                self.__tree = etree.parse(self._buffer, self.__xmlparser)
+                dm = self.read_info(iterpreserved(stream, data[self._offset:]))
             except etree.XMLSyntaxError as err:
                 self.invalidfile = True
                 self.fileerror = err.msg
@@ -122,34 +207,154 @@ class XmlHandler(object):
                 if self.stoponerror:
                     raise DMXmlParseError(err, ReturnCodes.E_XML_PARSE_ERROR)
 
-            if not self.invalidfile:
-                self.__root = self.__tree.getroot()
+        if not self.invalidfile:
+            self.__tree = self.__root.getroottree()
+            self.check_tree(dm)
 
-                try:
-                    check_root_element(self.__root, etree)
-                except ValueError as err:
-                    self.invalidfile = True
-                    self.fileerror = err
+    def read_info(self, chunks):
+        """Feeds chunks into the pull parser until the <info> element of the
+           root element was read
 
-                    if self.stoponerror:
-                        raise DMXmlParseError(err, ReturnCodes.E_XML_PARSE_ERROR)
+        :param chunks: iterable of strings, starting with the root element
+        :return: the docmanager element or None
+        :rtype: lxml.etree._Element
+        """
+        depth = 0
+        for chunk in chunks:
+            self.__xmlparser.feed(chunk)
+
+            for event, elem in self.__xmlparser.read_events():
+                if event == "start":
+                    depth += 1
+                    if self.__root is None:
+                        self.__root = elem
+                    elif depth == 2 and localname(elem.tag) not in INFO_PREDECESSORS:
+                        # no <info> element can follow anymore
+                        return None
+                else:
+                    depth -= 1
+                    if elem.tag == "{{{dm}}}docmanager".format(**NS):
+                        return elem
+                    elif depth == 1 and elem.tag == "{{{d}}}info".format(**NS):
+                        return None
+
+        # we've read the whole file, let lxml check the end of it
+        self.__xmlparser.close()
+        return None
+
+    def snapshot(self):
+        """Returns all properties and their attributes in a compact form
+           which can be serialized (e.g. with JSON or pickle)
+
+        :return: { 'roottag': '...', # str: name of the root element
+                   'props':   {...}, # result of get_all()
+                   'attrs':   {...}, # result of get_attr(None, None)
+                 }
+        :rtype: dict
+        """
+        return {'roottag': self._roottag,
+                'props':   self.get_all(),
+                'attrs':   self.get_attr(None, None),
+               }
 
-                if not self.invalidfile:
-                    # check for DocBook 5 namespace in start tag
-                    try:
-                        self.check_docbook5_ns()
+    def load_snapshot(self, snapshot):
+        """Rebuilds a minimal tree (root, info, and docmanager element) from
+           the result of snapshot()
 
-                        # check for docmanager element
-                        self.__docmanager = self.__tree.find("//dm:docmanager", namespaces=NS)
+        :param dict snapshot: result of snapshot()
+        """
+        logmgr_flog()
 
-                        if self.__docmanager is None:
-                            log.info("No docmanager element found")
-                            self.create_group()
-                        else:
-                            log.debug("Found docmanager element %s", self.__docmanager.getparent())
-                    except DMNotDocBook5File as err:
-                        if self.stoponerror == True:
-                            raise DMNotDocBook5File(err.errorstr, err.error)
+        self._roottag = snapshot['roottag']
+        self.__root = etree.Element("{{{}}}{}".format(NS['d'], self._roottag.rpartition(":")[2]),
+                                    nsmap={None: NS['d'], 'dm': NS['dm']})
+        self.__tree = self.__root.getroottree()
+        info = etree.SubElement(self.__root, "{{{d}}}info".format(**NS))
+        self.__docmanager = etree.SubElement(info, "{{{dm}}}docmanager".format(**NS))
+
+        # properties are in document order, so parents always come first
+        nodes = {}
+        for xpath, text in snapshot['props'].items():
+            parent, _, name = xpath.rpartition("/")
+            node = etree.SubElement(nodes.get(parent, self.__docmanager),
+                                    "{{{}}}{}".format(NS['dm'], name))
+            node.text = text
+            nodes[xpath] = node
+
+        for xpath, attrs in snapshot['attrs'].items():
+            for key, value in attrs.items():
+                nodes[xpath].set(key, value)
+
+    def prolog_error(self, err):
+        """Handles an error from scanning the prolog
+
+        :param DMXmlParseError err: the error
+        """
+        self.invalidfile = True
+        self.fileerror = "{} in {!r}.".format(err.errorstr, self.filename)
+
+        if self.stoponerror:
+            raise DMXmlParseError(self.fileerror, ReturnCodes.E_XML_PARSE_ERROR)
+
+    def set_prolog(self, prolog):
+        """Saves the prolog details
+
+        :param dict prolog: result of scanprolog
+        """
+        self._offset, self._header, self._root, self._roottag = prolog['offset'], \
+            prolog['header'], \
+            prolog['root'], \
+            prolog['roottag']
+
+    def set_splice(self, source, node):
+        """Remembers the element which write() replaces in the original text
+
+        :param source: the original text of the file, its content if it
+                       couldn't be mapped (bytes), or None if splice()
+                       maps the file again
+        :param lxml.etree._Element node: docmanager or info element or None
+                                         if the whole tree has to be written
+        """
+        if node is None:
+            self._source = None
+            self._splicenode = None
+            self._splicepath = None
+        else:
+            self._source = source
+            self._splicenode = node
+            self._splicepath = get_node_path(node)
+
+    def check_tree(self, docmanager):
+        """Checks the root element of the parsed tree and sets the reference
+           to the docmanager element
+
+        :param lxml.etree._Element docmanager: the docmanager element or None
+        """
+        try:
+            check_root_element(self.__root, etree)
+        except ValueError as err:
+            self.invalidfile = True
+            self.fileerror = err
+
+            if self.stoponerror:
+                raise DMXmlParseError(err, ReturnCodes.E_XML_PARSE_ERROR)
+
+        if not self.invalidfile:
+            # check for DocBook 5 namespace in start tag
+            try:
+                self.check_docbook5_ns()
+
+                # check for docmanager element
+                self.__docmanager = docmanager
+
+                if self.__docmanager is None:
+                    log.info("No docmanager element found")
+                    self.create_group()
+                else:
+                    log.debug("Found docmanager element %s", self.__docmanager.getparent())
+            except DMNotDocBook5File as err:
+                if self.stoponerror == True:
+                    raise DMNotDocBook5File(err.errorstr, err.error)
 
     def check_docbook5_ns(self):
         """Checks if the current file is a valid DocBook 5 file.
@@ -160,14 +365,6 @@ class XmlHandler(object):
             self.fileerror = "The document is not a valid DocBook 5 document."
             raise DMNotDocBook5File(self.fileerror, ReturnCodes.E_NOT_DOCBOOK5_FILE)
 
-    def replace_entities(self):
-        """This function replaces entities in the StringIO buffer
-        """
-        logmgr_flog()
-
-        self._buffer.seek(self._offset)
-        self._buffer = replaceinstream(self._buffer, preserve_entities)
-
     def init_default_props(self, force=False, bugtracker=False):
         """Initializes the default properties for the given XML files
 
@@ -229,6 +426,7 @@ class XmlHandler(object):
                                              "{{{dm}}}docmanager".format(**NS),
                                              nsmap={'dm': NS['dm']},
                                             )
+        self.dirty = True
 
     def set(self, pairs):
         """Sets the key as element and value as content
@@ -242,29 +440,26 @@ class XmlHandler(object):
         """
         logmgr_flog()
 
-        #import pdb
-        #pdb.set_trace()
-
         dm = self.__docmanager
-        dmelem = list()
-        lastnode = dm
 
         for key in pairs:
             elemlist = key.split("/")
+            lastnode = dm
 
             for e in elemlist:
-                name = "dm:" + e
-
-                dmelem.append(name)
-                node = dm.find("/".join(dmelem), namespaces=NS)
+                node = lastnode.find("dm:" + e, namespaces=NS)
 
                 if node is None:
                     node = etree.SubElement(lastnode, "{{{dm}}}{key}".format(key=e, **NS))
+                    node.text = ""
+                    self.dirty = True
 
                 lastnode = node
-                node.text = ""
 
-            node.text = pairs[key]
+            # <dm:foo/> and <dm:foo></dm:foo> are the same empty value
+            if (node.text or "") != (pairs[key] or ""):
+                node.text = pairs[key]
+                self.dirty = True
 
     def is_set(self, key, values):
         """Checks if element 'key' exists with 'values'
@@ -314,7 +509,9 @@ class XmlHandler(object):
             raise DMPropertyNotFound(self.filename, prop)
 
         for i in data:
-            node.set(i, data[i])
+            if node.get(i) != data[i]:
+                node.set(i, data[i])
+                self.dirty = True
 
     def del_attr(self, prop, data):
         """Deletes one or more attributes of a property
@@ -330,6 +527,7 @@ class XmlHandler(object):
         for i in data:
             try:
                 del node.attrib[i]
+                self.dirty = True
             except KeyError:
                 errors.append(i)
 
@@ -456,6 +654,7 @@ class XmlHandler(object):
                         break
 
                 key_handler.getparent().remove(key_handler)
+                self.dirty = True
                 return True
 
         return False
@@ -487,8 +686,6 @@ class XmlHandler(object):
         :param lxml.etree._Element node: node where to start
         :param str indentation: Additional indentation
         """
-        logmgr_flog()
-        
         indent = ""
         if node is not None:
             indent = "".join(["".join(n.tail.split("\n"))
@@ -531,28 +728,121 @@ class XmlHandler(object):
             i = dmindent if node.getnext() is not None else ''
             node.tail = '\n' + indent + i
 
-    def write(self):
-        """Write XML tree to original filename"""
+    def write(self, fsync=False, syncdir=True):
+        """Write XML tree to original filename
+
+        :param bool fsync: flush the file to the disk before it replaces
+                           the original file
+        :param bool syncdir: False if the caller flushes the directory
+                             later, see FileUtil.write_atomic
+        """
+        logmgr_flog()
+
+        if self.readonly:
+            raise ValueError("{!r} was opened read-only".format(self._filename))
+
+        content = self.splice()
+
+        if content is None:
+            content = self.serialize()
+
+            # serialize() puts the root start tag on the line after the header
+            self._header = self._header.rstrip() + "\n"
+            self._offset = len(self._header)
+
+        self._fileutil.write_atomic(content, fsync, syncdir)
+
+        self.dirty = False
+
+        # the next write() can splice into what was just written
+        self.set_splice(content, self.__docmanager)
+
+    def splice(self):
+        """Replaces only the docmanager element (or the info element, if the
+           docmanager element was created) in the original text
+
+        :return: the new content of the file or None if the element can't
+                 be found in the original text
+        :rtype: str
+        """
+        logmgr_flog()
+
+        if self._splicepath is None:
+            return None
+
+        # the file is only mapped again and decoded when it's written
+        if self._source is None:
+            if self._fileutil.get_stat_key() != self._sourcekey:
+                log.debug("%r was modified since it was parsed.", self._filename)
+                return None
+
+            buffer = mapfile(self._filename)
+            try:
+                self._source = decodebuffer(buffer)
+            finally:
+                closebuffer(buffer)
+        elif not isinstance(self._source, str):
+            self._source = decodebuffer(self._source)
+
+        span = findnodespan(self._source, self._offset, self._splicepath)
+        if span is None:
+            log.debug("Could not find the element to replace in %r.", self._filename)
+            return None
+
+        start, end = span
+        node = self._splicenode
+        level = get_indent_level(self._source, start)
+
+        if node is self.__docmanager:
+            xml_indent(node, level)
+        else:
+            # the docmanager element was appended to the info element; the
+            # other children of the info element keep their indentation
+            dm = self.__docmanager
+            prev = dm.getprevious()
+            indent = "\n" + (level + 1) * "  "
+
+            if prev is None:
+                if not (node.text or "").strip():
+                    node.text = indent
+            elif not (prev.tail or "").strip():
+                prev.tail = indent
+
+            xml_indent(dm, level + 1)
+            dm.tail = "\n" + level * "  "
+
+        parent = node.getparent()
+        content = strip_inherited_ns(etree.tostring(node, encoding='unicode',
+                                                    with_tail=False),
+                                     parent.nsmap if parent is not None else {})
+
+        return self._source[:start] + recover_entities(content) + self._source[end:]
+
+    def serialize(self):
+        """Serializes the whole tree
+
+        :return: the new content of the file
+        :rtype: str
+        """
         logmgr_flog()
 
         # Only indent docmanager child elements
         self.indent_dm()
 
         log.debug("root: %s", repr(self._root))
-        with open(self._filename, 'w') as f:
-            info = self.__root.find("d:info", namespaces=NS)
-
-            xml_indent(info, 2)
-            content = recover_entities(etree.tostring(self.__tree, \
-                           encoding='unicode', \
-                           # doctype=self._header.rstrip())
-                      ))
-            # self._offset, self._header, self._root, self._roottag
-            starttag = compilestarttag(self._roottag)
-            content = starttag.sub(lambda _: self._root.rstrip(), content, 1)
-
-            # log.debug("content: %s", repr(content))
-            f.write(self._header.rstrip()+"\n" + content)
+        info = self.__root.find("d:info", namespaces=NS)
+
+        xml_indent(info, 2)
+        content = recover_entities(etree.tostring(self.__tree, \
+                       encoding='unicode', \
+                       # doctype=self._header.rstrip())
+                  ))
+        # self._offset, self._header, self._root, self._roottag
+        starttag = compilestarttag(self._roottag)
+        content = starttag.sub(lambda _: self._root.rstrip(), content, 1)
+
+        # log.debug("content: %s", repr(content))
+        return self._header.rstrip()+"\n" + content
 
     @property
     def filename(self):
@@ -16,23 +16,39 @@
 # To contact SUSE about this file by physical or electronic mail,
 # you may find current contact information at www.suse.com
 
+import codecs
+import io
+import locale
+import mmap
 import re
 import sys
-import xml.sax
-from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
 from docmanager.core import NS, ReturnCodes, VALIDROOTS
 from docmanager.exceptions import DMInvalidXMLRootElement, \
-                                  DMFileNotFoundError
+                                  DMFileNotFoundError, DMXmlParseError
 from docmanager.logmanager import log, logmgr_flog
 from io import StringIO
-from itertools import accumulate
 
 # -------------------------------------------------------------------
 # Regular Expressions
 
 ENTS = re.compile("(&([\w_\.-]+);)")
 STEN = re.compile("(\[\[\[(\#?[\w_\.-]+)\]\]\])")
+# ENTS and STEN with only the name as group, for re.split: the names are
+# every second item of the result
+ENTS_NAME = re.compile(r"&([\w_\.-]+);")
+STEN_NAME = re.compile(r"\[\[\[(\#?[\w_\.-]+)\]\]\]")
 NAMESPACE_REGEX = re.compile("\{(?P<ns>.*)\}(?P<local>[-a-zA-Z0-9._]+)")
+# Any of: XML declaration, DOCTYPE, comment, or start tag
+XML_START = re.compile(r'<\?xml|<!DOCTYPE|<!--|<(?:\w+:)?[a-zA-Z0-9_]+')
+
+# Size of a chunk when reading a file piece by piece
+CHUNKSIZE = 4 * 1024
+# Size of a chunk when a whole file is fed into the parser
+FEEDSIZE = 64 * 1024
+# Longest entity name (including '&') which is held back between two chunks
+MAXENTITYLEN = 256
 
 
 def ent2txt(match, start="[[[", end="]]]"):
@@ -44,8 +60,6 @@ def ent2txt(match, start="[[[", end="]]]"):
     :return: replaced string
     :rtype: str
     """
-    logmgr_flog()
-
     if match:
         return "{}{}{}".format(start,
                                match.group(2),
@@ -59,8 +73,6 @@ def txt2ent(match):
     :return: replaced string
     :rtype: str
     """
-    logmgr_flog()
-
     if match:
         return "&{};".format(match.group(2))
 
@@ -74,7 +86,14 @@ def preserve_entities(text):
     """
     logmgr_flog()
 
-    return ENTS.sub(ent2txt, text)
+    if "&" not in text:
+        return text
+
+    # faster than ENTS.sub(ent2txt, text), which calls a function for each
+    # entity (or, with a template, expands it in Python)
+    parts = ENTS_NAME.split(text)
+    parts[1::2] = [ "[[[" + name + "]]]" for name in parts[1::2] ]
+    return "".join(parts)
 
 
 def recover_entities(text):
@@ -86,7 +105,13 @@ def recover_entities(text):
     """
     logmgr_flog()
 
-    return STEN.sub(txt2ent, text)
+    if "[[[" not in text:
+        return text
+
+    # see preserve_entities
+    parts = STEN_NAME.split(text)
+    parts[1::2] = [ "&" + name + ";" for name in parts[1::2] ]
+    return "".join(parts)
 
 
 def replaceinstream(stream, func):
@@ -130,22 +155,14 @@ def is_xml(text):
        :return: True, if text can be considered as XML, otherwise False
        :rtype: bool
     """
-    logmgr_flog()
+    # file names are the usual case, they are rejected without a search
+    if "<" not in text:
+        return False
+    return XML_START.search(text) is not None
 
-    possiblestartstrings = (re.compile("<\?xml"),
-                            re.compile("<!DOCTYPE"),
-                            re.compile("<!--",),
-                            re.compile(r'<(?P<tag>(?:(?P<prefix>\w+):)?'
-                                        '(?P<name>[a-zA-Z0-9_]+))\s*'),
-                           )
-    result = False
-    for matcher in possiblestartstrings:
-        match = matcher.search(text)
-        if match:
-            result = True
-            break
-    return result
 
+# Elements which can appear in front of <info> inside a DocBook 5 element
+INFO_PREDECESSORS = ('title', 'subtitle', 'titleabbrev', 'info')
 
 def findinfo_pos(root):
     """Find the position where to insert the <info> element
@@ -166,34 +183,140 @@ def findinfo_pos(root):
 
 # -------------------------------------------------------------------
 
-def ensurefileobj(source):
-    """Return a file(-like) object, regardless if it's a another
-       file-object, a filename, or a string
+@contextmanager
+def nullcontext(obj):
+    """Context manager which returns obj and does nothing else
+
+    :param obj: any object
+    """
+    yield obj
+
+
+def ensurestream(source):
+    """Return a context manager for a file(-like) object, regardless if it's
+       a another file-object, a filename, or a string. A file is not read
+       into memory.
 
        :param source: filename, file-like object, or string
-       :return: StringIO or file-like object
+       :return: context manager which returns a file-like object
     """
     logmgr_flog()
 
-    # StringIO support:
-    if hasattr(source, 'getvalue') and hasattr(source, 'tell'):
-        # we return the source
-        return source
-    elif isinstance(source, (str, bytes)):
-        if is_xml(source):
-            return StringIO(source)
-        else:
-            # source isn't a file-like object nor starts with XML structure
-            # so it has to be a filename
+    if hasattr(source, 'read'):
+        # the caller is responsible for closing its own object
+        return nullcontext(source)
+    elif is_xml(source):
+        return StringIO(source)
+
+    try:
+        return open(source, 'r')
+    except FileNotFoundError as err: # pylint:disable=undefined-variable
+        raise DMFileNotFoundError("Could not find file {!r}.".format(err.filename),
+                                  err.filename, ReturnCodes.E_FILE_NOT_FOUND)
+
+
+def mapfile(filename):
+    """Maps a file read-only into memory, so it can be read without a copy
+       of its content
+
+    :param str filename: the file name
+    :return: the mapped file or, if it can't be mapped (like empty files
+             or pipes), its content
+    :rtype: mmap.mmap or bytes
+    """
+    try:
+        with open(filename, 'rb') as f:
             try:
-                res = StringIO(open(source, 'r').read())
-            except FileNotFoundError as err: # pylint:disable=undefined-variable
-                raise DMFileNotFoundError("Could not find file {!r}.".format(err.filename),
-                                          err.filename, ReturnCodes.E_FILE_NOT_FOUND)
-            # pylint: enable=undefined-variable
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                return f.read()
+    except FileNotFoundError as err: # pylint:disable=undefined-variable
+        raise DMFileNotFoundError("Could not find file {!r}.".format(err.filename),
+                                  err.filename, ReturnCodes.E_FILE_NOT_FOUND)
+
+
+def closebuffer(buffer):
+    """Closes a buffer from mapfile(), so the mapping doesn't keep a file
+       descriptor open; the content can't be read anymore afterwards
+
+    :param buffer: the result of mapfile()
+    """
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+def textdecoder():
+    """Returns an incremental decoder which decodes bytes like a file which
+       was opened with open(filename, 'r')
+
+    :rtype: io.IncrementalNewlineDecoder
+    """
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+    return io.IncrementalNewlineDecoder(decoder, translate=True)
+
+
+def iterdecoded(buffer, size=FEEDSIZE):
+    """Decodes a buffer chunk by chunk, see textdecoder()
 
-            return res
-    # TODO: Check if source is an URL; should we allow this?
+    :param buffer: bytes-like object, e.g. from mapfile()
+    :param int size: size of a chunk in bytes
+    :return: generator of strings
+    """
+    decoder = textdecoder()
+    for pos in range(0, len(buffer), size):
+        yield decoder.decode(buffer[pos:pos+size])
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def decodebuffer(buffer):
+    """Decodes a whole buffer at once, see textdecoder()
+
+    :param buffer: bytes-like object, e.g. from mapfile()
+    :rtype: str
+    """
+    return textdecoder().decode(buffer, final=True)
+
+
+def iterpreserved(stream, data="", size=CHUNKSIZE):
+    """Read a stream chunk by chunk and preserve any entities. An entity
+       is never split across two chunks.
+
+    :param stream: file-like object
+    :param str data: data which was already read from stream
+    :param int size: size of a chunk
+    :return: generator of chunks with preserved entities
+    """
+    return preservechunks(iter(lambda: stream.read(size), ""), data)
+
+
+def preservechunks(chunks, data=""):
+    """Preserve any entities in chunks of a text. An entity is never split
+       across two chunks.
+
+    :param chunks: iterable of strings
+    :param str data: text in front of the first chunk
+    :return: generator of chunks with preserved entities
+    """
+    logmgr_flog()
+
+    for chunk in chunks:
+        data += chunk
+
+        # hold back a possibly incomplete entity at the end of the chunk
+        amp = data.rfind('&')
+        if amp != -1 and data.find(';', amp) == -1 and len(data) - amp <= MAXENTITYLEN:
+            data, rest = data[:amp], data[amp:]
+        else:
+            rest = ""
+
+        yield preserve_entities(data)
+        data = rest
+
+    if data:
+        yield preserve_entities(data)
 
 
 # -------------------------------------------------------------------
@@ -206,8 +329,6 @@ def localname(tag):
     :return:  local name
     :rtype:  str
     """
-    logmgr_flog()
-
     m = NAMESPACE_REGEX.search(tag)
     if m:
         return m.groupdict()['local']
@@ -221,17 +342,30 @@ def get_namespace(tag):
     :return:        namespace of the element
     :rtype:         str
     """
-    logmgr_flog()
-
     m = NAMESPACE_REGEX.search(tag)
     if m:
         return m.groupdict()['ns']
     else:
         return ''
 
+
+# Parts of the start tag pattern, taken from the xmllib.py
+# http://code.metager.de/source/xref/python/jython/lib-python/2.7/xmllib.py
+_S = '[ \t\r\n]+'                       # white space
+_opS = '[ \t\r\n]*'                     # optional white space
+_Name = '[a-zA-Z_:][-a-zA-Z0-9._:]*'    # valid XML name
+_QStr = "(?:'[^']*'|\"[^\"]*\")"        # quoted XML string
+ATTRFIND = (_S + '(?P<name>' + _Name + ')'
+            '(' + _opS + '=' + _opS +
+            '(?P<value>' + _QStr + r'|[-a-zA-Z0-9.:+*%?!\(\)_#=~]+))?')
+STARTTAGEND = _opS + '(?P<slash>/?)>'
+
+
+@lru_cache(maxsize=32)
 def compilestarttag(roottag=None):
     """Compile a regular expression for start tags like <article> or
-       <d:book> with or without any  attributes
+       <d:book> with or without any  attributes. The patterns of the last
+       used root tags are kept.
 
        :param str roottag: Name of roottag or None, for a general tag
        :return: a pattern object
@@ -239,176 +373,177 @@ def compilestarttag(roottag=None):
     """
     logmgr_flog()
 
-    # Taken from the xmllib.py
-    # http://code.metager.de/source/xref/python/jython/lib-python/2.7/xmllib.py
-    _S = '[ \t\r\n]+'                       # white space
-    _opS = '[ \t\r\n]*'                     # optional white space
-    _Name = '[a-zA-Z_:][-a-zA-Z0-9._:]*'    # valid XML name
-    _QStr = "(?:'[^']*'|\"[^\"]*\")"        # quoted XML string
-    attrfind = re.compile(
-        _S + '(?P<name>' + _Name + ')'
-        '(' + _opS + '=' + _opS +
-        '(?P<value>' + _QStr + '|[-a-zA-Z0-9.:+*%?!\(\)_#=~]+))?')
-    starttagend = re.compile(_opS + '(?P<slash>/?)>')
     if roottag:
         root = '<(?P<tagname>' + roottag + ')'
     else:
         root = '<(?P<tagname>' + _Name + ')'
-    return re.compile(root + '(?P<attrs>(?:' + attrfind.pattern + ')*)' +
-                      starttagend.pattern)
+    return re.compile(root + '(?P<attrs>(?:' + ATTRFIND + ')*)' + STARTTAGEND)
 
 
 # -------------
+# Prolog scanner
+
+STARTTAG_NAME = re.compile(r'<(?P<tagname>[a-zA-Z_:][-a-zA-Z0-9._:]*)')
+
 
-class LocatingWrapper(object):
-    """Holds a table which are used to transform line and column position
-       into offset
+def _position(text, offset):
+    """Returns line and column of an offset inside text
+
+    :param str text: the text
+    :param int offset: offset inside text
+    :return: line and column (both start with 1)
+    :rtype: tuple
+    """
+    line = text.count('\n', 0, offset) + 1
+    col = offset - text.rfind('\n', 0, offset)
+    return line, col
+
+
+def _prolog_error(text, offset, message):
+    """Returns a DMXmlParseError which points to offset inside text
+
+    :param str text: the text
+    :param int offset: offset of the error
+    :param str message: error message
+    :rtype: DMXmlParseError
+    """
+    return DMXmlParseError("<{}:{}> {}".format(*_position(text, offset), message),
+                           ReturnCodes.E_XML_PARSE_ERROR)
+
+
+def _skipquoted(text, pos):
+    """Returns the position after the quoted string which starts at pos
+
+    :return: position after the closing quote or -1 if not closed
+    :rtype: int
+    """
+    end = text.find(text[pos], pos + 1)
+    return -1 if end == -1 else end + 1
+
+
+def _skipdoctype(text, pos):
+    """Returns the position after a DOCTYPE declaration starting at pos.
+       Quoted strings, comments and the internal subset are skipped.
+
+    :return: position after the closing '>' or -1 if not closed
+    :rtype: int
     """
-    def __init__(self, f):
-        logmgr_flog()
-
-        self.f = f
-        self.offset = [0]
-        self.curoffs = 0
-
-    def read(self, *a):
-        """Read data"""
-        logmgr_flog()
-
-        data = self.f.read(*a)
-        self.offset.extend(accumulate(len(m)+1 for m in data.split('\n')))
-        return data
-
-    def where(self, locator):
-        """Returns the offset from line and column
-
-        :param locator: locator object
-        :return: offset
-        :rtype:  int
-        """
-        logmgr_flog()
-
-        return self.offset[locator.getLineNumber() - 1] + locator.getColumnNumber()
-
-    def close(self):
-        """Close the locator"""
-        logmgr_flog()
-        # Normally, we would close our file(-alike) object and call
-        #   self.f.close()
-        # However, we do nothing
-
-
-
-class Handler(xml.sax.handler.ContentHandler):
-    """ContentHandler to watch for start and end elements. Needed to
-       get the location of all the elements
-    """
-    def __init__( self, context, locator):
-        logmgr_flog()
-        super().__init__()# pylint:disable=super-on-old-class
-        self.context = context
-        self.locstm = locator
-        self.pos = namedtuple('Position', ['line', 'col', 'offset'])
-
-    def setDocumentLocator(self, locator):
-        """Called by the parser to give the application a locator for
-           locating the origin of document events.
-
-        :param LocatingWrapper loc: LocatingWrapper object
-        """
-        logmgr_flog()
-
-        self.loc = locator
-
-    def startElement(self, name, attrs):
-        """Signals the start of an element in non-namespace mode
-
-        :param str name:  XML 1.0 Name of the element
-        :param Attributes attrs: attributes of the current element
-        """
-        logmgr_flog()
-
-        ctxlen = len(self.context)
-        # We are only interested in the first two start tags
-        if ctxlen < 2:
-            current = self.locstm.where(self.loc)
-            pos = self.pos(self.loc.getLineNumber(), \
-                         self.loc.getColumnNumber(), \
-                         current)
-            self.context.append(["%s" % name, pos])
-
-    def endElement(self, name):
-        """Signals the end of an element in non-namespace mode
-
-        :param str name:  XML 1.0 Name of the element
-        """
-        logmgr_flog()
-
-        eline = self.loc.getLineNumber()
-        ecol = self.loc.getColumnNumber()
-        last = self.locstm.where(self.loc)
-        pos = self.pos(line=eline, col=ecol, offset=last)
-
-        # save the position of an end tag and add '/' in front of the
-        # name to distinguish it from a start tag
-        self.context.append(["/%s" % name, pos])
-
-    def processingInstruction(self, target, data):
-        """Receive notification of a processing instruction (PI)
-
-        :param str target: the target of the PI
-        :param str data:   the data of the PI
-        """
-        logmgr_flog()
-
-        ctxlen = len(self.context)
-        # Only append PIs when it's NOT before start-tag
-        if ctxlen:
-            current = self.locstm.where(self.loc)
-            pos = self.pos(self.loc.getLineNumber(), \
-                            self.loc.getColumnNumber(), \
-                            current)
-            self.context.append(["?%s" % target, pos])
-
-    def comment(self, text): # pylint: disable=unused-argument
-        """Signals an XML comment
-
-        :param str text: text content of the XML comment
-        """
-        logmgr_flog()
-
-        ctxlen = len(self.context)
-        # We are only interested in the first two start tags
-        if ctxlen:
-            current = self.locstm.where(self.loc)
-            pos = self.pos(self.loc.getLineNumber(), \
-                           self.loc.getColumnNumber(), \
-                           current)
-            self.context.append(["-- comment", pos])
-
-    # From LexicalParser
-    def startCDATA(self):
-        """Signals a CDATA section"""
-        logmgr_flog()
-
-    endCDATA = startCDATA
-
-    def startDTD(self,  doctype, publicID, systemID): # pylint:disable=unused-argument
-        """Signals the start of an DTD declaration
-
-        :param  doctype: name of the root element
-        :param publicID: public identifier (or empty)
-        :param systemID: system identifier (or empty)
-        """
-        logmgr_flog()
-
-    def endDTD(self):
-        """Reports the end of a DTD declaration"""
-        logmgr_flog()
-
-    def startEntity(self, name):  # pylint: disable=unused-argument
-        """Reports the start of an entity"""
-        logmgr_flog()
+    length = len(text)
+    depth = 0
+    pos += len('<!DOCTYPE')
+
+    while pos < length:
+        char = text[pos]
+        if char in '"\'':
+            pos = _skipquoted(text, pos)
+            if pos == -1:
+                return -1
+            continue
+        elif char == '<' and text.startswith('<!--', pos):
+            pos = text.find('-->', pos + 4)
+            if pos == -1:
+                return -1
+            pos += 3
+            continue
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == '>' and depth <= 0:
+            return pos + 1
+        pos += 1
+
+    return -1
+
+
+def _skipstarttag(text, pos):
+    """Returns the position after a start tag starting at pos
+
+    :return: position after the closing '>' or -1 if not closed
+    :rtype: int
+    """
+    length = len(text)
+    while pos < length:
+        char = text[pos]
+        if char in '"\'':
+            pos = _skipquoted(text, pos)
+            if pos == -1:
+                return -1
+            continue
+        elif char == '>':
+            return pos + 1
+        pos += 1
+
+    return -1
+
+
+def scanprolog(text, final=True):
+    """Scans the prolog of an XML document and locates its root start tag.
+       Only the prolog and the start tag are read, the rest of the
+       document is left untouched.
+
+    :param str text: XML document (or the beginning of it)
+    :param bool final: True, if text contains the complete document. If
+                       False, None is returned when text ends before the
+                       root start tag is complete
+    :return: { 'header':  '...', # str: everything before the start tag
+               'root':    '...', # str: start tag from '<' til '>'
+               'offset':  1,     # int: offset of the start tag
+               'roottag': '...', # str: name of the root element
+             }
+    :rtype: dict or None
+    :raise: DMXmlParseError if the prolog is not well-formed
+    """
+    length = len(text)
+    pos = 0
+
+    while True:
+        # skip any whitespace between the constructs of the prolog
+        while pos < length and text[pos] in ' \t\r\n':
+            pos += 1
+
+        if pos >= length:
+            end = -1
+        elif text.startswith('<?', pos):
+            end = text.find('?>', pos + 2)
+            end = end if end == -1 else end + 2
+        elif text.startswith('<!--', pos):
+            end = text.find('-->', pos + 4)
+            end = end if end == -1 else end + 3
+        elif text.startswith('<!DOCTYPE', pos):
+            end = _skipdoctype(text, pos)
+        elif not final and any(m.startswith(text[pos:]) for m in ('<!DOCTYPE', '<!--')):
+            # too short to decide what comes next
+            end = -1
+        else:
+            break
+
+        if end == -1:
+            if final:
+                raise _prolog_error(text, pos, "no element found")
+            return None
+        pos = end
+
+    match = STARTTAG_NAME.match(text, pos)
+    if match is None:
+        raise _prolog_error(text, pos, "not well-formed (invalid token)")
+
+    end = _skipstarttag(text, match.end())
+    if end == -1:
+        if final:
+            raise _prolog_error(text, pos, "unclosed token")
+        return None
+
+    # The start tag "owns" any whitespace up to the next markup
+    tail = end
+    while tail < length and text[tail] in ' \t\r\n':
+        tail += 1
+
+    return {'header':  text[:pos],
+            'root':    text[pos:tail].rstrip(' '),
+            'offset':  pos,
+            'roottag': match.group('tagname'),
+           }
 
 
 def findprolog(source, maxsize=-1):
@@ -423,58 +558,191 @@ def findprolog(source, maxsize=-1):
                'offset:  1,     # Integer
              }
     :rtype: dict
+    :raise: DMXmlParseError if the prolog is not well-formed
     """
     logmgr_flog()
 
-    result = {}
-
-    # context is used to save our locations
-    context = []
-
-    buf = ensurefileobj(source)
-    # We read in maxsize and hope this is enough...
-    xmlbuf = buf.read(maxsize)
-    buf.seek(0)
-    locstm = LocatingWrapper(buf)
-    parser = xml.sax.make_parser()
-
-    # Disable certain features:
-    # no validation, no external general and parameter entities
-    parser.setFeature(xml.sax.handler.feature_validation, False)
-    parser.setFeature(xml.sax.handler.feature_external_ges, False)
-    parser.setFeature(xml.sax.handler.feature_external_pes, False)
-
-    handler = Handler(context, locstm)
-    parser.setProperty(xml.sax.handler.property_lexical_handler, handler);
-
-    parser.setContentHandler(handler)
-    parser.parse(locstm)
-
-    first = context[0]
-    soffset = first[1].offset
-    doctype = xmlbuf[:soffset]
-
-    # Check if we have reached the "end tag" (symbolized with '/' in
-    # its first character).
-    # If yes, start and end tag is on the same line and we can use the
-    # last entry.
-    # If not, we need to look in the next entry
-    if context[1][0][0] == '/':
-        last = context[-1]
-    elif context[1][0][0] ==  '-':
-        last = context[1]
-    else:
-        last = context[1]
+    # scanprolog stops at the root start tag, so a text is not copied
+    if isinstance(source, str) and is_xml(source):
+        return scanprolog(source if maxsize < 0 else source[:maxsize])
+
+    # read only until the root start tag is complete, at most maxsize
+    with ensurestream(source) as stream:
+        data = ""
+        prolog = None
+        while prolog is None:
+            size = CHUNKSIZE if maxsize < 0 else min(CHUNKSIZE, maxsize - len(data))
+            chunk = stream.read(size) if size > 0 else ""
+            data += chunk
+            prolog = scanprolog(data, final=not chunk)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    return prolog
+
+def sniff_docbook(filename, size=CHUNKSIZE):
+    """Checks cheaply if a file can be a DocBook 5 document; only the first
+       bytes of the file are read
+
+    :param str filename: the file name
+    :param int size: number of bytes to look at
+    :return: False if the file is certainly not DocBook 5: not XML, or a
+             root start tag without the DocBook namespace
+    :rtype: bool
+    :raise OSError: if the file can't be read
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(size)
 
-    eoffset = last[1].offset
-    starttag = xmlbuf[soffset:eoffset].rstrip(' ')
+    # binary files
+    if b'\0' in head:
+        return False
 
-    result['header'] = doctype
-    result['root'] = starttag
-    result['offset'] = len(doctype)
-    result['roottag'] = context[0][0]
+    text = textdecoder().decode(head)
+    if not is_xml(text):
+        return False
+
+    try:
+        prolog = scanprolog(text, final=len(head) < size)
+    except DMXmlParseError:
+        # broken DocBook files are left to the parser, which reports them
+        return NS['d'] in text
+
+    # the root start tag is beyond the first bytes
+    if prolog is None:
+        return True
+    return NS['d'] in prolog['root']
+
+
+# namespace declaration inside a start tag serialized by lxml
+XMLNS_DECL = re.compile(r'\s+xmlns(?::(?P<prefix>[^\s=]+))?="(?P<uri>[^"]*)"')
+
+
+def get_node_path(node):
+    """Returns the position of a node as child indices from the root element.
+       Like in lxml, comments and processing instructions are counted.
+
+    :param lxml.etree._Element node: the node
+    :return: child indices, the first one is the index inside the root element
+    :rtype: list
+    """
+    path = []
+    parent = node.getparent()
+
+    while parent is not None:
+        path.append(parent.index(node))
+        node, parent = parent, parent.getparent()
+
+    path.reverse()
+    return path
+
+
+def findnodespan(text, offset, path):
+    """Finds the character range of a node inside the original XML text
+
+    :param str text: XML document; entities have to be unresolved
+    :param int offset: offset of the root start tag, see scanprolog
+    :param list path: position of the node, see get_node_path
+    :return: start and end offset of the node or None if it wasn't found
+    :rtype: tuple
+    """
+    if not path:
+        return None
+
+    pos = _skipstarttag(text, offset)
+    if pos == -1 or text[pos - 2] == '/':
+        return None
+
+    # index of the last seen node for each depth below the root element
+    indices = [-1]
+    start = None
+
+    while True:
+        pos = text.find('<', pos)
+        if pos == -1:
+            return None
+
+        if text.startswith('<![CDATA[', pos):
+            end = text.find(']]>', pos)
+            if end == -1:
+                return None
+            pos = end + 3
+            continue
+
+        if text.startswith('</', pos):
+            end = text.find('>', pos)
+            if end == -1:
+                return None
+            pos = end + 1
+            indices.pop()
+
+            if not indices:
+                # end of the root element
+                return None
+            if start is not None and len(indices) == len(path):
+                return start, pos
+            continue
+
+        if text.startswith('<!--', pos):
+            end = text.find('-->', pos)
+            end = end if end == -1 else end + 3
+            children = False
+        elif text.startswith('<?', pos):
+            end = text.find('?>', pos)
+            end = end if end == -1 else end + 2
+            children = False
+        else:
+            end = _skipstarttag(text, pos)
+            children = text[end - 2] != '/'
+
+        if end == -1:
+            return None
+
+        indices[-1] += 1
+        if start is None and indices == path:
+            if not children:
+                return pos, end
+            start = pos
+
+        if children:
+            indices.append(-1)
+        pos = end
+
+
+def strip_inherited_ns(content, nsmap):
+    """Removes the namespace declarations from the first start tag of
+       serialized XML which are already declared in the ancestors
+
+    :param str content: XML serialized with etree.tostring
+    :param dict nsmap: namespaces in scope of the parent element
+    :return: content without the inherited namespace declarations
+    :rtype: str
+    """
+    end = _skipstarttag(content, 0)
+
+    def strip(match):
+        if nsmap.get(match.group('prefix')) == match.group('uri'):
+            return ""
+        return match.group(0)
+
+    return XMLNS_DECL.sub(strip, content[:end]) + content[end:]
+
+
+def get_indent_level(text, offset):
+    """Returns the indentation level (in steps of two spaces, see xml_indent)
+       of the line of offset
+
+    :param str text: the text
+    :param int offset: offset inside text
+    :return: indentation level
+    :rtype: int
+    """
+    line = text[text.rfind('\n', 0, offset) + 1:offset]
+    if line.strip():
+        return 0
+    return len(line.expandtabs(8)) // 2
 
-    return result
 
 def xml_indent(elem, level=0):
     """Indent XML elements
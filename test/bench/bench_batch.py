@@ -0,0 +1,94 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: one 'set' call per file and property compared with one
+'batch' call with the same operations
+
+Usage: PYTHONPATH=src python3 test/bench/bench_batch.py [--files N] [--props N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.logmanager import setloglevel
+
+
+def run(argv):
+    """Runs a docmanager command without its output"""
+    cli = parsecli(argv)
+    # parsecli sets the log level from -v
+    setloglevel(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            Actions(cli).parse()
+        except SystemExit:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=32,
+                        help="Number of test files")
+    parser.add_argument("--props", type=int, default=4,
+                        help="Number of properties which are set per file")
+    parser.add_argument("--paras", type=int, default=2000,
+                        help="Number of paragraphs per test file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = makefile(tmp, args.paras)
+        files = list()
+        for i in range(args.files):
+            files.append(os.path.join(tmp, "file-{}.xml".format(i)))
+            shutil.copy(template, files[-1])
+
+        # each repetition sets new values, so every file is written
+        counter = [0]
+
+        def single():
+            counter[0] += 1
+            for f in files:
+                for p in range(args.props):
+                    run(["set", "-p", "prop{}={}".format(p, counter[0]), f])
+
+        def batch():
+            counter[0] += 1
+            batchfile = os.path.join(tmp, "ops.jsonl")
+            with open(batchfile, "w") as ops:
+                for f in files:
+                    for p in range(args.props):
+                        ops.write(json.dumps({"op": "set", "file": f, "properties":
+                                              {"prop{}".format(p): str(counter[0])}}) + "\n")
+            run(["batch", batchfile])
+
+        calls = args.files * args.props
+        print("{:>5} x set  : {:8.1f} ms".format(calls, timeit(single, args.repeat)))
+        print("    1 x batch: {:8.1f} ms".format(timeit(batch, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: 'analyze' on a git repository with a few changed files,
+with and without --changed-since
+
+Usage: PYTHONPATH=src python3 test/bench/bench_changed.py [--files N] [--changed N]
+"""
+
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+
+from bench_parse import makefile, timeit
+import docmanager.cache
+import docmanager.config
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.logmanager import setloglevel
+
+
+def git(*args):
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com"] +
+                   list(args), check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--changed", type=int, default=5)
+    parser.add_argument("--paras", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        # no metadata cache, so every file without --changed-since is parsed
+        docmanager.cache.USER_CACHE_DIR = os.path.join(tmp, "cache")
+        docmanager.config.USER_CACHE_DIR = docmanager.cache.USER_CACHE_DIR
+        template = makefile(tmp, args.paras)
+        repo = os.path.join(tmp, "repo")
+        os.mkdir(repo)
+        os.chdir(repo)
+
+        try:
+            names = []
+            for i in range(args.files):
+                names.append("f{:05}.xml".format(i))
+                shutil.copy(template, names[-1])
+            git("init", "-q")
+            git("add", ".")
+            git("commit", "-q", "-m", "init")
+            for name in names[:args.changed]:
+                with open(name, "a") as f:
+                    f.write("<!-- changed -->\n")
+
+            for options in ("--no-cache", "--no-cache --changed-since HEAD"):
+                argv = shlex.split(options) + ["analyze", "-qf", "{os.file} {maintainer}"] + names
+
+                def run():
+                    with redirect_stdout(devnull):
+                        Actions(parsecli(argv)).parse()
+
+                print("{:<35} {:8.1f} ms".format(options, timeit(run, args.repeat)))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
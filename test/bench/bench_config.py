@@ -0,0 +1,76 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: reading the configuration files, with and without the
+merged configuration cache
+
+Usage: PYTHONPATH=src python3 test/bench/bench_config.py [--layers N ...]
+"""
+
+import argparse
+import os
+import tempfile
+
+from bench_parse import timeit
+import docmanager.config
+from docmanager.config import docmanagerconfig
+from docmanager.logmanager import setloglevel
+
+SECTION = """[section{0}]
+maintainer = user{0}
+status = editing
+queryformat = {{os.file}} {{maintainer}} {{priority}} {{status}}
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--layers", type=int, nargs="+", default=[1, 4, 16],
+                        help="Number of config files")
+    parser.add_argument("--sections", type=int, default=20,
+                        help="Number of sections per config file")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        docmanager.config.USER_CACHE_DIR = os.path.join(tmp, "cache")
+        cachefile = os.path.join(docmanager.config.USER_CACHE_DIR,
+                                 docmanager.config.CONFIG_CACHE_NAME)
+
+        for layers in args.layers:
+            files = []
+            for layer in range(layers):
+                name = os.path.join(tmp, "layer{}.conf".format(layer))
+                with open(name, "w") as f:
+                    for i in range(args.sections):
+                        f.write(SECTION.format(i))
+                files.append(name)
+
+            def uncached():
+                if os.path.exists(cachefile):
+                    os.unlink(cachefile)
+                docmanagerconfig(files)
+
+            print("{:2} layers: uncached {:6.2f} ms, cached {:6.2f} ms".format(
+                layers, timeit(uncached, args.repeat),
+                timeit(lambda: docmanagerconfig(files), args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: resolving DC files whose books share chapters
+
+Compares one IncludeResolver for all books (what expand_dcfiles does)
+with a new resolver for each book, which reads shared chapters again.
+
+Usage: PYTHONPATH=src python3 test/bench/bench_dcfile.py [--books N] [--chapters N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager.dcfile import IncludeResolver, dc_mainfile, expand_dcfiles
+from docmanager.logmanager import setloglevel
+
+BOOK = """<?xml version="1.0"?>
+<book xmlns="http://docbook.org/ns/docbook" xmlns:xi="http://www.w3.org/2001/XInclude"
+      version="5.0">
+  <title>Book {}</title>
+{}</book>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=20)
+    parser.add_argument("--chapters", type=int, default=200,
+                        help="Chapters, each book includes all of them")
+    parser.add_argument("--paras", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        template = makefile(tmp, args.paras)
+        xml = os.path.join(tmp, "xml")
+        os.mkdir(xml)
+        includes = ""
+        for i in range(args.chapters):
+            shutil.copy(template, os.path.join(xml, "ch{:04}.xml".format(i)))
+            includes += '  <xi:include href="ch{:04}.xml"/>\n'.format(i)
+
+        dcfiles = []
+        for b in range(args.books):
+            with open(os.path.join(xml, "book{}.xml".format(b)), "w") as f:
+                f.write(BOOK.format(b, includes))
+            dcfiles.append(os.path.join(tmp, "DC-book{}".format(b)))
+            with open(dcfiles[-1], "w") as f:
+                f.write('MAIN="book{}.xml"\n'.format(b))
+
+        def separate():
+            files = set()
+            for dc in dcfiles:
+                files.update(IncludeResolver().resolve(dc_mainfile(dc)))
+            return files
+
+        assert separate() == set(expand_dcfiles(dcfiles))
+        print("{} books with {} chapters".format(args.books, args.chapters))
+        print("{:<28} {:8.1f} ms".format("resolver per book", timeit(separate, args.repeat)))
+        print("{:<28} {:8.1f} ms".format("shared resolver", timeit(lambda: expand_dcfiles(dcfiles),
+                                                                   args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: entity preservation with Python callbacks (ent2txt and
+txt2ent) compared with preserve_entities and recover_entities
+
+Usage: PYTHONPATH=src python3 test/bench/bench_entities.py [--paras N]
+"""
+
+import argparse
+import os.path
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager.logmanager import setloglevel
+from docmanager.xmlutil import ENTS, STEN, ent2txt, txt2ent, preserve_entities, \
+     recover_entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paras", type=int, default=20000,
+                        help="Number of paragraphs (with two entities each)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(makefile(tmp, args.paras)) as f:
+            text = f.read()
+
+    preserved = preserve_entities(text)
+    assert ENTS.sub(ent2txt, text) == preserved
+    assert STEN.sub(txt2ent, preserved) == recover_entities(preserved) == text
+
+    print("{} bytes, {} entities".format(len(text), len(ENTS.findall(text))))
+    for name, func in (("preserve (callback)", lambda: ENTS.sub(ent2txt, text)),
+                       ("preserve_entities  ", lambda: preserve_entities(text)),
+                       ("recover (callback) ", lambda: STEN.sub(txt2ent, preserved)),
+                       ("recover_entities   ", lambda: recover_entities(preserved))):
+        print("{}: {:8.2f} ms".format(name, timeit(func, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
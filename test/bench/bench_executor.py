@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: scaling of the executors across 1..N jobs and the time
+until the first file is available to the action
+
+Usage: PYTHONPATH=src python3 test/bench/bench_executor.py [--files N] [--paras N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from collections import deque
+
+from bench_parse import makefile, timeit
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.logmanager import setloglevel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=64,
+                        help="Number of test files")
+    parser.add_argument("--paras", type=int, default=2000,
+                        help="Number of paragraphs per test file")
+    parser.add_argument("--action", default="get", choices=("get", "analyze"))
+    parser.add_argument("--jobs", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = makefile(tmp, args.paras)
+        files = list()
+        for i in range(args.files):
+            files.append(os.path.join(tmp, "file-{}.xml".format(i)))
+            shutil.copy(template, files[-1])
+
+        for executor in ("serial", "thread", "process"):
+            for jobs in args.jobs if executor != "serial" else [1]:
+                argv = ["--no-cache", "--executor", executor, "-j", str(jobs),
+                        args.action] + files
+                cli = parsecli(argv)
+                # parsecli sets the log level from -v
+                setloglevel(0)
+                best = timeit(lambda: deque(Actions(cli).iter_handlers(), 0),
+                              args.repeat)
+                first = timeit(lambda: next(Actions(cli).iter_handlers()),
+                               args.repeat)
+                print("{:>7} -j {:<2}: {:8.1f} ms for {} files, "
+                      "first file after {:6.1f} ms".format(
+                    executor, jobs, best, len(files), first))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: finding the DocBook files below a directory
+
+Compares os.walk() with a check of every file by the XML parser (what a
+script had to do before --recursive) with filewalk.walk_files().
+
+Usage: PYTHONPATH=src python3 test/bench/bench_filewalk.py [--dirs N] [--files N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager.exceptions import DMInvalidXMLRootElement, DMNotDocBook5File, \
+     DMXmlParseError
+from docmanager.filewalk import walk_files
+from docmanager.logmanager import setloglevel
+from docmanager.xmlhandler import XmlHandler
+
+
+def parsewalk(directory):
+    """Finds the DocBook files with os.walk and the parser"""
+    found = []
+    for path, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith(".xml"):
+                continue
+            try:
+                XmlHandler(os.path.join(path, name), readonly=True)
+            except (DMInvalidXMLRootElement, DMNotDocBook5File, DMXmlParseError):
+                continue
+            found.append(os.path.join(path, name))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dirs", type=int, default=20)
+    parser.add_argument("--files", type=int, default=100, help="Files per directory")
+    parser.add_argument("--paras", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        template = makefile(tmp, args.paras)
+        root = os.path.join(tmp, "tree")
+        for d in range(args.dirs):
+            directory = os.path.join(root, "dir{:03}".format(d), "xml")
+            os.makedirs(directory)
+            for i in range(args.files):
+                name = os.path.join(directory, "f{:04}.xml".format(i))
+                if i % 10 == 9:
+                    with open(name, "w") as f:
+                        f.write("<html><body/></html>\n")
+                else:
+                    shutil.copy(template, name)
+                with open(name[:-4] + ".png", "wb") as f:
+                    f.write(b"\x89PNG\r\n")
+
+        expected = parsewalk(root)
+        assert walk_files(root) == expected
+
+        print("{} files".format(len(expected)))
+        print("{:<28} {:8.1f} ms".format("os.walk + parser", timeit(lambda: parsewalk(root),
+                                                                    args.repeat)))
+        for jobs in (1, 4):
+            print("{:<28} {:8.1f} ms".format("walk_files(jobs={})".format(jobs),
+                                             timeit(lambda: walk_files(root, jobs=jobs),
+                                                    args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
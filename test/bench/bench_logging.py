@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: logging overhead of 'analyze' on many files
+
+Usage: PYTHONPATH=src python3 test/bench/bench_logging.py [--files N]
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager import logmanager
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=1000,
+                        help="Number of test files")
+    parser.add_argument("--paras", type=int, default=20,
+                        help="Number of paragraphs per test file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        template = makefile(tmp, args.paras)
+        files = list()
+        for i in range(args.files):
+            files.append(os.path.join(tmp, "file-{}.xml".format(i)))
+            shutil.copy(template, files[-1])
+
+        # keep the log messages of -vv and -vvv out of the measurement
+        logmanager._ch.setStream(devnull) # pylint: disable=protected-access
+
+        for verbose in ("", "-vv", "-vvv"):
+            argv = ([verbose] if verbose else []) + \
+                   ["--no-cache", "--executor=serial", "analyze",
+                    "-qf", "{maintainer} {status}"] + files
+            cli = parsecli(argv)
+
+            with contextlib.redirect_stdout(devnull):
+                best = timeit(lambda: Actions(cli).parse(), args.repeat)
+
+            print("analyze {:>4}: {:8.1f} ms for {} files".format(
+                verbose or "-v0", best, len(files)))
+
+        logmanager.setloglevel(0)
+        best = timeit(lambda: [logmanager.logmgr_flog() for _ in range(100000)], args.repeat)
+        print("logmgr_flog() disabled: {:6.1f} ns/call".format(best * 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: peak memory of parsing files for writing, for one file
+(allocated by Python) and for a whole 'set' run (peak RSS)
+
+Usage: PYTHONPATH=src python3 test/bench/bench_memory.py [--files N] [--paras N ...] [-j N]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from bench_parse import makefile
+from docmanager.logmanager import setloglevel
+from docmanager.xmlhandler import XmlHandler
+
+
+def peak_rss(argv):
+    """Runs docmanager in a new process
+
+    :param list argv: the command line arguments
+    :return: peak RSS of the process in MiB
+    :rtype: float
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    # with wait4(), the usage of exactly this process is returned
+    proc = subprocess.Popen([sys.executable, "-m", "docmanager"] + argv, env=env,
+                            stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KiB on Linux
+    return usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=32,
+                        help="Number of test files for the 'set' run")
+    parser.add_argument("--paras", type=int, nargs="+", default=[20000, 100000],
+                        help="Number of paragraphs per test file")
+    parser.add_argument("-j", "--jobs", type=int, default=16)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for paras in args.paras:
+            template = makefile(tmp, paras)
+            size = os.path.getsize(template) / 1024 / 1024
+
+            tracemalloc.start()
+            handler = XmlHandler(template)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del handler
+            print("XmlHandler({:6.1f} MiB file): {:6.1f} MiB allocated at peak".format(
+                size, peak / 1024 / 1024))
+
+            files = list()
+            for i in range(args.files):
+                files.append(os.path.join(tmp, "file-{}-{}.xml".format(paras, i)))
+                shutil.copy(template, files[-1])
+
+            rss = peak_rss(["--no-daemon", "--executor", "thread", "-j", str(args.jobs),
+                            "set", "-p", "maintainer=bench"] + files)
+            print("set -j {} ({} x {:.1f} MiB files): {:6.1f} MiB peak RSS".format(
+                args.jobs, len(files), size, rss))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: per-file parse time of the XmlHandler
+
+Usage: PYTHONPATH=src python3 test/bench/bench_parse.py [--paras N ...]
+"""
+
+import argparse
+import os.path
+import tempfile
+import time
+
+from docmanager.logmanager import setloglevel
+from docmanager.xmlhandler import XmlHandler
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE book [
+  <!ENTITY % entities SYSTEM "entity-decl.ent">
+  %entities;
+]>
+<book xmlns="http://docbook.org/ns/docbook"
+      xmlns:dm="urn:x-suse:ns:docmanager" version="5.0">
+  <title>Benchmark</title>
+  <info>
+    <dm:docmanager>
+      <dm:maintainer>bench</dm:maintainer>
+      <dm:status>editing</dm:status>
+      <dm:priority>3</dm:priority>
+    </dm:docmanager>
+  </info>
+"""
+PARA = "  <para>Paragraph {} about &productname; and &suse; with some text.</para>\n"
+FOOTER = "</book>\n"
+
+
+def makefile(directory, paras):
+    """Creates a DocBook file with the given number of paragraphs
+
+    :param str directory: target directory
+    :param int paras: number of paragraphs
+    :return: file name
+    :rtype: str
+    """
+    filename = os.path.join(directory, "bench-{}.xml".format(paras))
+    with open(filename, "w") as f:
+        f.write(HEADER)
+        for i in range(paras):
+            f.write(PARA.format(i))
+        f.write(FOOTER)
+    return filename
+
+
+def timeit(func, repeat):
+    """Returns the best time of func in milliseconds
+
+    :param func: function without arguments
+    :param int repeat: number of repetitions
+    :rtype: float
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        duration = (time.perf_counter() - start) * 1000
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paras", type=int, nargs="+", default=[200, 20000],
+                        help="Number of paragraphs per test file")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for paras in args.paras:
+            filename = makefile(tmp, paras)
+            for readonly in (False, True):
+                best = timeit(lambda: XmlHandler(filename, readonly=readonly),
+                              args.repeat)
+                print("XmlHandler({:>9} bytes, readonly={!s:5}): {:8.2f} ms/file".format(
+                    os.path.getsize(filename), readonly, best))
+
+
+if __name__ == "__main__":
+    main()
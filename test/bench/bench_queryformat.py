@@ -0,0 +1,72 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: rendering the query format of 'analyze'
+
+Compares the old way (parse -qf and replace every placeholder for each file)
+with a compiled QueryFormat.
+
+Usage: PYTHONPATH=src python3 test/bench/bench_queryformat.py [--renders N]
+"""
+
+import argparse
+
+from bench_parse import timeit
+from docmanager.analyzer import QueryFormat, parse_queryformat
+
+QUERYFORMAT = "{os.file}: {maintainer} | {status} | {priority} {{raw}} {deadline}"
+
+
+def replace(queryformat, filename, values):
+    """The query format rendering before QueryFormat (a replace per placeholder)"""
+    output = queryformat.replace("{os.file}", filename)
+    for field in parse_queryformat(queryformat):
+        if field in values:
+            output = output.replace("{{{}}}".format(field), values[field])
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=50000,
+                        help="Number of rendered lines")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = [("file-{}.xml".format(i),
+             dict(maintainer="user{}".format(i % 7), status="editing",
+                  priority=str(i % 5), deadline="2015-06-01"))
+            for i in range(args.renders)]
+
+    qf = QueryFormat(QUERYFORMAT)
+    columns = [[f if field == "os.file" else v[field] for f, v in rows]
+               for field in qf.fields]
+
+    assert [replace(QUERYFORMAT, f, v) for f, v in rows] == qf.render_columns(columns)
+
+    tests = [
+        ("replace per file", lambda: [replace(QUERYFORMAT, f, v) for f, v in rows]),
+        ("QueryFormat.render_columns", lambda: qf.render_columns(columns)),
+    ]
+    for name, func in tests:
+        best = timeit(func, args.repeat)
+        print("{:<28} {:8.1f} ms for {} renders".format(name, best, args.renders))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Benchmark: startup time of short docmanager calls
+
+Measures 'import docmanager' (as reported by python -X importtime) and the
+wall clock time of a complete 'docmanager get' process.
+
+Usage: PYTHONPATH=src python3 test/bench/bench_startup.py [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from bench_parse import makefile, timeit
+from docmanager.logmanager import setloglevel
+
+
+def importtime(env):
+    """Returns the cumulative import time of docmanager in milliseconds
+
+    :param dict env: environment of the interpreter
+    :rtype: float
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import docmanager"],
+                          env=env, stderr=subprocess.PIPE, universal_newlines=True,
+                          check=True)
+    match = re.search(r"\|\s+(\d+) \| docmanager$", proc.stderr, re.M)
+    return int(match.group(1)) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = makefile(tmp, 10)
+        command = [sys.executable, "-m", "docmanager", "--no-daemon",
+                   "get", "-p", "maintainer", filename]
+
+        best = min(importtime(env) for _ in range(args.repeat))
+        print("{:<30} {:8.1f} ms".format("import docmanager", best))
+
+        duration = timeit(lambda: subprocess.run(command, env=env, cwd=tmp,
+                                                 stdout=subprocess.DEVNULL, check=True),
+                          args.repeat)
+        print("{:<30} {:8.1f} ms".format("docmanager get (process)", duration))
+
+
+if __name__ == "__main__":
+    main()
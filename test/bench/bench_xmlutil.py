@@ -0,0 +1,75 @@
+#
+# Copyright (c) 2015 SUSE Linux GmbH
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, contact SUSE LLC.
+#
+# To contact SUSE about this file by physical or electronic mail,
+# you may find current contact information at www.suse.com
+
+"""Micro-benchmarks of the helper functions in docmanager.xmlutil
+
+Usage: PYTHONPATH=src python3 test/bench/bench_xmlutil.py [--number N]
+"""
+
+import argparse
+import tempfile
+
+from bench_parse import makefile, timeit
+from lxml import etree
+from docmanager.core import NS
+from docmanager.logmanager import setloglevel
+from docmanager.xmlutil import compilestarttag, findprolog, get_property_xpath, \
+     is_xml, localname
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=10000,
+                        help="Number of calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setloglevel(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = makefile(tmp, 20000)
+        with open(filename) as f:
+            text = f.read()
+
+        node = etree.fromstring(
+            '<dm:docmanager xmlns:dm="{dm}"><dm:bugtracker><dm:url/></dm:bugtracker>'
+            '</dm:docmanager>'.format(**NS))[0][0]
+        tag = node.tag
+
+        benchmarks = (
+            ("is_xml(filename)", lambda: is_xml(filename)),
+            ("is_xml(text)", lambda: is_xml(text)),
+            ("compilestarttag('book')", lambda: compilestarttag("book")),
+            ("localname(tag)", lambda: localname(tag)),
+            ("get_property_xpath(node)", lambda: get_property_xpath(node)),
+        )
+
+        def repeated(func):
+            return lambda: [ func() for _ in range(args.number) ]
+
+        for name, func in benchmarks:
+            best = timeit(repeated(func), args.repeat) * 1000 / args.number
+            print("{:28}: {:8.2f} us/call".format(name, best))
+
+        # findprolog reads the file, so it is measured per call in ms
+        for name, source in (("findprolog(filename)", filename), ("findprolog(text)", text)):
+            print("{:28}: {:8.2f} ms/call".format(name, timeit(lambda: findprolog(source),
+                                                                 args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
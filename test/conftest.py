@@ -65,6 +65,15 @@ def compare_pytest_version(minimum):
 # Fixtures
 #
 
+@pytest.fixture(autouse=True)
+def cachedir(tmpdir_factory, monkeypatch):
+    """Fixture: Uses a temporary directory for the metadata and config cache"""
+    path = tmpdir_factory.mktemp("cache")
+    monkeypatch.setattr("docmanager.cache.USER_CACHE_DIR", path.strpath)
+    monkeypatch.setattr("docmanager.config.USER_CACHE_DIR", path.strpath)
+    return path
+
+
 @pytest.fixture
 def testdir():
     """Fixture: Returns the test directory"""
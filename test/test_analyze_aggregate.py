@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.analyzer import Aggregator, MetadataTable
+from docmanager.cli import parsecli
+
+
+def maketable(rows):
+    """Returns a MetadataTable with the given rows
+
+    :param list rows: dicts with the properties of each file
+    :rtype: MetadataTable
+    """
+    table = MetadataTable(["status", "deadline", "priority"])
+    for idx, row in enumerate(rows):
+        table.files.append("file-{}.xml".format(idx))
+        for prop, column in table.columns.items():
+            column.append(row.get(prop))
+    return table
+
+
+def test_aggregator():
+    """Checks counts, minimum, maximum and histograms per group
+    """
+    table = maketable([
+        dict(status="wip", deadline="2015-10-01", priority="2"),
+        dict(status="wip", deadline="2015-9-30", priority="10"),
+        dict(status="done", priority="2"),
+        dict(deadline=""),
+    ])
+
+    agg = Aggregator(["status"], True, ["deadline"], ["deadline"], ["priority"], "-")
+    # batches are combined
+    agg.add(table, [0, 1])
+    agg.add(table, [2, 3])
+
+    assert agg.lines() == [
+        "status=-: count=1 min(deadline)=- max(deadline)=-",
+        "  priority=-: 1",
+        "status=done: count=1 min(deadline)=- max(deadline)=-",
+        "  priority=2: 1",
+        "status=wip: count=2 min(deadline)=2015-9-30 max(deadline)=2015-10-01",
+        "  priority=2: 1",
+        "  priority=10: 1",
+    ]
+
+
+def test_aggregator_count_only():
+    """Checks if --count without --group-by counts all files
+    """
+    agg = Aggregator(count=True)
+    agg.add(maketable([dict(), dict()]), [0, 1])
+    assert agg.lines() == ["count=2"]
+
+
+def test_analyze_group_by(testdir, tmpdir, capsys):
+    """Checks --group-by together with filters on the command line
+
+    :param py.path.local testdir: the test directory (fixture)
+    :param py.path.local tmpdir: a temporary directory (fixture)
+    """
+    files = list()
+    for i in range(1, 4):
+        base = "analyze_output-{}.xml".format(i)
+        (testdir / base).copy(tmpdir)
+        files.append(str(tmpdir / base))
+
+    clicmd = 'analyze -q --group-by abc,status --count --max priority -f "priority>1" {}'.format(
+        " ".join(files))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+    out, _ = capsys.readouterr()
+
+    assert out == "abc=A status=done: count=1 max(priority)=10\n" \
+                  "abc=A status=editing: count=1 max(priority)=4\n"
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.analyzer import QueryEngine, QueryFormat, parse_queryformat
+from docmanager.cli import parsecli
+from docmanager.xmlhandler import XmlHandler
+
+
+@pytest.fixture
+def analyzefiles(testdir, tmpdir):
+    """Copies the analyze_output-*.xml files into tmpdir
+
+    :return: the file names
+    :rtype: list
+    """
+    files = list()
+    for i in range(1, 4):
+        base = "analyze_output-{}.xml".format(i)
+        (testdir / base).copy(tmpdir)
+        files.append(str(tmpdir / base))
+    return files
+
+
+def test_parse_queryformat():
+    """Checks if the fields are returned in order and without escapes
+    """
+    assert parse_queryformat("{b} {a} {{c}} {b} {os.file}") == ["b", "a", "os.file"]
+
+
+@pytest.mark.parametrize("queryformat,expected", [
+    ("{a} - {b} {a}", "1 - {x} 1"),
+    ("{{a}} {os.file}", "{{a}} f.xml"),
+    ("\\{a} {b", "\\{a} {b"),
+    ("no placeholders", "no placeholders"),
+])
+def test_queryformat_render(queryformat, expected):
+    """Checks if a compiled query format keeps its literal text
+
+    :param str queryformat: the -qf string
+    :param str expected: the expected output
+    """
+    qf = QueryFormat(queryformat)
+    columns = [["f.xml"] * 2 if f == "os.file" else [{"a": "1", "b": "{x}"}[f]] * 2
+               for f in qf.fields]
+    if qf.fields:
+        assert qf.render_columns(columns) == [expected] * 2
+    else:
+        assert qf.template.format() == expected
+
+
+def test_query_engine(analyzefiles):
+    """Checks filters, sorting and formatting on a table
+
+    :param list analyzefiles: the analyze_output-*.xml files (fixture)
+    """
+    engine = QueryEngine("{os.file} {maintainer} {emptytest}",
+                         ["-status=done", "+abc=A"], "priority", "-")
+    table = engine.table()
+    for f in analyzefiles:
+        table.append(f, XmlHandler(f, readonly=True))
+
+    assert table.columns["emptytest"] == ["", None, None]
+    assert engine.run(table) == [
+        "{} mschnitzer -".format(analyzefiles[0]),
+        "{} fs -".format(analyzefiles[2]),
+    ]
+
+
+@pytest.mark.parametrize("batchsize", [1, 1024])
+def test_analyze_batches(batchsize, analyzefiles, monkeypatch, capsys):
+    """Checks if the output doesn't depend on the batch size
+
+    :param int batchsize: value for BATCHSIZE
+    :param list analyzefiles: the analyze_output-*.xml files (fixture)
+    """
+    monkeypatch.setattr("docmanager.action.BATCHSIZE", batchsize)
+
+    clicmd = 'analyze -q -qf "{{maintainer}}:{{priority}}" -f "abc=A" {}'.format(
+        " ".join(analyzefiles))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+    out, _ = capsys.readouterr()
+
+    assert out == "mschnitzer:1\ntoms:10\nfs:4\n"
+
+
+def test_analyze_sort_filtered(analyzefiles, capsys):
+    """Checks if files removed by a filter don't break sorting
+
+    :param list analyzefiles: the analyze_output-*.xml files (fixture)
+    """
+    clicmd = 'analyze -q -qf "{{maintainer}}" -f="-status=wip" -s priority {}'.format(
+        " ".join(analyzefiles))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+    out, _ = capsys.readouterr()
+
+    assert out == "fs\ntoms\n"
+
+
+def test_analyze_streaming(analyzefiles, monkeypatch, capsys):
+    """Checks if the first line of unsorted output is printed before the
+       next file is parsed
+
+    :param list analyzefiles: the analyze_output-*.xml files (fixture)
+    """
+    iter_handlers = Actions.iter_handlers
+    printed = list()
+
+    def spy(self, prefilter=None):
+        for item in iter_handlers(self, prefilter):
+            printed.append(capsys.readouterr()[0])
+            yield item
+
+    monkeypatch.setattr(Actions, "iter_handlers", spy)
+
+    clicmd = 'analyze -q -qf "{{maintainer}}" {}'.format(" ".join(analyzefiles))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+
+    # the first line doesn't wait for a full batch
+    assert printed[:2] == ["", "mschnitzer\n"]
+    assert "".join(printed) + capsys.readouterr()[0] == "mschnitzer\ntoms\nfs\n"
+
+
+def test_query_engine_streaming():
+    """Only output without sorting and aggregation is streamed"""
+    assert QueryEngine("{a}").streaming
+    assert not QueryEngine("{a}", sort="a").streaming
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.analyzer import FilterPredicate, QueryEngine, MISSING
+from docmanager.cli import parsecli
+from docmanager.exceptions import DMAnalyzeInvalidFilterSyntax
+
+
+@pytest.mark.parametrize("filter,value,expected", [
+    ("status=wip", "wip", True),
+    ("+status=wip", "done", False),
+    ("-status=wip", "done", True),
+    ("-status=wip", MISSING, False),
+    ("status=", "", True),
+    ("status=in(wip,editing)", "editing", True),
+    ("-status=in(wip,editing)", "editing", False),
+    ("priority<5", "10", False),
+    ("priority>=4", "4", True),
+    ("priority>5", "high", False),
+    ("deadline<2015-06-01", "2015-05-31", True),
+    ("deadline>2015-06-01", "2015-6-2", True),
+    ("deadline>2015-06-01", "someday", False),
+    ("maintainer<n", "mschnitzer", True),
+    ("maintainer~^ms", "mschnitzer", True),
+    ("-maintainer~^ms", "toms", True),
+    ("a=b<c", "b<c", True),
+])
+def test_filter_predicate(filter, value, expected):
+    """Checks the operators of -f
+
+    :param str filter: the filter
+    :param str value: the property value
+    :param bool expected: the expected result
+    """
+    assert FilterPredicate(filter)(value) is expected
+
+
+@pytest.mark.parametrize("filter", ["status", "status~(", ""])
+def test_filter_predicate_invalid(filter):
+    """Checks if invalid filters are rejected
+
+    :param str filter: the filter
+    """
+    with pytest.raises(DMAnalyzeInvalidFilterSyntax):
+        FilterPredicate(filter)
+
+
+def test_analyze_prefilter(testdir, tmpdir, capsys):
+    """Checks if cached files give the same result if they are filtered
+       before they are loaded
+
+    :param py.path.local testdir: the test directory (fixture)
+    :param py.path.local tmpdir: a temporary directory (fixture)
+    """
+    files = list()
+    for i in range(1, 4):
+        base = "analyze_output-{}.xml".format(i)
+        (testdir / base).copy(tmpdir)
+        files.append(str(tmpdir / base))
+
+    clicmd = 'analyze -qf "{{maintainer}}" -f "priority>=4" -f="-status~^ed" {}'.format(
+        " ".join(files))
+
+    for _ in range(2):
+        Actions(parsecli(shlex.split(clicmd))).parse()
+        out, _ = capsys.readouterr()
+        assert out.startswith("toms\n\n")
+        assert "Successfully analyzed" in out and "3" in out
+
+    # the second run found all files in the cache
+    engine = QueryEngine("{maintainer}", ["priority>=4", "-status~^ed"])
+    actions = Actions(parsecli(shlex.split(clicmd)))
+    entries = [entry for _, entry in actions.parse_files(files, engine.prefilter)]
+    assert ["filtered" in entry for entry in entries] == [True, False, True]
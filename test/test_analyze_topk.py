@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.analyzer import Descending, ResultSorter, parse_sort, sort_key
+from docmanager.cli import parsecli
+
+
+def test_sort_key():
+    """Checks if numbers come before dates and text is in natural order
+    """
+    values = ["b", "a10", "2015-06-01", "10", "a2", "2", "2014-12-31", "-1.5"]
+    assert sorted(values, key=sort_key) == \
+        ["-1.5", "2", "10", "2014-12-31", "2015-06-01", "a2", "a10", "b"]
+
+
+def test_parse_sort():
+    """Checks multiple sort keys
+    """
+    assert parse_sort("priority,-deadline") == [("priority", False), ("deadline", True)]
+    assert parse_sort("~deadline,priority") == [("deadline", True), ("priority", False)]
+    assert parse_sort(None) == []
+
+
+@pytest.mark.parametrize("limit,buffersize", [
+    (None, None),
+    (None, 3),
+    (5, None),
+    (0, None),
+])
+def test_result_sorter(limit, buffersize):
+    """Checks if spilled runs and top-K give the same order as sorted()
+
+    :param int limit: the maximum number of lines
+    :param int buffersize: lines in memory
+    """
+    items = [((i % 4, Descending(i % 3)), "line-{}".format(i)) for i in range(20)]
+    expected = [line for _, line in sorted(items, key=lambda item: item[0])]
+
+    sorter = ResultSorter(limit, buffersize)
+    for start in range(0, len(items), 6):
+        sorter.add(items[start:start+6])
+    if buffersize:
+        assert sorter._runs
+
+    assert list(sorter) == expected[:limit]
+
+
+def test_analyze_sort_limit(testdir, tmpdir, capsys):
+    """Checks --limit and several sort keys on the command line
+
+    :param py.path.local testdir: the test directory (fixture)
+    :param py.path.local tmpdir: a temporary directory (fixture)
+    """
+    files = list()
+    for i in range(1, 4):
+        base = "analyze_output-{}.xml".format(i)
+        (testdir / base).copy(tmpdir)
+        files.append(str(tmpdir / base))
+
+    clicmd = 'analyze -q -qf "{{maintainer}}" -s abc,-priority {}'
+    Actions(parsecli(shlex.split(clicmd.format(" ".join(files))))).parse()
+    out, _ = capsys.readouterr()
+    assert out == "toms\nfs\nmschnitzer\n"
+
+    clicmd = 'analyze -q -qf "{{maintainer}}" -s abc,-priority --limit 2 {}'
+    Actions(parsecli(shlex.split(clicmd.format(" ".join(files))))).parse()
+    out, _ = capsys.readouterr()
+    assert out == "toms\nfs\n"
+
+    clicmd = 'analyze -q -qf "{{maintainer}}" --limit 1 {}'
+    Actions(parsecli(shlex.split(clicmd.format(" ".join(files))))).parse()
+    out, _ = capsys.readouterr()
+    assert out == "mschnitzer\n"
+
+
+@pytest.mark.parametrize("sortopt", ["-s ~priority", "--sort=-priority", "-s=-priority"])
+def test_analyze_sort_descending_first(testdir, tmpdir, capsys, sortopt):
+    """Checks a descending first sort key on the command line
+
+    :param py.path.local testdir: the test directory (fixture)
+    :param py.path.local tmpdir: a temporary directory (fixture)
+    :param str sortopt: the sort option
+    """
+    files = list()
+    for i in range(1, 4):
+        base = "analyze_sort-{}.xml".format(i)
+        (testdir / base).copy(tmpdir)
+        files.append(str(tmpdir / base))
+
+    clicmd = 'analyze -q -qf "{{priority}}" {} {}'.format(sortopt, " ".join(files))
+    args = parsecli(shlex.split(clicmd))
+    assert parse_sort(args.sort) == [("priority", True)]
+
+    Actions(args).parse()
+    out, _ = capsys.readouterr()
+    assert out == "10\n2\n1\n"
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import shlex
+import stat
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.fileutil import FileUtil
+from docmanager.xmlhandler import XmlHandler
+
+
+def test_write_atomic(tmpdir):
+    """Checks if write_atomic keeps the mode and replaces symlink targets
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    target = tmpdir.join("target.xml")
+    target.write("old")
+    target.chmod(0o640)
+    link = tmpdir.join("link.xml")
+    link.mksymlinkto(target)
+
+    FileUtil(link.strpath).write_atomic("new", fsync=True)
+
+    assert link.islink()
+    assert target.read() == "new"
+    assert stat.S_IMODE(os.stat(target.strpath).st_mode) == 0o640
+    assert sorted(os.listdir(tmpdir.strpath)) == ["link.xml", "target.xml"]
+
+
+def test_write_atomic_error(tmpdir):
+    """Checks if the original file is kept if writing fails
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    target = tmpdir.join("target.xml")
+    target.write("old")
+
+    with pytest.raises(TypeError):
+        FileUtil(target.strpath).write_atomic(b"new")
+
+    assert target.read() == "old"
+    assert os.listdir(tmpdir.strpath) == ["target.xml"]
+
+
+@pytest.mark.parametrize("fsync", ["none", "file", "batch"])
+def test_write_queue(fsync, tmp_valid_xml, tmpdir):
+    """Checks if all files are written with every --fsync policy
+
+    :param str fsync: value for --fsync
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    files = []
+    for i in range(5):
+        files.append(tmpdir.join("file-{}.xml".format(i)))
+        tmp_valid_xml.copy(files[-1])
+
+    clicmd = "-j 2 --fsync {} set -p maintainer=toms {}".format(
+        fsync, " ".join(f.strpath for f in files))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+
+    for f in files:
+        assert XmlHandler(f.strpath).get(["maintainer"]) == {"maintainer": "toms"}
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc/self/fd")
+def test_write_queue_batch_fsync(tmp_valid_xml, tmpdir, monkeypatch):
+    """Checks if --fsync=batch flushes every file before it replaces the
+       original file and every directory once, without os.sync()
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    files = []
+    for i in range(3):
+        files.append(tmpdir.join("file-{}.xml".format(i)))
+        tmp_valid_xml.copy(files[-1])
+
+    synced = []
+    fsync = os.fsync
+
+    def spy(fd):
+        synced.append(os.readlink("/proc/self/fd/{}".format(fd)))
+        fsync(fd)
+
+    def nosync():
+        raise AssertionError("os.sync() flushes every file system")
+
+    monkeypatch.setattr(os, "fsync", spy)
+    monkeypatch.setattr(os, "sync", nosync, raising=False)
+
+    clicmd = "--fsync batch set -p maintainer=toms {}".format(
+        " ".join(f.strpath for f in files))
+    Actions(parsecli(shlex.split(clicmd))).parse()
+
+    temporary = [ s for s in synced if s.endswith(".tmp") ]
+    assert len(temporary) == len(files)
+    assert synced[len(files):] == [os.path.realpath(tmpdir.strpath)]
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+import json
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.batch import read_operations
+from docmanager.cli import parsecli
+from docmanager.core import ReturnCodes
+from docmanager.exceptions import DMBatchSyntaxError
+from docmanager.xmlhandler import XmlHandler
+
+
+def write_batch(tmpdir, operations):
+    """Writes operations into a batch file and returns its name"""
+    batchfile = tmpdir.join("ops.jsonl")
+    batchfile.write("\n".join(json.dumps(op) for op in operations) + "\n")
+    return batchfile.strpath
+
+
+def test_batch_group_by_file(tmp_valid_xml, tmpdir):
+    """Checks if operations are grouped by file and keep their order"""
+    xmlfile = tmp_valid_xml.strpath
+    other = tmpdir.join("other.xml").strpath
+
+    with open(write_batch(tmpdir, [
+        {"op": "set", "file": xmlfile, "properties": {"maintainer": "toms"}},
+        {"op": "set", "file": other, "properties": {"status": "wip"}},
+        {"op": "del", "file": xmlfile, "properties": ["maintainer"]},
+        ])) as stream:
+        operations = read_operations(stream)
+
+    assert list(operations) == [xmlfile, other]
+    assert [op[0] for op in operations[xmlfile]] == ["set", "del"]
+
+
+@pytest.mark.parametrize("line", [
+    '{"op": "set", "file": "a.xml"}',
+    '{"op": "set", "file": "a.xml", "properties": {"a": 1}}',
+    '{"op": "del", "file": "a.xml", "properties": "a"}',
+    '{"op": "set-attr", "file": "a.xml", "attributes": {"a": "b"}}',
+    '{"op": "move", "file": "a.xml"}',
+    '["set"]',
+    'set -p a=b a.xml',
+])
+def test_batch_invalid_line(line, tmpdir):
+    """Checks if invalid lines are rejected with their line number"""
+    batchfile = tmpdir.join("ops.jsonl")
+    batchfile.write('\n' + line + '\n')
+
+    with pytest.raises(DMBatchSyntaxError) as err:
+        with open(batchfile.strpath) as stream:
+            read_operations(stream)
+    assert err.value.line == 2
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_batch(tmp_valid_xml, tmpdir, executor, capsys):
+    """Checks if all operations of a batch file are applied"""
+    files = [tmp_valid_xml.strpath, tmpdir.join("copy.xml").strpath]
+    tmp_valid_xml.copy(tmpdir.join("copy.xml"))
+
+    operations = []
+    for f in files:
+        operations.extend([
+            {"op": "set", "file": f, "properties": {"maintainer": "toms", "priority": "2",
+                                                  "languages": "en,de,en"}},
+            {"op": "set-attr", "file": f, "property": "maintainer", "attributes": {"a": "1", "b": "2"}},
+            {"op": "del-attr", "file": f, "property": "maintainer", "attributes": ["b"]},
+            {"op": "del", "file": f, "properties": ["priority=1"]},
+            {"op": "del", "file": f, "properties": ["priority=2"]},
+        ])
+    batchfile = write_batch(tmpdir, operations)
+
+    a = Actions(parsecli(shlex.split("--executor {} batch {}".format(executor, batchfile))))
+    a.parse()
+
+    out, _ = capsys.readouterr()
+    assert "Couldn't delete property priority=1" in out
+
+    for f in files:
+        handler = XmlHandler(f)
+        assert handler.get(["maintainer", "priority", "languages"]) == \
+               {"maintainer": "toms", "priority": None, "languages": "en,de"}
+        assert handler.get_attr(["maintainer"], None) == {"maintainer": {"a": "1"}}
+
+
+def test_batch_syntax_error(tmp_valid_xml, tmpdir):
+    """Checks if no file is touched if a line is invalid"""
+    batchfile = tmpdir.join("ops.jsonl")
+    batchfile.write(json.dumps({"op": "set", "file": tmp_valid_xml.strpath,
+                                "properties": {"maintainer": "toms"}}) + "\n{\n")
+
+    with pytest.raises(SystemExit) as err:
+        Actions(parsecli(["batch", batchfile.strpath])).parse()
+
+    assert err.value.code == ReturnCodes.E_INVALID_BATCH_FILE
+    assert XmlHandler(tmp_valid_xml.strpath).get(["maintainer"]) == {"maintainer": None}
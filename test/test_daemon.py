@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import shutil
+import stat
+import tempfile
+import threading
+from docmanager.core import ReturnCodes
+from docmanager.daemon import Daemon, forward, request, use_daemon
+
+
+@pytest.fixture
+def daemon():
+    """Runs a Daemon in a thread; the socket is in a short temporary
+       directory because of the length limit of socket paths
+
+    :return: the running daemon
+    :rtype: Daemon
+    """
+    tmp = tempfile.mkdtemp()
+    server = Daemon(2, os.path.join(tmp, "docmanager", "daemon.sock"))
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+
+    for _ in range(100):
+        if os.path.exists(server.path):
+            break
+        thread.join(0.05)
+
+    yield server
+
+    try:
+        request({"command": "stop"}, server.path)
+    except OSError:
+        # the test has stopped the daemon already
+        pass
+    thread.join()
+    shutil.rmtree(tmp)
+
+
+def test_daemon_forward(daemon, testdir, tmpdir, capsys):
+    """Checks if commands run in the daemon and parsed files are reused
+
+    :param Daemon daemon: the running daemon (fixture)
+    """
+    base = "analyze_output-1.xml"
+    (testdir / base).copy(tmpdir)
+
+    assert stat.S_IMODE(os.stat(daemon.path).st_mode) == 0o600
+
+    with tmpdir.as_cwd():
+        for _ in range(2):
+            assert forward(["get", "-p", "maintainer", base], daemon.path) == 0
+            out, _ = capsys.readouterr()
+            assert out == "mschnitzer\n"
+
+        # the daemon runs the command in the working directory of the client
+        assert forward(["get", "-p", "maintainer", "missing.xml"], daemon.path) == \
+            ReturnCodes.E_FILE_NOT_FOUND
+
+    assert daemon.handlers.hits == 1
+    assert daemon.requests == 3
+
+    request({"command": "stop"}, daemon.path)
+
+
+def test_daemon_not_running(tmpdir):
+    """Checks if commands run locally without a daemon
+    """
+    assert forward(["get", "-p", "maintainer", "x.xml"], str(tmpdir / "none.sock")) is None
+    assert not use_daemon(["--no-daemon", "get", "-p", "x", "x.xml"])
+    # only options count, not files or values with the same name
+    assert use_daemon(["get", "-p", "x", "--", "--no-daemon"])
+    assert use_daemon(["get", "-p", "daemon", "watch", "-"])
+
+
+def test_daemon_runs_locally(daemon, testdir, tmpdir, capsys):
+    """Checks if the daemon only refuses commands because of the parsed
+       subcommand or stdin, not because of file names
+
+    :param Daemon daemon: the running daemon (fixture)
+    """
+    (testdir / "analyze_output-1.xml").copy(tmpdir / "watch")
+
+    with tmpdir.as_cwd():
+        assert forward(["get", "-p", "maintainer", "watch"], daemon.path) == 0
+        out, _ = capsys.readouterr()
+        assert out == "mschnitzer\n"
+
+        assert forward(["watch", "."], daemon.path) is None
+        assert forward(["batch", "-"], daemon.path) is None
+        assert forward(["daemon", "status"], daemon.path) is None
+
+    assert daemon.requests == 4
+
+
+def test_daemon_environment(daemon, testdir, tmpdir, monkeypatch):
+    """Checks if commands of clients with another environment (e.g. {USER}
+       in aliases or XDG_CONFIG_HOME) run locally
+
+    :param Daemon daemon: the running daemon (fixture)
+    """
+    (testdir / "analyze_output-1.xml").copy(tmpdir)
+    monkeypatch.setenv("USER", "someone-else")
+
+    with tmpdir.as_cwd():
+        assert forward(["get", "-p", "maintainer", "analyze_output-1.xml"], daemon.path) is None
+
+    assert daemon.requests == 0
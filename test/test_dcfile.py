@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.core import ReturnCodes
+from docmanager.dcfile import IncludeResolver, dc_mainfile, expand_dcfiles, \
+     is_dcfile, read_dcfile
+from docmanager.exceptions import DMDCFileError
+
+CHAPTER = """<?xml version="1.0"?>
+<!DOCTYPE chapter [
+  <!ENTITY % entities SYSTEM "entity-decl.ent">
+  %entities;
+]>
+<chapter xmlns="http://docbook.org/ns/docbook" xmlns:xi="http://www.w3.org/2001/XInclude"
+         version="5.0">
+  <title>&product; {name}</title>
+  {includes}
+</chapter>
+"""
+
+
+def include(*hrefs):
+    return "".join('<xi:include href="{}"/>'.format(h) for h in hrefs)
+
+
+@pytest.fixture
+def books(tmpdir):
+    """Fixture: Two books in a DAPS directory which share chapters;
+       shared.xml includes a file which includes shared.xml again
+    """
+    xml = tmpdir.mkdir("xml")
+    files = {
+        "book1.xml": include("a.xml", "common/shared.xml", "missing.xml") +
+                     '<xi:include href="code.txt" parse="text"/>',
+        "book2.xml": include("common/shared.xml", "b.xml"),
+        "a.xml": "",
+        "b.xml": include("a.xml"),
+        "common/shared.xml": include("loop.xml"),
+        "common/loop.xml": include("shared.xml"),
+    }
+    for name, includes in files.items():
+        xml.join(name).write_text(CHAPTER.format(name=name, includes=includes),
+                                  encoding="utf-8", ensure=True)
+    xml.join("code.txt").write_text("<not xml", encoding="utf-8")
+
+    tmpdir.join("DC-book1").write_text('# first book\nMAIN="book1.xml"\nROOTID=book1 # id\n',
+                                       encoding="utf-8")
+    tmpdir.join("DC-book2").write_text("export MAIN='book2.xml'\n", encoding="utf-8")
+    return tmpdir
+
+
+def relative(root, files):
+    return [ os.path.relpath(f, root.join("xml").strpath) for f in files ]
+
+
+def test_read_dcfile(books):
+    """DC files are read like shell variables
+    """
+    assert is_dcfile(books.join("DC-book1").strpath)
+    assert not is_dcfile(books.join("xml", "a.xml").strpath)
+    assert read_dcfile(books.join("DC-book1").strpath) == {"MAIN": "book1.xml", "ROOTID": "book1"}
+    assert dc_mainfile(books.join("DC-book2").strpath) == books.join("xml", "book2.xml").strpath
+
+    books.join("DC-broken").write_text("ROOTID=x\n", encoding="utf-8")
+    with pytest.raises(DMDCFileError):
+        dc_mainfile(books.join("DC-broken").strpath)
+
+    books.join("DC-broken").write_text("MAIN=nothere.xml\n", encoding="utf-8")
+    with pytest.raises(DMDCFileError):
+        dc_mainfile(books.join("DC-broken").strpath)
+
+
+def test_include_resolver(books):
+    """Each file is read once, in document order, even with loops
+    """
+    resolver = IncludeResolver()
+
+    book1 = resolver.resolve(books.join("xml", "book1.xml").strpath)
+    assert relative(books, book1) == ["book1.xml", "a.xml", "common/shared.xml",
+                                      "common/loop.xml"]
+    assert resolver.parsed == 4
+
+    book2 = resolver.resolve(books.join("xml", "book2.xml").strpath)
+    assert relative(books, book2) == ["book2.xml", "common/shared.xml", "common/loop.xml",
+                                      "b.xml", "a.xml"]
+    assert resolver.parsed == 6
+
+
+def test_expand_dcfiles(books):
+    """DC files are replaced by their books, files are only kept once
+    """
+    files = expand_dcfiles([books.join("xml", "b.xml").strpath, books.join("DC-book1").strpath,
+                            books.join("DC-book2").strpath])
+    assert relative(books, files) == ["b.xml", "book1.xml", "a.xml", "common/shared.xml",
+                                      "common/loop.xml", "book2.xml"]
+
+
+def test_dcfile_cli(books):
+    """The subcommands run on the files of the books
+    """
+    cmd = "set -p maintainer=toms {}".format(books.join("DC-book2").strpath)
+    Actions(parsecli(shlex.split(cmd))).parse()
+
+    cmd = "get -p maintainer {} {}".format(books.join("DC-book1").strpath,
+                                           books.join("DC-book2").strpath)
+    result = Actions(parsecli(shlex.split(cmd))).parse()
+    maintainers = { os.path.basename(f): props["maintainer"] for f, props in result["data"] }
+    assert maintainers == {"book1.xml": None, "a.xml": "toms", "shared.xml": "toms",
+                           "loop.xml": "toms", "book2.xml": "toms", "b.xml": "toms"}
+
+    books.join("DC-broken").write_text("ROOTID=x\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as err:
+        parsecli(shlex.split("get {}".format(books.join("DC-broken").strpath)))
+    assert err.value.code == ReturnCodes.E_INVALID_DC_FILE
@@ -60,4 +60,52 @@ def test_docmanager_allconfigfiles(tmp_valid_xml):
     assert args
     assert args.config
     assert args.config.configfiles
-    assert args.config.usedconfigfile
\ No newline at end of file
+    assert args.config.usedconfigfile
+
+def test_docmanager_config_cache(tmpdir, cachedir, monkeypatch):
+    """The merged configuration is cached until a config file changes
+    """
+    first = tmpdir / "first.conf"
+    second = tmpdir / "second.conf"
+    first.write_text("[DEFAULT]\nx=1\n[general]\na=1\nb=%(x)s\n", encoding="utf-8")
+    second.write_text("[general]\na=2\n", encoding="utf-8")
+    files = [first.strpath, second.strpath, (tmpdir / "missing.conf").strpath]
+
+    reads = []
+    read = configparser.ConfigParser.read
+    def countedread(self, filenames, *args, **kwargs):
+        reads.append(filenames)
+        return read(self, filenames, *args, **kwargs)
+    monkeypatch.setattr(configparser.ConfigParser, "read", countedread)
+
+    config = docmanagerconfig(files)
+    assert (cachedir / "config.json").exists()
+
+    # the second call doesn't read any config file
+    cached = docmanagerconfig(files)
+    assert len(reads) == 1
+    assert cached.sections() == config.sections() == ['general']
+    assert dict(cached["general"]) == dict(config["general"]) == {'a': '2', 'b': '1', 'x': '1'}
+    assert cached.usedconfigfile == config.usedconfigfile == files[:2]
+
+    # a changed file is read again
+    second.write_text("[general]\na=3\n", encoding="utf-8")
+    assert docmanagerconfig(files)["general"]["a"] == "3"
+    assert len(reads) == 2
+
+    # a file which didn't exist before is read as well
+    (tmpdir / "missing.conf").write_text("[general]\na=4\n", encoding="utf-8")
+    assert docmanagerconfig(files)["general"]["a"] == "4"
+    assert len(reads) == 3
+
+
+def test_docmanager_config_brokencache(tmpdir, cachedir):
+    """A broken config cache is ignored and replaced
+    """
+    configfile = tmpdir / "config"
+    configfile.write_text("[general]\na=1\n", encoding="utf-8")
+    (cachedir / "config.json").write_text("[]", encoding="utf-8")
+
+    assert docmanagerconfig([configfile.strpath])["general"]["a"] == "1"
+    assert docmanagerconfig([configfile.strpath])["general"]["a"] == "1"
+    assert (cachedir / "config.json").read_text("utf-8").startswith('{"version"')
@@ -47,3 +47,21 @@ def test_docmanager_configcmd_1(tmpdir):
         code = e.code
 
     assert code == ReturnCodes.E_INVALID_CONFIG_PROPERTY_SYNTAX
+
+def test_docmanager_configcmd_dump_effective(tmpdir, capsys):
+    """Print the merged configuration with 'config --dump-effective'
+    """
+    configfile = tmpdir / "config"
+    configfile.write_text("[test1]\ntest2 = test3\n", encoding="utf-8")
+
+    code = -1
+    try:
+        cmd = "--config {} config --dump-effective".format(configfile.strpath)
+        a = Actions(parsecli(shlex.split(cmd)))
+        a.parse()
+    except SystemExit as e:
+        code = e.code
+
+    out, err = capsys.readouterr()
+    assert code == ReturnCodes.E_OK
+    assert out == "# {}\n\n[test1]\ntest2 = test3\n\n".format(configfile.strpath)
@@ -19,6 +19,9 @@ END="]]]"
   ("a &w_e.lt; b",      "a {s}w_e.lt{e} b"),
   ("a &XaX0; b",        "a {s}XaX0{e} b"),
   ("a &ab1; b &cde; c", "a {s}ab1{e} b {s}cde{e} c"),
+  ("&a;&b;",            "{s}a{e}{s}b{e}"),
+  ("a & b; c",          "a & b; c"),
+  ("no entities",       "no entities"),
 ])
 def test_preserve_entities(text, expected):
     """Checks preserving of entities in text"""
@@ -34,6 +37,8 @@ def test_preserve_entities(text, expected):
   ("a {s}w_e.lt{e} b",          "a &w_e.lt; b"),
   ("a {s}XaX0{e} b",            "a &XaX0; b", ),
   ("a {s}ab1{e} b {s}cde{e} c", "a &ab1; b &cde; c",),
+  ("{s}a{e}{s}#169{e}",         "&a;&#169;"),
+  ("a [[[ b ]]] c",             "a [[[ b ]]] c"),
 ])
 def test_restore_entities(text, expected):
     """Checks restoring entities in text"""
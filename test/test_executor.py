@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.xmlhandler import XmlHandler
+
+
+@pytest.mark.parametrize("executor", ["process", "thread", "serial"])
+def test_executor_get(executor, testdir, tmpdir):
+    """Checks if all executors return the same properties in the same order
+
+    :param str executor: value for --executor
+    :param py.path.local testdir: Path to test directory (fixture)
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    xmlset = ["test-dm-status-1.xml", "test-dm-status-2.xml",
+              "broken_xml_file.xml", "valid_xml_file.xml"]
+    for base in xmlset:
+        (testdir / base).copy(tmpdir)
+    xmlfiles = [ str(tmpdir / base) for base in xmlset ]
+
+    clicmd = "--no-cache --executor={} -j 2 get -p status,abc {}".format(
+        executor, " ".join(xmlfiles))
+    result = Actions(parsecli(shlex.split(clicmd))).parse()
+
+    assert [ i[0] for i in result['data'] ] == xmlfiles[:2] + xmlfiles[3:]
+    assert result['data'][0][1] == {"status": "a", "abc": "A"}
+    assert result['data'][1][1] == {"status": "b", "abc": "B"}
+    assert [ i[0] for i in result['errors'] ] == xmlfiles[2:3]
+
+
+def test_executor_process_modifies(tmp_valid_xml):
+    """Checks if a modifying action works with --executor=process
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    """
+    clicmd = "--executor=process set -p maintainer=toms {0} {0}".format(
+        tmp_valid_xml.strpath)
+    Actions(parsecli(shlex.split(clicmd))).parse()
+
+    assert XmlHandler(tmp_valid_xml.strpath).get(["maintainer"]) == {"maintainer": "toms"}
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import shlex
+from docmanager.cli import parsecli
+from docmanager.filewalk import matches, walk_files
+from docmanager.xmlutil import sniff_docbook
+
+DOCBOOK = '<?xml version="1.0"?>\n<article xmlns="http://docbook.org/ns/docbook" version="5.0"/>\n'
+
+
+@pytest.fixture
+def tree(tmpdir, testdir):
+    """Fixture: A directory tree with DocBook files and other files
+    """
+    for name in ("a.xml", "sub/b.xml", "sub/deep/c.xml", "sub/deep/d.ent.xml",
+                 "other/e.xml", ".git/f.xml", "zzz/g.xml"):
+        tmpdir.join(name).write_text(DOCBOOK, encoding="utf-8", ensure=True)
+
+    tmpdir.join("notes.txt").write_text(DOCBOOK, encoding="utf-8")
+    tmpdir.join("sub/html.xml").write_text("<html><body/></html>", encoding="utf-8")
+    tmpdir.join("sub/text.xml").write_text("No XML here", encoding="utf-8")
+    tmpdir.join("sub/binary.xml").write_binary(b"<\0\1\2")
+    tmpdir.join("other/broken.xml").write_text(DOCBOOK.replace("/>", "><para>"),
+                                               encoding="utf-8")
+    return tmpdir
+
+
+def relative(root, files):
+    return [ os.path.relpath(f, root.strpath) for f in files ]
+
+
+def test_walk_files(tree):
+    """Hidden directories and files which are no DocBook files are skipped,
+       the files are sorted depth-first
+    """
+    expected = ["a.xml", "other/broken.xml", "other/e.xml", "sub/b.xml",
+                "sub/deep/c.xml", "sub/deep/d.ent.xml", "zzz/g.xml"]
+
+    assert relative(tree, walk_files(tree.strpath)) == expected
+    assert relative(tree, walk_files(tree.strpath, jobs=4)) == expected
+    assert len(walk_files(tree.strpath, sniff=False)) == len(expected) + 3
+
+
+def test_walk_files_patterns(tree):
+    """--include and --exclude patterns with a slash match the whole path
+    """
+    assert relative(tree, walk_files(tree.strpath, exclude=["sub", "*.ent.xml"])) == \
+        ["a.xml", "other/broken.xml", "other/e.xml", "zzz/g.xml"]
+    assert relative(tree, walk_files(tree.strpath, include=["sub/deep/*"], jobs=2)) == \
+        ["sub/deep/c.xml", "sub/deep/d.ent.xml"]
+    assert relative(tree, walk_files(tree.strpath, include=["*.txt"])) == ["notes.txt"]
+
+    assert matches("sub/deep/c.xml", ["c.*"])
+    assert not matches("sub/deep/c.xml", ["deep/*"])
+
+
+def test_sniff_docbook(tmpdir, testdir):
+    """Only the first bytes decide
+    """
+    assert sniff_docbook((testdir / "valid_xml_file.xml").strpath)
+    # a start tag which isn't complete and has no namespace
+    assert not sniff_docbook((testdir / "broken_xml_file.xml").strpath)
+
+    broken = tmpdir.join("broken.xml")
+    broken.write_text('<article xmlns="http://docbook.org/ns/docbook" <para/>', encoding="utf-8")
+    assert sniff_docbook(broken.strpath)
+
+    doctype = tmpdir.join("doctype.xml")
+    doctype.write_text('<!DOCTYPE article [\n{}]>\n<article/>'.format(
+        '<!ENTITY x "y">\n' * 1000), encoding="utf-8")
+    assert sniff_docbook(doctype.strpath)
+    assert not sniff_docbook(doctype.strpath, size=100000)
+
+
+def test_recursive_cli(tree):
+    """--recursive replaces directories with the files inside
+    """
+    cmd = "--recursive --exclude deep --exclude other get -p x {} {}".format(
+        tree.strpath, tree.join("sub", "deep", "c.xml").strpath)
+    args = parsecli(shlex.split(cmd))
+    assert relative(tree, args.files) == ["a.xml", "sub/b.xml", "zzz/g.xml", "sub/deep/c.xml"]
+
+    args = parsecli(shlex.split("get -p x {}".format(tree.strpath)))
+    assert args.files == []
+
+
+def test_recursive_no_short_option():
+    """-r stays the short option of 'config --repo' and 'alias --repo'
+    """
+    args = parsecli(shlex.split("config -r maintainer"))
+    assert args.repo and not args.recursive
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+
+import logging
+import os
+import pytest
+import shlex
+import shutil
+import subprocess
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.core import ReturnCodes
+from docmanager.exceptions import DMGitError
+from docmanager.gitutil import changed_files, select_changed
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(repo, *args):
+    """Runs git in the repository"""
+    subprocess.run(["git", "-C", repo.strpath, "-c", "user.name=docmanager",
+                    "-c", "user.email=docmanager@example.com"] + list(args),
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def repo(tmpdir, testdir, monkeypatch):
+    """Fixture: A git repository with the committed files a.xml, b.xml,
+       and c.xml; the working directory is the repository
+    """
+    repo = tmpdir.mkdir("repo")
+    for name in ("a.xml", "b.xml", "c.xml"):
+        (testdir / "valid_xml_file.xml").copy(repo / name)
+
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "init")
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def test_changed_files(repo):
+    """Modified and new files differ from HEAD, staged files from the index
+    """
+    (repo / "a.xml").write_text("<changed/>", encoding="utf-8")
+    (repo / "new.xml").write_text("<new/>", encoding="utf-8")
+    root = os.path.realpath(repo.strpath)
+
+    assert changed_files("HEAD") == {os.path.join(root, "a.xml"), os.path.join(root, "new.xml")}
+    assert changed_files(staged=True) == set()
+
+    git(repo, "add", "a.xml")
+    assert changed_files(staged=True) == {os.path.join(root, "a.xml")}
+    assert select_changed(["c.xml", "a.xml", "./a.xml"], changed_files(staged=True)) == \
+        ["a.xml", "./a.xml"]
+
+
+def test_changed_files_errors(repo, monkeypatch):
+    """Unknown revisions and directories outside of a repository fail
+    """
+    with pytest.raises(DMGitError):
+        changed_files("no-such-ref")
+
+    with pytest.raises(DMGitError):
+        changed_files("--output=x")
+
+    monkeypatch.setattr("docmanager.gitutil.get_git_repo_root", lambda: None)
+    with pytest.raises(DMGitError):
+        changed_files("HEAD")
+
+
+def test_changed_since_get(repo, caplog):
+    """'get' parses only the changed files and takes the unchanged ones from
+       the metadata cache if they are cached; the others are logged
+    """
+    Actions(parsecli(shlex.split("set -p maintainer=toms a.xml b.xml c.xml"))).parse()
+    # b.xml gets into the metadata cache
+    Actions(parsecli(shlex.split("get -p maintainer b.xml"))).parse()
+    git(repo, "commit", "-q", "-a", "-m", "maintainer")
+
+    Actions(parsecli(shlex.split("set -p maintainer=tux a.xml"))).parse()
+
+    with caplog.at_level(logging.INFO):
+        result = Actions(parsecli(shlex.split(
+            "--changed-since HEAD get -p maintainer a.xml b.xml c.xml"))).parse()
+    assert result["data"] == [("a.xml", {"maintainer": "tux"}), ("b.xml", {"maintainer": "toms"})]
+    assert "1 unchanged files were skipped because they are not cached." in caplog.text
+
+    result = Actions(parsecli(shlex.split(
+        "--no-cache --changed-since HEAD get -p maintainer a.xml b.xml c.xml"))).parse()
+    assert result["data"] == [("a.xml", {"maintainer": "tux"})]
+
+
+def test_staged_set(repo):
+    """'set' only modifies the staged files
+    """
+    Actions(parsecli(shlex.split("set -p maintainer=toms b.xml"))).parse()
+    git(repo, "add", "b.xml")
+
+    Actions(parsecli(shlex.split("--staged set -p status=edited a.xml b.xml"))).parse()
+
+    assert "edited" not in (repo / "a.xml").read_text("utf-8")
+    assert "edited" in (repo / "b.xml").read_text("utf-8")
+
+
+def test_changed_since_errors(repo):
+    """Git errors and subcommands without files exit with an error code
+    """
+    with pytest.raises(SystemExit) as err:
+        parsecli(shlex.split("--changed-since no-such-ref get a.xml"))
+    assert err.value.code == ReturnCodes.E_GIT_FAILED
+
+    with pytest.raises(SystemExit) as err:
+        parsecli(shlex.split("--staged daemon status"))
+    assert err.value.code == ReturnCodes.E_INVALID_ARGUMENTS
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+import docmanager
+import logging
+import os
+import subprocess
+import sys
+from docmanager.logmanager import logmgr_flog, setloglevel
+from docmanager.xmlutil import localname
+
+
+def test_logmgr_flog(caplog):
+    """Checks if logmgr_flog logs the caller only with -vv
+
+    :param caplog: pytest fixture for capturing log records
+    """
+    setloglevel(0)
+    logmgr_flog()
+    assert not caplog.records
+
+    setloglevel(2)
+    try:
+        with caplog.at_level(logging.DEBUG):
+            logmgr_flog()
+    finally:
+        setloglevel(0)
+
+    assert 'Called function "test_logmgr_flog"' in caplog.records[-1].getMessage()
+
+
+def test_tracer(caplog):
+    """Checks if -vvv logs calls of all DocManager functions
+
+    :param caplog: pytest fixture for capturing log records
+    """
+    profiler = sys.getprofile()
+
+    setloglevel(3)
+    try:
+        with caplog.at_level(logging.DEBUG):
+            localname("{urn:x-suse:ns:docmanager}status")
+    finally:
+        setloglevel(0)
+
+    assert sys.getprofile() is profiler
+    assert any('Called function "localname"' in r.getMessage() for r in caplog.records)
+
+
+def test_logmgr_flog_default():
+    """Checks if logmgr_flog is off until setloglevel turns it on"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(docmanager.__file__)))
+    proc = subprocess.run([sys.executable, "-c",
+                           "from docmanager import logmanager; print(logmanager._flog)"],
+                          env=env, stdout=subprocess.PIPE, universal_newlines=True,
+                          check=True)
+    assert proc.stdout.strip() == "False"
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+import os
+import shlex
+from docmanager.action import Actions
+from docmanager.cache import MetadataCache, CACHE_NAME
+from docmanager.cli import parsecli
+from docmanager.xmlhandler import XmlHandler
+
+
+def test_metadata_cache_roundtrip(tmp_valid_xml, tmpdir):
+    """Checks if a snapshot can be stored and looked up again
+    """
+    xml = XmlHandler(tmp_valid_xml.strpath)
+    xml.set({"maintainer": "toms"})
+    xml.set({"bugtracker/url": "https://bugzilla.suse.com"})
+    xml.set_attr("maintainer", {"since": "2015"})
+    xml.write()
+
+    cache = MetadataCache(tmpdir.join("cache.sqlite").strpath)
+    assert cache.lookup(tmp_valid_xml.strpath) is None
+
+    xml = XmlHandler(tmp_valid_xml.strpath, readonly=True)
+    cache.store(tmp_valid_xml.strpath, xml.snapshot())
+    cache.close()
+
+    cache = MetadataCache(tmpdir.join("cache.sqlite").strpath)
+    snapshot = cache.lookup(tmp_valid_xml.strpath)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    cached = XmlHandler(tmp_valid_xml.strpath, snapshot=snapshot)
+    assert cached.get_all() == xml.get_all()
+    assert cached.get_attr(None, None) == xml.get_attr(None, None)
+    assert cached.get(["bugtracker/url"]) == {"bugtracker/url": "https://bugzilla.suse.com"}
+
+
+def test_metadata_cache_invalidation(tmp_valid_xml, tmpdir):
+    """Checks if a modified file is not served from the cache
+    """
+    cache = MetadataCache(tmpdir.join("cache.sqlite").strpath)
+    cache.lookup(tmp_valid_xml.strpath)
+    cache.store(tmp_valid_xml.strpath, XmlHandler(tmp_valid_xml.strpath).snapshot())
+
+    xml = XmlHandler(tmp_valid_xml.strpath)
+    xml.set({"status": "edited"})
+    xml.write()
+
+    assert cache.lookup(tmp_valid_xml.strpath) is None
+    cache.close()
+
+    cache = MetadataCache(tmpdir.join("cache.sqlite").strpath, rebuild=True)
+    assert cache.lookup(tmp_valid_xml.strpath) is None
+
+
+def test_metadata_cache_cli(tmp_valid_xml, cachedir, capsys):
+    """Checks if 'get' reads the same data from the cache
+    """
+    clicmd = "set -p maintainer=toms {}".format(tmp_valid_xml.strpath)
+    Actions(parsecli(shlex.split(clicmd))).parse()
+    assert not cachedir.join(CACHE_NAME).exists()
+
+    Actions(parsecli(shlex.split("--no-cache get -p maintainer {}".format(tmp_valid_xml.strpath))))
+    assert not cachedir.join(CACHE_NAME).exists()
+
+    results = []
+    for _ in range(2):
+        clicmd = "get -p maintainer {}".format(tmp_valid_xml.strpath)
+        results.append(Actions(parsecli(shlex.split(clicmd))).parse())
+
+    assert cachedir.join(CACHE_NAME).exists()
+    assert results[0] == results[1]
+    assert results[1]['data'][0][1] == {"maintainer": "toms"}
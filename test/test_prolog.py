@@ -2,7 +2,8 @@
 
 import pytest
 import re
-from docmanager.xmlutil import findprolog
+from docmanager.exceptions import DMXmlParseError
+from docmanager.xmlutil import compilestarttag, findprolog, scanprolog
 from io import StringIO
 
 IDS =['normal', 'with_cr',
@@ -181,3 +182,56 @@ def test_prolog_with_filename(xml, expected, tmpdir):
     result = findprolog(tmp)
     assert result == expected
 
+
+def test_prolog_large_file(tmpdir):
+    """Checks if the prolog is found in a file which is larger than a chunk,
+       and if maxsize limits what is read
+    """
+    xml, expected = doctypeslist[0]
+    offset = expected['offset']
+    # a long comment in front of the start tag
+    xml = xml[:offset] + "<!--" + "x" * 10000 + "-->" + xml[offset:]
+    tmp = tmpdir.join("test.xml")
+    tmp.write(xml)
+
+    result = findprolog(tmp.strpath)
+    assert result['offset'] == offset + 10007
+    assert findprolog(StringIO(xml)) == findprolog(xml) == result
+
+    with pytest.raises(DMXmlParseError):
+        findprolog(tmp.strpath, maxsize=5000)
+
+
+def test_compilestarttag_cached():
+    """Checks if start tag patterns are kept per root tag"""
+    pattern = compilestarttag("book")
+    assert compilestarttag("book") is pattern
+    assert pattern.match('<book xmlns="x" version=\'5.0\'>').group('tagname') == "book"
+    assert compilestarttag("article") is not pattern
+
+
+@pytest.mark.parametrize("xml,expected",
+                         doctypeslist,
+                         ids=IDS
+                        )
+def test_scanprolog_partial(xml, expected):
+    """Checks if scanning of a truncated prolog asks for more data
+    """
+    end = expected['offset'] + len(expected['root'].rstrip())
+    for size in range(end - 1):
+        assert scanprolog(xml[:size], final=False) is None
+    assert scanprolog(xml, final=False) == expected
+
+
+@pytest.mark.parametrize("xml", [
+  "<author",
+  "<!DOCTYPE book [ <!ENTITY a 'b'>",
+  "<!-- no end",
+  "no xml at all",
+  "",
+])
+def test_scanprolog_broken(xml):
+    """Checks if a broken prolog raises a DMXmlParseError
+    """
+    with pytest.raises(DMXmlParseError):
+        scanprolog(xml)
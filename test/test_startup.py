@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+import os
+import re
+import subprocess
+import sys
+import docmanager
+from docmanager.config import BASECONFIG_NAME, _git_repo_config
+
+# Budget for 'import docmanager' in microseconds, as measured by
+# 'python -X importtime'; takes about 45ms on a slow machine
+IMPORT_BUDGET = 100000
+
+# Modules which a command forwarded to the daemon doesn't need
+LAZY_MODULES = ["lxml.etree", "prettytable", "urllib.request", "xml.sax",
+                "multiprocessing.pool", "sqlite3", "ctypes", "argparse",
+                "docmanager.action", "docmanager.analyzer", "docmanager.cli",
+                "docmanager.display", "docmanager.watcher"]
+
+
+def importtime(code):
+    """Runs code in a new interpreter with -X importtime
+
+    :param str code: the Python code
+    :return: {MODULE: cumulative microseconds}
+    :rtype: dict
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.dirname(os.path.dirname(docmanager.__file__))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          env=env, stderr=subprocess.PIPE, universal_newlines=True,
+                          check=True)
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)", line)
+        if match:
+            modules[match.group(2)] = int(match.group(1))
+    return modules
+
+
+def test_import_is_lazy():
+    """Importing docmanager loads only what main() needs to forward a
+       command to the daemon
+    """
+    modules = importtime("import docmanager")
+
+    assert "docmanager" in modules
+    assert not [ m for m in LAZY_MODULES if m in modules ]
+
+
+def test_import_budget():
+    """Importing docmanager stays within IMPORT_BUDGET (best of three runs
+       because of noisy machines)
+    """
+    best = min(importtime("import docmanager")["docmanager"] for _ in range(3))
+
+    assert best < IMPORT_BUDGET, "import docmanager took {}us".format(best)
+
+
+def test_lazy_names():
+    """The names which are imported lazily are still available"""
+    from docmanager import Actions, getrenderer, parsecli
+    from docmanager.action import Actions as action_Actions
+
+    assert Actions is action_Actions
+    assert callable(getrenderer) and callable(parsecli)
+
+
+def test_git_repo_config(tmpdir):
+    """The git repository is found from subdirectories without git"""
+    tmpdir.mkdir(".git")
+    subdir = tmpdir.mkdir("a").mkdir("b")
+
+    expected = os.path.join(tmpdir.strpath, ".git", BASECONFIG_NAME)
+    assert _git_repo_config(subdir.strpath) == expected
+    assert _git_repo_config(tmpdir.strpath) == expected
+
+
+def test_git_repo_config_none(tmpdir):
+    """Directories without .git get the config of the parent directories
+       (None unless the temporary directory is in a git repository)
+    """
+    subdir = tmpdir.mkdir("no-repo")
+
+    assert _git_repo_config(subdir.strpath) == _git_repo_config(tmpdir.strpath)
+    assert _git_repo_config(subdir.strpath) != os.path.join(subdir.strpath, ".git",
+                                                            BASECONFIG_NAME)
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+import pytest
+import shlex
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.xmlhandler import XmlHandler
+
+
+def test_streaming_parses_lazily(tmp_valid_xml, tmpdir):
+    """Checks if a file is parsed only when the action asks for it
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    second = tmpdir.join("second.xml")
+    tmp_valid_xml.copy(second)
+
+    clicmd = "--no-cache --executor=serial get {} {}".format(tmp_valid_xml.strpath, second.strpath)
+    handlers = Actions(parsecli(shlex.split(clicmd))).iter_handlers()
+
+    name, entry = next(handlers)
+    assert name == tmp_valid_xml.strpath
+    assert "handler" in entry
+
+    # the second file wasn't read yet
+    second.remove()
+    name, entry = next(handlers)
+    assert name == second.strpath
+    assert "error" in entry
+
+    with pytest.raises(StopIteration):
+        next(handlers)
+
+
+def test_streaming_stop_on_error(tmp_valid_xml, tmp_broken_xml):
+    """Checks if --stop-on-error leaves all files untouched
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    :param py.path.local tmp_broken_xml: Fixture, pointing to a broken XML file
+    """
+    clicmd = "set --stop-on-error -p maintainer=toms {} {}".format(
+        tmp_valid_xml.strpath, tmp_broken_xml.strpath)
+
+    with pytest.raises(SystemExit):
+        Actions(parsecli(shlex.split(clicmd))).parse()
+
+    assert XmlHandler(tmp_valid_xml.strpath).get(["maintainer"]) == {"maintainer": None}
+
+
+def test_streaming_set_invalid_usage(tmp_valid_xml, tmpdir):
+    """Checks if a wrong key=value pair is found before a file is written
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    clicmd = "set -p maintainer=toms -p foo {}".format(tmp_valid_xml.strpath)
+    before = tmp_valid_xml.read()
+
+    with pytest.raises(SystemExit):
+        Actions(parsecli(shlex.split(clicmd))).parse()
+
+    assert tmp_valid_xml.read() == before
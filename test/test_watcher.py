@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+
+import os
+import pytest
+import threading
+import time
+from docmanager.cache import MetadataCache
+from docmanager.watcher import Inotify, Watcher
+from docmanager.xmlhandler import XmlHandler
+
+
+@pytest.fixture
+def watched(tmp_valid_xml, tmpdir):
+    """Caches tmp_valid_xml and registers this process as watcher of its
+       directory
+
+    :return: (cache file, XML file)
+    """
+    cachefile = tmpdir.join("cache.sqlite").strpath
+    xmlfile = tmp_valid_xml.strpath
+
+    cache = MetadataCache(cachefile)
+    cache.lookup(xmlfile)
+    cache.store(xmlfile, XmlHandler(xmlfile, readonly=True).snapshot())
+    cache.add_watcher([os.path.dirname(xmlfile)])
+    cache.close()
+
+    return cachefile, xmlfile
+
+
+def change(xmlfile, value):
+    """Sets the maintainer of a file"""
+    xml = XmlHandler(xmlfile)
+    xml.set({"maintainer": value})
+    xml.write()
+
+
+def test_watched_lookup(watched):
+    """Checks if watched files are looked up without stat() until they
+       are marked as dirty
+    """
+    cachefile, xmlfile = watched
+
+    cache = MetadataCache(cachefile)
+    assert cache.watched_since(xmlfile) is not None
+    assert cache.watched_since(os.path.join(os.path.dirname(xmlfile), ".hidden", "x.xml")) is None
+
+    # the file was checked before the watcher started, so it is checked once
+    assert cache.lookup(xmlfile) is not None
+    assert cache.watched == 0
+    cache.flush()
+
+    assert cache.lookup(xmlfile) is not None
+    assert cache.watched == 1
+
+    change(xmlfile, "toms")
+    cache.mark_dirty([xmlfile])
+    assert cache.lookup(xmlfile) is None
+    cache.close()
+
+
+def test_watcher_poll(watched):
+    """Checks if the polling watcher marks changed files
+    """
+    cachefile, xmlfile = watched
+    cache = MetadataCache(cachefile)
+    cache.lookup(xmlfile)
+    cache.flush()
+
+    change(xmlfile, "toms")
+    watcher = Watcher(cache, [os.path.dirname(xmlfile)], poll=True)
+    assert watcher.mode == "poll"
+    watcher.poll()
+
+    assert cache.lookup(xmlfile) is None
+    cache.close()
+
+
+def test_watcher_inotify(watched):
+    """Checks if inotify events mark changed files
+    """
+    try:
+        Inotify().close()
+    except OSError:
+        pytest.skip("inotify is not available")
+
+    cachefile, xmlfile = watched
+    directory = os.path.dirname(xmlfile)
+
+    # the sqlite connection can only be used by the thread which created it
+    watchers = []
+    def watch():
+        watcher = Watcher(MetadataCache(cachefile), [directory], interval=0.05)
+        watchers.append(watcher)
+        watcher.run()
+
+    thread = threading.Thread(target=watch)
+    thread.start()
+
+    try:
+        for _ in range(500):
+            if watchers and watchers[0].running:
+                break
+            time.sleep(0.01)
+        assert watchers[0].mode == "inotify"
+
+        cache = MetadataCache(cachefile)
+        cache.lookup(xmlfile)
+        cache.flush()
+        assert cache.lookup(xmlfile) is not None and cache.watched == 1
+
+        change(xmlfile, "toms")
+        for _ in range(100):
+            if cache.lookup(xmlfile) is None:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("the change was not noticed")
+        cache.close()
+    finally:
+        if watchers:
+            watchers[0].stop()
+        thread.join()
+
+    # the watcher is unregistered
+    assert not MetadataCache(cachefile).roots
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="no symbolic links")
+def test_watched_symlinks(tmpdir, testdir):
+    """Checks if symbolic links and files in symbolically linked
+       directories are checked with stat() although a watcher runs, because
+       changes of their targets don't cause events
+    """
+    cachefile = tmpdir.join("cache.sqlite").strpath
+    root = tmpdir.mkdir("root")
+    outside = tmpdir.mkdir("outside")
+    (testdir / "valid_xml_file.xml").copy(outside / "t.xml")
+    (testdir / "valid_xml_file.xml").copy(root / "plain.xml")
+    (root / "link.xml").mksymlinkto(outside / "t.xml")
+    (root / "linkdir").mksymlinkto(outside)
+
+    files = [ root.join(name).strpath for name in ("link.xml", "linkdir/t.xml", "plain.xml") ]
+
+    cache = MetadataCache(cachefile)
+    for xmlfile in files:
+        change(xmlfile, "b")
+        cache.lookup(xmlfile)
+        cache.store(xmlfile, XmlHandler(xmlfile, readonly=True).snapshot())
+    cache.add_watcher([root.strpath])
+    cache.close()
+
+    cache = MetadataCache(cachefile)
+    for xmlfile in files:
+        cache.lookup(xmlfile)
+    cache.flush()
+
+    assert [ cache.watched_since(f) is not None for f in files ] == [False, False, True]
+
+    change(outside.join("t.xml").strpath, "CHANGED")
+    for xmlfile in files[:2]:
+        assert cache.lookup(xmlfile) is None
+    assert cache.lookup(files[2])["props"]["maintainer"] == "b"
+    cache.close()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+import os
+import shlex
+from docmanager.action import Actions
+from docmanager.cli import parsecli
+from docmanager.xmlhandler import XmlHandler
+
+
+def test_dirty_set(tmp_docmanager_overwrite):
+    """Checks if only real changes mark the tree as modified
+
+    :param py.path.local tmp_docmanager_overwrite: Fixture, pointing to a
+                                                   temporary XML file
+    """
+    xml = XmlHandler(tmp_docmanager_overwrite.strpath)
+    assert not xml.dirty
+
+    xml.set({"hello": "SUSE"})
+    xml.set_attr("hello", {})
+    xml.del_attr("hello", ["since"])
+    assert not xml.delete("hello", "openSUSE")
+    assert not xml.dirty
+
+    xml.set({"hello": "openSUSE"})
+    assert xml.dirty
+
+    xml.write()
+    assert not xml.dirty
+
+
+def test_dirty_set_multiple_keys(tmp_docmanager_overwrite):
+    """Checks if several keys in one set() call are siblings
+
+    :param py.path.local tmp_docmanager_overwrite: Fixture, pointing to a
+                                                   temporary XML file
+    """
+    xml = XmlHandler(tmp_docmanager_overwrite.strpath)
+    xml.set({"bugtracker/url": "https://bugzilla.suse.com", "status": "editing"})
+
+    assert xml.get(["bugtracker/url", "status"]) == {"bugtracker/url": "https://bugzilla.suse.com",
+                                                    "status": "editing"}
+
+
+def test_dirty_cli_skips_write(tmp_docmanager_overwrite, capsys):
+    """Checks if 'set' doesn't write a file which already has the value
+
+    :param py.path.local tmp_docmanager_overwrite: Fixture, pointing to a
+                                                   temporary XML file
+    :param capsys: capture system stdout and stderr
+    """
+    filename = tmp_docmanager_overwrite.strpath
+    os.utime(filename, (0, 0))
+
+    clicmd = "set -p hello=SUSE {}".format(filename)
+    Actions(parsecli(shlex.split(clicmd))).parse()
+
+    out, _ = capsys.readouterr()
+    assert os.stat(filename).st_mtime == 0
+    assert "XML file was unchanged" in out
+    assert "Wrote" not in out
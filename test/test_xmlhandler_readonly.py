@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+
+import pytest
+from io import StringIO
+from docmanager.exceptions import DMXmlParseError
+from docmanager.xmlhandler import XmlHandler
+from docmanager.xmlutil import iterpreserved, preserve_entities
+
+INFO = """<!DOCTYPE article [
+<!ENTITY foo "Hallo Welt">
+]>
+<article version="5.0" xml:lang="en"
+        xmlns:dm="urn:x-suse:ns:docmanager"
+        xmlns="http://docbook.org/ns/docbook">
+  <title>Example &foo;</title>
+  <info>
+    <dm:docmanager>
+      <dm:maintainer>toms</dm:maintainer>
+      <dm:bugtracker>
+        <dm:url>https://bugzilla.suse.com</dm:url>
+      </dm:bugtracker>
+    </dm:docmanager>
+  </info>
+  <para>Bla and &foo;</para>
+"""
+
+
+def test_XmlHandler_readonly(tmp_valid_xml):
+    """Checks if the read-only mode returns the same properties
+    """
+    full = XmlHandler(tmp_valid_xml.strpath)
+    full.set({"maintainer": "toms"})
+    full.set({"bugtracker/url": "https://bugzilla.suse.com"})
+    full.write()
+
+    full = XmlHandler(tmp_valid_xml.strpath)
+    xml = XmlHandler(tmp_valid_xml.strpath, readonly=True)
+
+    assert xml.get_all() == full.get_all()
+    assert xml.get(["maintainer"]) == {"maintainer": "toms"}
+
+
+def test_XmlHandler_readonly_stops_after_info(tmpdir):
+    """Checks if the read-only mode never reads behind the <info> element
+    """
+    xmlfile = tmpdir.join("broken_after_info.xml")
+    xmlfile.write(INFO + "  <para>" + "&foo; and <broken " * 10000)
+
+    with pytest.raises(DMXmlParseError):
+        XmlHandler(xmlfile.strpath)
+
+    xml = XmlHandler(xmlfile.strpath, readonly=True)
+    assert xml.get(["maintainer"]) == {"maintainer": "toms"}
+    assert xml.get(["bugtracker/url"]) == {"bugtracker/url": "https://bugzilla.suse.com"}
+
+
+def test_XmlHandler_readonly_missing_info(tmp_missing_info_element):
+    """Checks the read-only mode with a file without <info> element
+    """
+    xml = XmlHandler(tmp_missing_info_element.strpath, readonly=True)
+
+    assert xml.dm is not None
+    assert xml.get_all() == {}
+
+
+def test_XmlHandler_readonly_write(tmp_valid_xml):
+    """Checks if a read-only XmlHandler refuses to write
+    """
+    xml = XmlHandler(tmp_valid_xml.strpath, readonly=True)
+
+    with pytest.raises(ValueError):
+        xml.write()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_iterpreserved(size):
+    """Checks if entities are preserved when split across chunks
+    """
+    text = "a &welt; b &#xa0; c &ab1;&cde; d & e; &w.e.lt;"
+    result = "".join(iterpreserved(StringIO(text), size=size))
+
+    assert result == preserve_entities(text)
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+
+import pytest
+from lxml import etree
+from docmanager.xmlhandler import XmlHandler
+from docmanager.xmlutil import decodebuffer, findnodespan, get_node_path, iterdecoded, \
+     mapfile, scanprolog, FEEDSIZE
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE book [ <!ENTITY foo "<x/>"> ]>
+<book xmlns="http://docbook.org/ns/docbook" version='5.0'
+      xmlns:dm="urn:x-suse:ns:docmanager">
+  <!-- <info> in a comment -->
+  <title>&foo; and &#169;</title>
+  <?dbfo <info>?>
+  <info>
+    <abstract><para><![CDATA[</info>]]></para></abstract>
+    <dm:docmanager><dm:status>editing</dm:status></dm:docmanager>
+  </info>
+  <para role='x'>Bla &foo;<empty></empty></para>
+</book>
+"""
+
+
+@pytest.mark.parametrize("tag", ["info", "docmanager", "abstract", "para"])
+def test_findnodespan(tag):
+    """Checks if the position of an element is found in the original text
+
+    :param str tag: local name of the element
+    """
+    offset = scanprolog(DOCUMENT)['offset']
+    root = etree.fromstring(DOCUMENT[offset:].replace("&", "&amp;"))
+    node = next(root.iter("{*}" + tag))
+
+    start, end = findnodespan(DOCUMENT, offset, get_node_path(node))
+    assert DOCUMENT[start:].startswith("<" + ("dm:" if tag == "docmanager" else "") + tag)
+    assert etree.fromstring(DOCUMENT[start:end].replace("&", "&amp;"),
+                            etree.XMLParser(recover=True)) is not None
+    assert DOCUMENT[end - len(tag) - 1:end] == tag + ">"
+
+
+def test_write_splices_docmanager(tmpdir):
+    """Checks if write() keeps everything outside of the docmanager element
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    xmlfile = tmpdir.join("splice.xml")
+    xmlfile.write(DOCUMENT)
+
+    xml = XmlHandler(xmlfile.strpath)
+    xml.set({"maintainer": "toms"})
+    xml.write()
+    xml.set({"priority": "2"})
+    xml.write()
+
+    content = xmlfile.read()
+    start = DOCUMENT.index("<dm:docmanager>")
+    end = DOCUMENT.index("</dm:docmanager>") + len("</dm:docmanager>")
+
+    assert content.startswith(DOCUMENT[:start])
+    assert content.endswith(DOCUMENT[end:])
+    assert "xmlns" not in content[start:len(content) - len(DOCUMENT) + end]
+
+    props = XmlHandler(xmlfile.strpath).get_all()
+    assert dict(props) == {"status": "editing", "maintainer": "toms", "priority": "2"}
+
+
+def test_write_splices_info(tmp_valid_xml):
+    """Checks if write() only adds the docmanager element to an info
+       element without one
+
+    :param py.path.local tmp_valid_xml: Fixture, pointing to a temporary XML file
+    """
+    original = tmp_valid_xml.read()
+
+    xml = XmlHandler(tmp_valid_xml.strpath)
+    xml.set({"maintainer": "toms"})
+    xml.write()
+
+    content = tmp_valid_xml.read()
+    end = original.index("</info>")
+    assert content.startswith(original[:original.rindex("\n", 0, end) + 1])
+    assert content.endswith(original[end:])
+    assert "  </author>\n    <dm:docmanager>\n      <dm:maintainer>toms</dm:maintainer>\n" \
+           "    </dm:docmanager>\n  </info>" in content
+
+
+def test_write_creates_info(tmp_missing_info_element):
+    """Checks if the whole tree is written if the info element was created
+       and if the next write() splices into it
+
+    :param py.path.local tmp_missing_info_element: Fixture, pointing to a
+                                                   temporary XML file
+    """
+    xml = XmlHandler(tmp_missing_info_element.strpath)
+    xml.set({"maintainer": "toms"})
+    xml.write()
+    xml.set({"status": "edited"})
+    xml.write()
+
+    props = XmlHandler(tmp_missing_info_element.strpath).get_all()
+    assert dict(props) == {"maintainer": "toms", "status": "edited"}
+
+
+def test_write_splices_large_file(tmpdir):
+    """Checks if a file which is fed in many chunks keeps its entities,
+       non-ASCII characters, and Windows line endings
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    para = "  <para>&foo; äöü &#169; &product-name;</para>\n"
+    document = DOCUMENT.replace("</book>", para * 10000 + "</book>")
+    assert len(document.encode("utf-8")) > 4 * FEEDSIZE
+
+    xmlfile = tmpdir.join("large.xml")
+    xmlfile.write_binary(document.replace("\n", "\r\n").encode("utf-8"))
+
+    xml = XmlHandler(xmlfile.strpath)
+    xml.set({"maintainer": "toms"})
+    xml.write()
+
+    content = xmlfile.read_binary().decode("utf-8")
+    end = DOCUMENT.index("</dm:docmanager>") + len("</dm:docmanager>")
+    assert content.endswith(document[end:])
+    assert XmlHandler(xmlfile.strpath).get_all()["maintainer"] == "toms"
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_iterdecoded(size):
+    """Checks if multibyte characters and line endings are decoded across
+       chunks like open() does
+
+    :param int size: size of a chunk
+    """
+    data = "ä\r\n€\rx\n𝄞\r\n".encode("utf-8")
+    assert "".join(iterdecoded(data, size)) == "ä\n€\nx\n𝄞\n"
+    assert decodebuffer(data) == "ä\n€\nx\n𝄞\n"
+
+
+def test_mapfile(tmpdir):
+    """Checks if empty files can be read, too
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    empty = tmpdir.join("empty.xml")
+    empty.write("")
+    assert len(mapfile(empty.strpath)) == 0
+
+    xmlfile = tmpdir.join("splice.xml")
+    xmlfile.write(DOCUMENT)
+    assert decodebuffer(mapfile(xmlfile.strpath)) == DOCUMENT
+
+
+def test_parse_more_files_than_fd_limit(tmpdir):
+    """Checks if handlers which wait for write() don't keep their mapped
+       file open, so more files than the file descriptor limit can be
+       parsed before they are written
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = 200
+    if hard != resource.RLIM_INFINITY and hard < limit:
+        pytest.skip("the file descriptor limit is too low")
+
+    files = list()
+    for i in range(limit + 100):
+        xmlfile = tmpdir.join("splice-{}.xml".format(i))
+        xmlfile.write(DOCUMENT)
+        files.append(xmlfile)
+
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        handlers = [ XmlHandler(f.strpath) for f in files ]
+
+        # there are file descriptors left for writing
+        streams = [ open(f.strpath) for f in files[:10] ]
+        for stream in streams:
+            stream.close()
+
+        for xml in handlers:
+            xml.set({"maintainer": "toms"})
+            xml.write()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    for xmlfile in files:
+        content = xmlfile.read()
+        assert content.startswith(DOCUMENT[:DOCUMENT.index("<dm:docmanager>")])
+        assert "<dm:maintainer>toms</dm:maintainer>" in content
+
+
+def test_splice_modified_file(tmpdir):
+    """Checks if a file which was modified after it was parsed is written
+       from the tree instead of splicing into the new content
+
+    :param py.path.local tmpdir: temporary directory (fixture)
+    """
+    xmlfile = tmpdir.join("splice.xml")
+    xmlfile.write(DOCUMENT)
+
+    xml = XmlHandler(xmlfile.strpath)
+    xmlfile.write(DOCUMENT.replace("Bla", "Modified, longer text"))
+    xml.set({"maintainer": "toms"})
+    xml.write()
+
+    content = xmlfile.read()
+    assert "Modified" not in content
+    assert "<dm:maintainer>toms</dm:maintainer>" in content